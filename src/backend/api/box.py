@@ -1,19 +1,33 @@
 # src/backend/api/box.py
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
+from fastapi.responses import FileResponse, StreamingResponse, Response
+from pydantic import BaseModel, TypeAdapter
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import hashlib
+import threading
+import uuid
 import os
-import glob
 import shutil
-from api.projects import read_projects, write_projects
-import pandas as pd
+from api.projects import update_project_fields, PROJECT_SUMMARY_COLUMNS, ProjectSummary
 from sqlalchemy.orm import Session, declarative_base
-from database import get_db, Project, UploadedFile
+from sqlalchemy import func, case, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db, SessionLocal, Project, UploadedFile, ExtractedText, UploadSession
+from extraction_service import (
+    sync_content_hash, sync_folder_files, get_cached_text, get_cached_texts, store_extracted_text,
+    store_extracted_pages, finalize_extracted_pages, get_page_count, get_pages,
+    get_text_size, get_text_bytes, search_pages
+)
+from api.text_extract import iter_pages, extract_pages_timed, record_timing, get_timing_stats, get_file_type, resolve_backend, EXTRACTORS
 import json
 import re
+import time
 import requests
+import box_watcher
+import table_cache
 
 router = APIRouter()
 
@@ -35,14 +49,18 @@ class ProjectBase(BaseModel):
     class Config:
         orm_mode = True  # SQLAlchemyモデルをPydanticモデルに適合させる
 
-class UploadedFileResponse(BaseModel):
+_projects_adapter = TypeAdapter(List[ProjectSummary])
+
+class UploadedFileSummary(BaseModel):
+    """ファイル一覧用（抽出テキストは含めない。本文は /files/{project_id}/{file_id}/text で取得する）"""
     id: int
     sourcename: str
     sourcepath: str
     project_id: int
-    creation_date: datetime
+    creation_date: Optional[datetime]
     processed: bool
-    processed_text: Optional[str]
+    file_size: Optional[int]
+    page_count: Optional[int]  # 未抽出なら None
 
     class Config:
         orm_mode = True
@@ -55,6 +73,15 @@ class BoxFileItem(BaseModel): # Renamed from UploadedFile to BoxFileItem
 class LocalFileRequest(BaseModel):
     folder_path: str
     project_id: int
+    offset: int = 0
+    limit: Optional[int] = None  # 省略時はすべてのファイル
+
+class LocalFileSyncResponse(BaseModel):
+    files: List[UploadedFileSummary]
+    total: int  # フォルダ内のファイル総数（ページングの前）
+    added: int
+    changed: int
+    unchanged: int
 
 class BoxFolderLinkRequest(BaseModel):
     folder_path: str  # 相対パス
@@ -66,35 +93,56 @@ class BoxFileItem(BaseModel):
 class BaseDirectoryRequest(BaseModel):
     new_base_directory: str
 
+class BatchExtractRequest(BaseModel):
+    project_id: int
+    filenames: List[str]
+
+class UploadStartRequest(BaseModel):
+    project_id: int
+    filename: str
+    file_size: int
+    sha256: Optional[str] = None  # 指定した場合は完了時に照合する
+    overwrite: bool = False  # 同名のファイルがある場合に上書きする
+
 CONFIG_FILE = "../../data/config.json"
 
-# projectsテーブルからデータを取得する関数（PostgreSQLを使用）
-def read_projects(db: Session) -> List[Project]:
-    return db.query(Project).all()
+# テキスト抽出用プロセスプールの最大ワーカー数（CPUバウンドなPDF解析を並列化）
+EXTRACTION_MAX_WORKERS = int(os.getenv("EXTRACTION_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+_extraction_pool: Optional[ProcessPoolExecutor] = None
 
-# projectsテーブルにデータを保存する関数（PostgreSQLを使用）
-def write_projects(db: Session, project_data: List[Project]):
-    for project in project_data:
-        db.add(project)
-    db.commit()
+# ページ単位の抽出・読み出しで一度に扱うページ数と、ストリーミング時に先読みするページ数
+PAGE_BATCH_SIZE = 20
+PAGE_QUEUE_SIZE = 8
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """テキスト抽出用のプロセスプールを返す（初回呼び出し時に生成）"""
+    global _extraction_pool
+    if _extraction_pool is None:
+        _extraction_pool = ProcessPoolExecutor(max_workers=EXTRACTION_MAX_WORKERS)
+    return _extraction_pool
 
 # プロジェクトの取得エンドポイント
-@router.get("/projects", response_model=List[ProjectBase])  # Pydanticモデルをレスポンスに指定
-async def get_projects(db: Session = Depends(get_db)):
+# 一覧では bpmn_xml・solution_requirements を読み込まない（必要な場合は /api/projects/{project_id} で取得する）
+@router.get("/projects", response_model=List[ProjectSummary])  # Pydanticモデルをレスポンスに指定
+async def get_projects(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load() -> bytes:
+        projects = (await db.execute(select(*PROJECT_SUMMARY_COLUMNS).order_by(Project.id))).all()
+        return _projects_adapter.dump_json(_projects_adapter.validate_python(projects, from_attributes=True))
+
     try:
-        projects = db.query(Project).all()
-        return projects
+        return await table_cache.cached_json_response(request, "projects", "box", load)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error reading projects from database: " + str(e))
 
 # プロジェクトの作成エンドポイント
 @router.post("/projects", response_model=ProjectBase)
-async def create_project(project: ProjectBase, db: Session = Depends(get_db)):
+async def create_project(project: ProjectBase, db: AsyncSession = Depends(get_async_db)):
     try:
         project_data = Project(**project.dict())
         db.add(project_data)
-        db.commit()
-        db.refresh(project_data)
+        await db.commit()
+        table_cache.invalidate("projects")
+        await db.refresh(project_data)
         return project_data
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error writing project to database: " + str(e))
@@ -111,110 +159,18 @@ def write_config(config: dict):
     with open(CONFIG_FILE, 'w') as f:
         json.dump(config, f, indent=4)
 
-def boxnote_json_to_markdown(json_data: dict) -> str:
-    if not json_data or not json_data.get('doc') or not json_data['doc'].get('content'):
-        return ''
-
-    def process_content(content: list) -> str:
-        markdown = ''
-        if not content:
-            return markdown
-        for node in content:
-            if node['type'] == 'heading':
-                markdown += f"{'#' * node['attrs']['level']} {process_inline_content(node.get('content', []))}\n"
-            elif node['type'] == 'paragraph':
-                markdown += f"{process_inline_content(node.get('content', []))}\n\n"
-            elif node['type'] == 'bullet_list':
-                markdown += process_list(node.get('content', []), '* ')
-            elif node['type'] == 'ordered_list':
-                markdown += process_list(node.get('content', []), '1. ')
-            elif node['type'] == 'list_item':
-                markdown += process_content(node.get('content', []))
-            elif node['type'] == 'horizontal_rule':
-                markdown += '---\n'
-            elif node['type'] == 'text':
-                markdown += process_text(node)
-            elif node['type'] == 'hard_break':
-                markdown += '\n'
-            elif node['type'] == 'image':
-                markdown += f"![{node['attrs']['alt'] or 'image'}]({node['attrs']['src'] or node['attrs']['boxSharedLink']})\n"
-            elif node['type'] == 'embed':
-                markdown += f"[{node['attrs']['title']}]({node['attrs']['url']})\n"
-            elif node['type'] == 'doc':
-                markdown += process_content(node.get('content', []))
-            else:
-                markdown += process_content(node.get('content', []))
-        return markdown
-
-    def process_inline_content(content: list) -> str:
-        inline_markdown = ''
-        if not content:
-            return inline_markdown
-        for node in content:
-            if node['type'] == 'text':
-                inline_markdown += process_text(node)
-            elif node['type'] == 'hard_break':
-                inline_markdown += '\n'
-            elif node['type'] == 'image':
-                inline_markdown += f"![{node['attrs']['alt'] or 'image'}]({node['attrs']['src'] or node['attrs']['boxSharedLink']})"
-            elif node['type'] == 'embed':
-                inline_markdown += f"[{node['attrs']['title']}]({node['attrs']['url']})"
-            elif node.get('content'):
-                inline_markdown += process_inline_content(node.get('content', []))
-        return inline_markdown
-
-    def process_text(node: dict) -> str:
-        text = node.get('text', '')
-        if node.get('marks'):
-            for mark in node['marks']:
-                if mark['type'] == 'strong':
-                    text = f"**{text}**"
-                elif mark['type'] == 'highlight':
-                    text = f"<mark style='background-color:{mark['attrs'].get('color', '')}'>{text}</mark>"
-        return text
-
-    def process_list(content: list, prefix: str) -> str:
-        list_markdown = ''
-        index = 1
-        for item in content:
-            if item['type'] == 'list_item':
-                current_prefix = f"{index}. " if prefix == '1. ' else prefix
-                item_content = process_content(item['content'])
-                item_content = item_content.replace('\n+', ' ').strip()
-                list_markdown += f"{current_prefix}{item_content}\n"
-                if prefix == '1. ':
-                    index += 1
-        list_markdown += '\n'
-        return list_markdown
-
-    return process_content(json_data['doc'].get('content', []))
-
 # ファイルを一時的にローカルにダウンロードする関数
+# 接続を使い回すためのセッション
+_http_session = requests.Session()
+
 def download_file(file_url: str, local_path: str):
-    response = requests.get(file_url, stream=True)
+    response = _http_session.get(file_url, stream=True)
     if response.status_code == 200:
         with open(local_path, 'wb') as f:
             shutil.copyfileobj(response.raw, f)
     else:
         raise HTTPException(status_code=400, detail="ファイルのダウンロードに失敗しました。")
 
-import fitz  # PyMuPDF
-
-def extract_text_from_pdf(file_path: str) -> str:
-    extracted_text = ""
-    with fitz.open(file_path) as doc:
-        for page in doc:
-            page_text = page.get_text("text")  # テキスト抽出
-            # 不要な部分を削除（メタデータやオブジェクトIDなど）
-            clean_text = remove_pdf_noise(page_text)
-            extracted_text += clean_text + "\n"
-    return extracted_text
-
-def remove_pdf_noise(text: str) -> str:
-    # PDFのメタデータやオブジェクトIDなどを正規表現で削除
-    text = text.replace("trailer", "").replace("%%EOF", "").strip()
-    return text
-
 # ファイルパスをUTF-8でデコードする
 def safe_file_path(file_path: str) -> str:
     try:
@@ -223,9 +179,8 @@ def safe_file_path(file_path: str) -> str:
         # エンコードできなかった場合、エラーを発生させる
         raise HTTPException(status_code=400, detail=f"無効なファイルパス: {file_path}")
 
-# テキスト抽出処理を行うAPIエンドポイント
-@router.get("/extract-text-from-file/{project_id}/{filename}")
-async def extract_text_from_file(project_id: int, filename: str, db: Session = Depends(get_db)):
+def get_project_folder(project_id: int, db: Session) -> str:
+    """プロジェクトのBoxフォルダのフルパスを返す"""
     config = read_config()
     base_directory = config.get('box_base_directory', '')
 
@@ -237,10 +192,18 @@ async def extract_text_from_file(project_id: int, filename: str, db: Session = D
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    relative_path = project.box_folder_path
+    return os.path.join(base_directory, project.box_folder_path or '')
 
+def _prepare_project_file(project_id: int, filename: str, db: Session):
+    """
+    プロジェクトのBoxフォルダ内のファイルを特定し、uploaded_files の行と content_hash を最新の状態にする。
+    DBアクセスとハッシュ計算を伴うため、スレッドで実行する（asyncio.to_thread）。
+
+    Returns:
+        tuple: (ファイルのフルパス, UploadedFile)
+    """
     # ファイルパスをUTF-8でデコード
-    file_path = os.path.join(base_directory, relative_path, filename)
+    file_path = os.path.join(get_project_folder(project_id, db), filename)
     file_path = safe_file_path(file_path)
     print(f"File path: {file_path}")
 
@@ -253,44 +216,359 @@ async def extract_text_from_file(project_id: int, filename: str, db: Session = D
         UploadedFile.sourcename == filename
     ).first()
 
-    if uploaded_file and uploaded_file.processed and uploaded_file.processed_text:
+    if not uploaded_file:
+        # ファイルがDBに存在しない場合は新規作成 (通常はlist-local-filesで事前登録されるはず)
+        uploaded_file = UploadedFile(
+            sourcename=filename,
+            sourcepath=file_path, # フルパスを保存
+            project_id=project_id,
+            creation_date=datetime.utcnow(),
+            processed=False
+        )
+        db.add(uploaded_file)
+
+    # サイズと更新日時が変わっていなければハッシュ計算も省略される
+    sync_content_hash(db, uploaded_file, file_path)
+
+    return file_path, uploaded_file
+
+# テキスト抽出処理を行うAPIエンドポイント
+@router.get("/extract-text-from-file/{project_id}/{filename}")
+async def extract_text_from_file(project_id: int, filename: str, db: Session = Depends(get_db)):
+    # DBアクセスはイベントループをブロックしないようスレッドで実行する
+    def load():
+        file_path, uploaded_file = _prepare_project_file(project_id, filename, db)
+        # 同じ内容のファイルが（他プロジェクトも含め）抽出済みならそれを返す
+        cached_text = get_cached_text(db, uploaded_file.content_hash)
+        if cached_text is not None:
+            uploaded_file.processed = True
+        result = file_path, uploaded_file.content_hash, uploaded_file.file_size, cached_text
+        db.commit()
+        return result
+
+    file_path, content_hash, file_size, cached_text = await asyncio.to_thread(load)
+    if cached_text is not None:
         print("キャッシュヒット")
-        return {"text": uploaded_file.processed_text}
+        return {"text": cached_text}
 
     print("キャッシュミス")
 
-    file_extension = filename.split('.')[-1].lower()
-    extracted_text = ""
-
-    if file_extension == 'pdf':
-        extracted_text = extract_text_from_pdf(file_path)
-    elif file_extension == 'boxnote':
-        with open(file_path, 'r', encoding='utf-8') as file:
-            boxnote_json = json.load(file)
-            extracted_text = boxnote_json_to_markdown(boxnote_json)
-    else:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            extracted_text = file.read()
+    # 抽出処理はCPUバウンドなので、イベントループではなくプロセスプールで実行
+    loop = asyncio.get_running_loop()
+    pages, backend, elapsed = await loop.run_in_executor(get_extraction_pool(), extract_pages_timed, file_path)
+    record_timing(get_file_type(file_path), backend, elapsed, file_size or 0)
+    extracted_text = "".join(pages)
 
     # キャッシュの保存または更新
-    if uploaded_file:
-        uploaded_file.processed = True
-        uploaded_file.processed_text = extracted_text
-    else:
-        # ファイルがDBに存在しない場合は、processed=Trueとprocessed_textを設定して新規作成 (通常はlist-local-filesで事前登録されるはず)
-        new_file = UploadedFile(
-            sourcename=filename,
-            sourcepath=file_path, # フルパスを保存
-            project_id=project_id,
-            creation_date=datetime.utcnow(),
-            processed=True,
-            processed_text=extracted_text
-        )
-        db.add(new_file)
-    db.commit()
+    await asyncio.to_thread(_save_extracted_texts, project_id, {content_hash: pages})
 
     return {"text": extracted_text}
 
+def _ndjson_line(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+# 複数ファイルのテキストを一括抽出するエンドポイント（NDJSONで1ファイルずつ返却）
+@router.post("/extract-text-batch")
+async def extract_text_batch(req: BatchExtractRequest, db: Session = Depends(get_db)):
+    """
+    指定されたファイル群のテキストを抽出する。
+    キャッシュ済みのファイルは即座に返し、未処理のファイルはプロセスプールで並列に抽出して
+    完了した順にNDJSON（1行1ファイル）でストリーミングする。
+    抽出結果は最後に1トランザクションで uploaded_files に保存する。
+    """
+    config = read_config()
+    base_directory = config.get('box_base_directory', '')
+    if not base_directory:
+        raise HTTPException(status_code=400, detail="ベースディレクトリが設定されていません。")
+
+    project_id = req.project_id
+    filenames = list(dict.fromkeys(req.filenames))  # 重複を除去（順序は維持）
+
+    # DBアクセスとハッシュ計算はイベントループをブロックしないようスレッドで実行する
+    def prepare():
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        project_folder = os.path.normpath(os.path.join(base_directory, project.box_folder_path or ""))
+
+        existing_files = {
+            f.sourcename: f for f in db.query(UploadedFile).filter(
+                UploadedFile.project_id == project_id,
+                UploadedFile.sourcename.in_(filenames)
+            ).all()
+        }
+
+        errors = {}
+        targets = []  # (filename, file_path, uploaded_file)
+        for filename in filenames:
+            file_path = safe_file_path(os.path.normpath(os.path.join(project_folder, filename)))
+            if not file_path.startswith(project_folder + os.sep):
+                errors[filename] = "ファイルパスがプロジェクトフォルダを超えています。"
+                continue
+            if not os.path.isfile(file_path):
+                errors[filename] = "File not found"
+                continue
+            uploaded_file = existing_files.get(filename)
+            if not uploaded_file:
+                uploaded_file = UploadedFile(
+                    sourcename=filename,
+                    sourcepath=file_path,
+                    project_id=project_id,
+                    creation_date=datetime.utcnow(),
+                    processed=False
+                )
+                db.add(uploaded_file)
+            targets.append((filename, file_path, uploaded_file))
+
+        # content_hash の更新（サイズと更新日時が変わっていないファイルはハッシュ計算を省略）
+        for _, file_path, uploaded_file in targets:
+            sync_content_hash(db, uploaded_file, file_path)
+
+        content_hashes = {filename: uploaded_file.content_hash for filename, _, uploaded_file in targets}
+        file_paths = {filename: file_path for filename, file_path, _ in targets}
+
+        # キャッシュの確認（他プロジェクトで抽出済みの同一内容も含めて1クエリで取得）
+        cached_texts = get_cached_texts(db, content_hashes.values())
+        for filename, _, uploaded_file in targets:
+            if uploaded_file.content_hash in cached_texts:
+                uploaded_file.processed = True
+        db.commit()
+        return errors, content_hashes, file_paths, cached_texts
+
+    errors, content_hashes, file_paths, cached_texts = await asyncio.to_thread(prepare)
+
+    # 未抽出の内容ごとに1回だけ抽出する（同一内容のファイルが複数あっても解析は1回）
+    pending = {}
+    for filename, content_hash in content_hashes.items():
+        if content_hash not in cached_texts:
+            pending.setdefault(content_hash, []).append(filename)
+
+    async def generate():
+        for filename in filenames:
+            if filename in errors:
+                yield _ndjson_line({"filename": filename, "cached": False, "error": errors[filename]})
+            elif content_hashes[filename] in cached_texts:
+                yield _ndjson_line({"filename": filename, "cached": True, "text": cached_texts[content_hashes[filename]]})
+
+        loop = asyncio.get_running_loop()
+        pool = get_extraction_pool()
+
+        async def extract(content_hash: str, file_path: str):
+            try:
+                pages, backend, elapsed = await loop.run_in_executor(pool, extract_pages_timed, file_path)
+                record_timing(get_file_type(file_path), backend, elapsed, os.path.getsize(file_path))
+                return content_hash, pages, None
+            except Exception as e:
+                return content_hash, None, str(e)
+
+        extracted = {}
+        tasks = [extract(content_hash, file_paths[names[0]]) for content_hash, names in pending.items()]
+        for finished in asyncio.as_completed(tasks):
+            content_hash, pages, error = await finished
+            if error is None:
+                extracted[content_hash] = pages
+                text = "".join(pages)
+            for filename in pending[content_hash]:
+                if error:
+                    yield _ndjson_line({"filename": filename, "cached": False, "error": error})
+                else:
+                    yield _ndjson_line({"filename": filename, "cached": False, "text": text})
+
+        if extracted:
+            await asyncio.to_thread(_save_extracted_texts, project_id, extracted)
+
+        yield _ndjson_line({
+            "done": True,
+            "cached": sum(1 for h in content_hashes.values() if h in cached_texts),
+            "extracted": sum(len(pending[h]) for h in extracted),
+            "failed": len(errors) + sum(len(names) for h, names in pending.items() if h not in extracted),
+        })
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+def _save_extracted_texts(project_id: int, extracted: dict):
+    """抽出結果（content_hash → ページのリスト）を1トランザクションで保存し、該当ファイルを処理済みにする"""
+    db = SessionLocal()  # レスポンスのストリーミング中はリクエストのセッションが閉じているため新たに生成する
+    try:
+        for content_hash, pages in extracted.items():
+            store_extracted_text(db, content_hash, pages)
+        db.query(UploadedFile).filter(
+            UploadedFile.project_id == project_id,
+            UploadedFile.content_hash.in_(list(extracted.keys()))
+        ).update({UploadedFile.processed: True}, synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+# PDFなどをページ単位で抽出し、NDJSON（1行1ページ）でストリーミングするエンドポイント
+@router.get("/extract-pages/{project_id}/{filename}")
+async def extract_pages_from_file(project_id: int, filename: str, db: Session = Depends(get_db)):
+    """
+    ファイルのテキストを1ページずつ {"page": n, "text": "..."} の形式で返し、最後に {"done": true, "page_count": n} を返す。
+    抽出済みであればDBからページ単位で読み出し、未抽出であれば抽出しながら返してページごとに保存する。
+    どちらの場合も全ページ分のテキストをメモリに保持しない。
+    """
+    def load():
+        file_path, uploaded_file = _prepare_project_file(project_id, filename, db)
+        page_count = get_page_count(db, uploaded_file.content_hash)
+        if page_count is not None:
+            uploaded_file.processed = True
+        content_hash = uploaded_file.content_hash
+        db.commit()
+        return file_path, content_hash, page_count
+
+    file_path, content_hash, page_count = await asyncio.to_thread(load)
+
+    if page_count is not None:
+        async def generate_cached():
+            for start_page in range(1, page_count + 1, PAGE_BATCH_SIZE):
+                pages = await asyncio.to_thread(_read_pages, content_hash, start_page, start_page + PAGE_BATCH_SIZE - 1)
+                for page in pages:
+                    yield _ndjson_line({**page, "cached": True})
+            yield _ndjson_line({"done": True, "page_count": page_count})
+
+        return StreamingResponse(generate_cached(), media_type="application/x-ndjson")
+
+    async def generate():
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=PAGE_QUEUE_SIZE)  # 上限を設けてクライアントが遅い場合は抽出側を待たせる
+        cancelled = threading.Event()
+        producer = loop.run_in_executor(None, _produce_pages, file_path, content_hash, project_id, queue, loop, cancelled)
+        try:
+            page_number = 0
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    yield _ndjson_line({"error": str(item)})
+                    return
+                page_number += 1
+                yield _ndjson_line({"page": page_number, "text": item, "cached": False})
+            await producer
+            yield _ndjson_line({"done": True, "page_count": page_number})
+        finally:
+            cancelled.set()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+def _read_pages(content_hash: str, start_page: int, end_page: int) -> List[dict]:
+    db = SessionLocal()
+    try:
+        return get_pages(db, content_hash, start_page, end_page)
+    finally:
+        db.close()
+
+def _produce_pages(file_path: str, content_hash: str, project_id: int, queue: asyncio.Queue,
+                   loop: asyncio.AbstractEventLoop, cancelled: threading.Event):
+    """
+    スレッド上でページを抽出してキューに渡しつつ、PAGE_BATCH_SIZE ページごとにDBへ書き込む。
+    全ページを書き終えたら全文を登録して1トランザクションでコミットする。
+    クライアントが切断した場合はロールバックする。
+    """
+    def put(item) -> bool:
+        while not cancelled.is_set():
+            future = asyncio.run_coroutine_threadsafe(asyncio.wait_for(queue.put(item), timeout=1), loop)
+            try:
+                future.result()
+                return True
+            except asyncio.TimeoutError:
+                continue
+        return False
+
+    db = SessionLocal()
+    try:
+        backend, _ = resolve_backend(file_path)
+        start = time.perf_counter()
+        batch = []
+        page_count = 0
+        for page_text in iter_pages(file_path, backend):
+            if not put(page_text):
+                db.rollback()
+                return
+            batch.append(page_text)
+            page_count += 1
+            if len(batch) >= PAGE_BATCH_SIZE:
+                store_extracted_pages(db, content_hash, page_count - len(batch) + 1, batch)
+                batch = []
+        store_extracted_pages(db, content_hash, page_count - len(batch) + 1, batch)
+        finalize_extracted_pages(db, content_hash, page_count)
+        # クライアントへの送信待ちの時間も含むため、集計値は目安
+        record_timing(get_file_type(file_path), backend, time.perf_counter() - start, os.path.getsize(file_path))
+        db.query(UploadedFile).filter(
+            UploadedFile.project_id == project_id,
+            UploadedFile.content_hash == content_hash
+        ).update({UploadedFile.processed: True}, synchronize_session=False)
+        db.commit()
+        put(None)
+    except Exception as e:
+        db.rollback()
+        put(e)
+    finally:
+        db.close()
+
+# 抽出済みテキストのページ範囲を取得するエンドポイント（チャットや検索から必要なページだけを読む用途）
+@router.get("/file-pages/{project_id}/{filename}")
+async def get_file_pages(project_id: int, filename: str, start_page: int = 1, end_page: Optional[int] = None,
+                         db: AsyncSession = Depends(get_async_db)):
+    uploaded_file = (await db.execute(select(UploadedFile.content_hash).where(
+        UploadedFile.project_id == project_id,
+        UploadedFile.sourcename == filename
+    ))).first()
+    if not uploaded_file:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    # extraction_service の関数は同期セッション用のため run_sync で非同期の接続上で実行する
+    page_count = await db.run_sync(get_page_count, uploaded_file.content_hash)
+    if page_count is None:
+        raise HTTPException(status_code=404, detail="テキストがまだ抽出されていません。")
+
+    start_page = max(start_page, 1)
+    end_page = min(end_page or page_count, page_count)
+    if start_page > end_page:
+        raise HTTPException(status_code=400, detail="ページ範囲が不正です。")
+
+    return {
+        "filename": filename,
+        "page_count": page_count,
+        "pages": await db.run_sync(get_pages, uploaded_file.content_hash, start_page, end_page),
+    }
+
+# プロジェクトのファイルの全文検索エンドポイント
+@router.get("/search/{project_id}")
+async def search_files(project_id: int, q: str, limit: int = 20, db: AsyncSession = Depends(get_async_db)):
+    """
+    抽出済みテキストを全文検索し、該当ページとスニペットをスコア順に返す。
+    q は空白区切りで複数の語を指定でき、すべての語を含むページが対象になる（2文字以上の語が1つ以上必要）。
+    """
+    start = time.perf_counter()
+    try:
+        results = await db.run_sync(search_pages, project_id, q, limit=min(max(limit, 1), 100))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "query": q,
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+# テキスト抽出器（形式ごとのバックエンド）と処理時間の集計を返すエンドポイント
+@router.get("/extractors")
+async def get_extractors():
+    return {
+        "extractors": {
+            file_type: {
+                "backends": list(backends.keys()),
+                "selected": resolve_backend(f"file.{file_type}")[0],
+            }
+            for file_type, backends in EXTRACTORS.items()
+        },
+        "stats": get_timing_stats(),
+    }
+
 # グローバルベースディレクトリの取得エンドポイント
 @router.get("/base-directory", response_model=dict)
 async def get_base_directory():
@@ -320,7 +598,7 @@ async def set_base_directory(req: BaseDirectoryRequest):
 
 # プロジェクトにBoxフォルダの相対パスを紐づけるエンドポイント
 @router.put("/connect/{project_id}", response_model=dict)
-async def connect_box_folder(project_id: int, req: BoxFolderLinkRequest):
+async def connect_box_folder(project_id: int, req: BoxFolderLinkRequest, db: AsyncSession = Depends(get_async_db)):
     config = read_config()
     base_directory = config.get('box_base_directory', '')
     if not base_directory:
@@ -345,108 +623,110 @@ async def connect_box_folder(project_id: int, req: BoxFolderLinkRequest):
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Boxフォルダの作成に失敗しました: {e}")
 
-    df = read_projects()
-    if project_id not in df['id'].values:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    index = df.index[df['id'] == project_id][0]
-    df.at[index, 'box_folder_path'] = relative_path
-    write_projects(df)
-    updated_project = df.loc[index].to_dict()
+    updated_project = await update_project_fields(db, project_id, box_folder_path=relative_path)
     return {
         "project_id": project_id,
         "box_folder_path": relative_path,
         "message": "Boxフォルダがプロジェクトに連携されました。",
-        "project": updated_project
+        "project": ProjectBase.from_orm(updated_project)
     }
 
 # プロジェクトからBoxフォルダの連携を解除するエンドポイント
 @router.delete("/disconnect/{project_id}", response_model=dict)
-async def disconnect_box_folder(project_id: int):
+async def disconnect_box_folder(project_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     プロジェクトからBoxフォルダの相対パスの紐づけを解除。
-    CSVの box_folder_path をクリアする処理。
+    projects テーブルの box_folder_path をクリアする処理。
     """
-    df = read_projects()
-    if project_id not in df['id'].values:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    index = df.index[df['id'] == project_id][0]
-    df.at[index, 'box_folder_path'] = ""
-    write_projects(df)
-    updated_project = df.loc[index].to_dict()
+    updated_project = ProjectBase.from_orm(await update_project_fields(db, project_id, box_folder_path=""))
     return {
         "project_id": project_id,
         "message": "Boxフォルダがプロジェクトから切断されました。",
         "project": updated_project
     }
 
+def _scan_local_files(folder_path: str) -> List[tuple]:
+    """
+    フォルダ直下のファイルを (フルパス, サイズ, 最終更新時刻) のリストでパス順に返す（隠しファイルは除く）。
+    ファイルはファイル名で扱う（/extract-text/{filename} など）ため、サブフォルダは対象にしない。
+    """
+    results = []
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if not entry.name.startswith('.') and entry.is_file():
+                stat = entry.stat()
+                results.append((entry.path, stat.st_size, stat.st_mtime))
+    results.sort()
+    return results
+
 # ローカルファイルの一覧取得エンドポイント
-@router.post("/list-local-files", response_model=List[UploadedFileResponse])
+@router.post("/list-local-files", response_model=LocalFileSyncResponse)
 async def list_local_files(req: LocalFileRequest, db: Session = Depends(get_db)):
+    """
+    フォルダ内のファイルを uploaded_files に同期し、ファイル一覧と追加・変更・未変更の件数を返す。
+    同期は1回のトランザクションで行い、offset/limit を指定した場合はその範囲のファイルだけを同期する。
+    """
     folder_path = req.folder_path
     project_id = req.project_id  # project_idをリクエストから受け取る
     if not os.path.isdir(folder_path):
         raise HTTPException(status_code=400, detail="指定されたパスはフォルダではありません。")
 
-    files = glob.glob(os.path.join(folder_path, "*"))
-    uploaded_files = []
-
-    for file_path in files:
-        if os.path.isfile(file_path):
-            filename = os.path.basename(file_path)
-            sourcename = filename  # sourcenameはファイル名と仮定
-            sourcepath = file_path  # sourcepathはフルパスを使用
-            file_last_modified = datetime.fromtimestamp(os.path.getmtime(file_path)) # ファイルの最終更新日時を取得
-
-            # 同じsourcename, sourcepath, project_idのデータがすでに存在するか確認
-            existing_file = db.query(UploadedFile).filter(
-                UploadedFile.sourcename == sourcename,
-                UploadedFile.sourcepath == sourcepath,
-                UploadedFile.project_id == project_id
-            ).first()
-
-            if existing_file:
-                # 既存のレコードがあれば、ファイルの最終更新日時を比較
-                if existing_file.creation_date < file_last_modified: # データベースのcreation_dateよりファイル最終更新日時が新しい = ファイルが更新された
-                    existing_file.processed = False
-                    existing_file.processed_text = None
-                else:
-                    pass
-            else:
-                # 新規レコードの場合
-                new_file = UploadedFile(
-                    sourcename=sourcename,
-                    sourcepath=sourcepath,
-                    project_id=project_id,
-                    creation_date=file_last_modified, # 初回登録時のみ最終更新日時を設定
-                    processed=False, # 初回は未処理とする
-                    processed_text=None
-                )
-                db.add(new_file)
-                existing_file = new_file # 新規ファイルもuploaded_filesに追加するためにexisting_fileに代入
-
-            # データベースに変更をコミット (existing_file が None でない場合のみコミット)
-            if existing_file: # 新規登録または既存ファイル更新の場合のみコミット
-                db.commit()
-                db.refresh(existing_file) # refresh してidなどを取得
-                uploaded_files.append(existing_file)
-
-
-    return uploaded_files
+    def sync():
+        entries = _scan_local_files(folder_path)
+        end = req.offset + req.limit if req.limit is not None else None
+        page = entries[req.offset:end]
+        try:
+            # サイズか更新日時が変わったファイルだけハッシュを再計算し、内容が変わっていれば処理状態を更新
+            # （更新日時だけ変わった場合や、同じ内容が他プロジェクトで抽出済みの場合は再抽出しない）
+            counts = sync_folder_files(db, project_id, page)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        paths = [path for path, _, _ in page]
+        summaries = _query_file_summaries(
+            db, UploadedFile.project_id == project_id, UploadedFile.sourcepath.in_(paths)
+        ) if paths else []
+        return len(entries), paths, counts, summaries
+
+    # 走査・ハッシュ計算・DBアクセスはイベントループをブロックしないようスレッドで実行
+    total, paths, counts, summaries = await asyncio.to_thread(sync)
+
+    summaries_by_path = {summary.sourcepath: summary for summary in summaries}
+    uploaded_files = [summaries_by_path[path] for path in paths if path in summaries_by_path]
+
+    return LocalFileSyncResponse(files=uploaded_files, total=total, **counts)
+
+def _query_file_summaries(db: Session, *filters) -> List[UploadedFileSummary]:
+    """ファイル一覧を取得する。必要な列だけを読み込み、抽出テキストは読まない"""
+    rows = db.query(
+        UploadedFile.id,
+        UploadedFile.sourcename,
+        UploadedFile.sourcepath,
+        UploadedFile.project_id,
+        UploadedFile.creation_date,
+        UploadedFile.processed,
+        UploadedFile.file_size,
+        # ページ単位で保存されていないテキストは1ページとして扱う（get_page_count と同じ）
+        func.coalesce(
+            ExtractedText.page_count, case((ExtractedText.content_hash.isnot(None), 1))
+        ).label("page_count"),
+    ).outerjoin(
+        ExtractedText, ExtractedText.content_hash == UploadedFile.content_hash
+    ).filter(*filters).order_by(UploadedFile.sourcename).all()
+    return [UploadedFileSummary.from_orm(row) for row in rows]
 
 # 全プロジェクトのファイル一覧取得エンドポイント
-@router.get("/files", response_model=List[UploadedFileResponse])
-async def get_all_files(project_id: int, db: Session = Depends(get_db)):
+@router.get("/files", response_model=List[UploadedFileSummary])
+async def get_all_files(project_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     すべてのプロジェクトのファイル一覧を取得する。
     """
-    files_from_db = db.query(UploadedFile).filter(UploadedFile.project_id == project_id).all() # データベースから UploadedFile モデルのリストを取得
-    return files_from_db
+    return await db.run_sync(_query_file_summaries, UploadedFile.project_id == project_id)
 
 # 特定プロジェクトのファイル一覧取得エンドポイント
-@router.get("/files/{project_id}", response_model=List[UploadedFileResponse])
-async def get_files_by_project(project_id: int, db: Session = Depends(get_db)):
+@router.get("/files/{project_id}", response_model=List[UploadedFileSummary])
+async def get_files_by_project(project_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     特定のプロジェクトのファイル一覧を取得する。
     """
@@ -454,13 +734,262 @@ async def get_files_by_project(project_id: int, db: Session = Depends(get_db)):
     base_directory = config.get('box_base_directory', '')
     if not base_directory:
         raise HTTPException(status_code=400, detail="ベースディレクトリが設定されていません。")
-    
-    db_files = db.query(UploadedFile).filter(UploadedFile.project_id == project_id).all()
 
-    # SQLAlchemy モデル (database.UploadedFile) を Pydantic モデル (api.box.UploadedFileResponse) に変換
-    response_files = [UploadedFileResponse.from_orm(db_file) for db_file in db_files]
+    return await db.run_sync(_query_file_summaries, UploadedFile.project_id == project_id)
+
+def parse_byte_range(range_header: Optional[str], total: int) -> Optional[Tuple[int, int]]:
+    """
+    Range ヘッダー（bytes=start-end / bytes=start- / bytes=-suffix）を解釈し、(開始, 終了) のバイト位置（両端を含む）を返す。
+    ヘッダーがない・解釈できない場合は None（全体を返す）。範囲が満たせない場合は 416 を送出する。
+    """
+    if not range_header:
+        return None
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", range_header)
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+
+    if match.group(1):
+        start = int(match.group(1))
+        end = min(int(match.group(2)), total - 1) if match.group(2) else total - 1
+    else:
+        start = max(total - int(match.group(2)), 0)
+        end = total - 1
+    if start >= total or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="指定された範囲は取得できません。",
+            headers={"Content-Range": f"bytes */{total}"}
+        )
+    return start, end
+
+# 1ファイルの抽出済みテキスト取得エンドポイント
+@router.get("/files/{project_id}/{file_id}/text")
+async def get_file_text(project_id: int, file_id: int,
+                        start_page: Optional[int] = None, end_page: Optional[int] = None,
+                        range_header: Optional[str] = Header(None, alias="Range"),
+                        db: AsyncSession = Depends(get_async_db)):
+    """
+    ファイルの抽出済みテキストを取得する。
+    start_page / end_page を指定した場合はそのページ範囲を JSON で返す。
+    指定しない場合は text/plain で返し、Range: bytes=... ヘッダーで UTF-8 のバイト範囲を指定できる。
+    """
+    uploaded_file = (await db.execute(select(
+        UploadedFile.sourcename, UploadedFile.content_hash
+    ).where(
+        UploadedFile.id == file_id,
+        UploadedFile.project_id == project_id
+    ))).first()
+    if not uploaded_file:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if start_page is not None or end_page is not None:
+        page_count = await db.run_sync(get_page_count, uploaded_file.content_hash)
+        if page_count is None:
+            raise HTTPException(status_code=404, detail="テキストがまだ抽出されていません。")
+        start_page = max(start_page or 1, 1)
+        end_page = min(end_page or page_count, page_count)
+        if start_page > end_page:
+            raise HTTPException(status_code=400, detail="ページ範囲が不正です。")
+        return {
+            "filename": uploaded_file.sourcename,
+            "page_count": page_count,
+            "pages": await db.run_sync(get_pages, uploaded_file.content_hash, start_page, end_page),
+        }
+
+    total = await db.run_sync(get_text_size, uploaded_file.content_hash)
+    if total is None:
+        raise HTTPException(status_code=404, detail="テキストがまだ抽出されていません。")
+
+    headers = {"Accept-Ranges": "bytes"}
+    byte_range = parse_byte_range(range_header, total)
+    if byte_range is None:
+        start, end, status_code = 0, total - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{total}"
+
+    if end < start:
+        content = b''
+    else:
+        content = await db.run_sync(get_text_bytes, uploaded_file.content_hash, start, end - start + 1)
+    return Response(content=content, status_code=status_code, media_type="text/plain; charset=utf-8", headers=headers)
+
+# --- 再開可能な分割アップロード ---
+# 1. POST /uploads でアップロードを開始し、upload_id を受け取る
+# 2. PUT /uploads/{upload_id}?offset=n で n バイト目からの続きを送る（途中で切れたら GET で受信済みのバイト数を確認して再開）
+# 3. POST /uploads/{upload_id}/complete でハッシュを照合してBoxフォルダに配置し、テキスト抽出を開始する
+# 受信中のデータは保存先と同じフォルダの隠しファイルに直接書き込み、メモリには保持しない。
+
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # クライアントに推奨する1回の PUT のサイズ
+
+# 受信済みのバイト数とハッシュの途中経過（upload_id → (バイト数, sha256)）。
+# サーバーの再起動後などで失われた場合は、書き込み中のファイルから計算し直す
+_upload_hashes: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+_upload_locks: Dict[str, asyncio.Lock] = {}
+_background_tasks = set()
+
+def _upload_part_path(upload: UploadSession) -> str:
+    # 隠しファイルにすることで、フォルダの同期（list-local-files）や監視の対象から外す
+    return os.path.join(os.path.dirname(upload.file_path), f".{upload.filename}.{upload.id}.part")
+
+def _get_upload(upload_id: str, db: Session) -> UploadSession:
+    upload = db.query(UploadSession).filter(UploadSession.id == upload_id).first()
+    if not upload:
+        raise HTTPException(status_code=404, detail="アップロードが見つかりません。")
+    return upload
+
+def _received_size(upload: UploadSession) -> int:
+    part_path = _upload_part_path(upload)
+    return os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+def _upload_hash(upload: UploadSession, received: int) -> "hashlib._Hash":
+    """受信済みのデータのハッシュの途中経過を返す（手元になければファイルから計算する）"""
+    cached = _upload_hashes.get(upload.id)
+    if cached and cached[0] == received:
+        return cached[1]
+    sha256 = hashlib.sha256()
+    with open(_upload_part_path(upload), 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    _upload_hashes[upload.id] = (received, sha256)
+    return sha256
+
+def _remove_upload(upload: UploadSession, db: Session):
+    part_path = _upload_part_path(upload)
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    _upload_hashes.pop(upload.id, None)
+    _upload_locks.pop(upload.id, None)
+    db.delete(upload)
+    db.commit()
 
-    return response_files
+async def _extract_uploaded_file(project_id: int, file_path: str, content_hash: str):
+    """アップロードされたファイルのテキストをプロセスプールで抽出して保存する"""
+    try:
+        loop = asyncio.get_running_loop()
+        pages, backend, elapsed = await loop.run_in_executor(get_extraction_pool(), extract_pages_timed, file_path)
+        record_timing(get_file_type(file_path), backend, elapsed, os.path.getsize(file_path))
+        await asyncio.to_thread(_save_extracted_texts, project_id, {content_hash: pages})
+    except Exception as e:
+        print(f"アップロードされたファイルのテキスト抽出に失敗しました: {file_path}: {e}")
+
+# アップロードの開始
+@router.post("/uploads")
+def start_upload(req: UploadStartRequest, db: Session = Depends(get_db)):
+    filename = req.filename
+    if not filename or filename in ('.', '..') or os.path.basename(filename) != filename or '/' in filename or '\\' in filename:
+        raise HTTPException(status_code=400, detail="ファイル名が不正です。")
+    if req.file_size < 0:
+        raise HTTPException(status_code=400, detail="ファイルサイズが不正です。")
+
+    project_folder = get_project_folder(req.project_id, db)
+    if not os.path.isdir(project_folder):
+        raise HTTPException(status_code=404, detail="プロジェクトのBoxフォルダが見つかりません。")
+    file_path = safe_file_path(os.path.join(project_folder, filename))
+    if os.path.exists(file_path) and not req.overwrite:
+        raise HTTPException(status_code=409, detail="同じ名前のファイルがすでに存在します。")
+
+    upload = UploadSession(
+        id=uuid.uuid4().hex,
+        project_id=req.project_id,
+        filename=filename,
+        file_path=file_path,
+        file_size=req.file_size,
+        expected_hash=req.sha256.lower() if req.sha256 else None,
+        overwrite=req.overwrite,
+    )
+    db.add(upload)
+    db.commit()
+    # 空のファイルを作っておく（受信済みのバイト数はこのファイルのサイズ）
+    open(_upload_part_path(upload), 'wb').close()
+    return {"upload_id": upload.id, "offset": 0, "file_size": upload.file_size, "chunk_size": UPLOAD_CHUNK_SIZE}
+
+# アップロードの状況（再開するときのオフセット）の取得
+@router.get("/uploads/{upload_id}")
+def get_upload_status(upload_id: str, db: Session = Depends(get_db)):
+    upload = _get_upload(upload_id, db)
+    return {"upload_id": upload.id, "offset": _received_size(upload), "file_size": upload.file_size}
+
+# データの送信（リクエストボディをそのまま追記する）
+@router.put("/uploads/{upload_id}")
+async def upload_chunk(upload_id: str, offset: int, request: Request, db: Session = Depends(get_db)):
+    upload = await asyncio.to_thread(_get_upload, upload_id, db)
+    lock = _upload_locks.setdefault(upload_id, asyncio.Lock())
+    async with lock:
+        received = await asyncio.to_thread(_received_size, upload)
+        if offset != received:
+            # 途中で切れた送信の続きは、受信済みのバイト数から送り直してもらう
+            raise HTTPException(status_code=409, detail=f"オフセットが一致しません。（受信済み: {received} バイト）")
+        sha256 = await asyncio.to_thread(_upload_hash, upload, received)
+
+        with open(_upload_part_path(upload), 'ab') as part:
+            async for chunk in request.stream():
+                if not chunk:
+                    continue
+                if received + len(chunk) > upload.file_size:
+                    raise HTTPException(status_code=400, detail="申告されたファイルサイズを超えています。")
+                await asyncio.to_thread(part.write, chunk)
+                sha256.update(chunk)
+                received += len(chunk)
+                # 接続が切れても、ここまでに書き込んだ分から再開できるようにする
+                _upload_hashes[upload_id] = (received, sha256)
+
+    return {"upload_id": upload_id, "offset": received, "file_size": upload.file_size}
+
+# アップロードの完了（ハッシュを照合してBoxフォルダに配置し、テキスト抽出を開始する）
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str, db: Session = Depends(get_db)):
+    upload = await asyncio.to_thread(_get_upload, upload_id, db)
+    lock = _upload_locks.setdefault(upload_id, asyncio.Lock())
+    async with lock:
+        received = await asyncio.to_thread(_received_size, upload)
+        if received != upload.file_size:
+            raise HTTPException(status_code=409, detail=f"データがすべて送信されていません。（受信済み: {received} バイト）")
+        content_hash = (await asyncio.to_thread(_upload_hash, upload, received)).hexdigest()
+        if upload.expected_hash and content_hash != upload.expected_hash:
+            await asyncio.to_thread(_remove_upload, upload, db)
+            raise HTTPException(status_code=400, detail="ファイルのハッシュが一致しません。最初からアップロードし直してください。")
+        if os.path.exists(upload.file_path) and not upload.overwrite:
+            raise HTTPException(status_code=409, detail="同じ名前のファイルがすでに存在します。")
+
+        # 同じフォルダ内での移動なので、書き込み途中のファイルが見えることはない
+        os.replace(_upload_part_path(upload), upload.file_path)
+        project_id, file_path = upload.project_id, upload.file_path
+        await asyncio.to_thread(_remove_upload, upload, db)
+
+    def register() -> UploadedFileSummary:
+        stat = os.stat(file_path)
+        try:
+            sync_folder_files(db, project_id, [(file_path, stat.st_size, stat.st_mtime)], {file_path: content_hash})
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return _query_file_summaries(db, UploadedFile.project_id == project_id, UploadedFile.sourcepath == file_path)[0]
+
+    summary = await asyncio.to_thread(register)
+
+    # 同じ内容が抽出済みでなければテキスト抽出を開始する（監視が有効ならその待ち行列に入れる）
+    extraction = "cached"
+    if not summary.processed:
+        if box_watcher.enqueue_extraction(project_id, file_path):
+            extraction = "queued"
+        else:
+            task = asyncio.create_task(_extract_uploaded_file(project_id, file_path, content_hash))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+            extraction = "started"
+
+    return {"file": summary, "content_hash": content_hash, "extraction": extraction}
+
+# 未完了のアップロードの取り消し
+@router.delete("/uploads/{upload_id}")
+async def cancel_upload(upload_id: str, db: Session = Depends(get_db)):
+    upload = await asyncio.to_thread(_get_upload, upload_id, db)
+    async with _upload_locks.setdefault(upload_id, asyncio.Lock()):
+        await asyncio.to_thread(_remove_upload, upload, db)
+    return {"message": "アップロードを取り消しました。"}
 
 # # ファイルアップロードエンドポイント
 # @router.post("/upload-file/{project_id}", response_model=UploadedFile)
@@ -486,27 +1015,3 @@ async def get_files_by_project(project_id: int, db: Session = Depends(get_db)):
 #     with open(file_path, "wb") as buffer:
 #         shutil.copyfileobj(file.file, buffer)
 #     return UploadedFile(filename=file.filename, filepath=file_path, project_id=project_id)
-
-# # ファイル削除エンドポイント
-# @router.delete("/delete-file/{project_id}/{filename}")
-# async def delete_file(project_id: int, filename: str):
-    """
-    ファイルを削除する。
-    """
-    config = read_config()
-    base_directory = config.get('box_base_directory', '')
-    if not base_directory:
-        raise HTTPException(status_code=400, detail="ベースディレクトリが設定されていません。")
-    
-    df = read_projects()
-    if project_id not in df['id'].values:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    project = df.loc[df['id'] == project_id].iloc[0]
-    relative_path = project.get('box_folder_path', '')
-    file_path = os.path.join(base_directory, relative_path, filename)
-    
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="File not found")
-    os.remove(file_path)
-    return {"message": "File deleted"}
\ No newline at end of file
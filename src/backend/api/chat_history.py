@@ -1,18 +1,31 @@
 # src/backend/api/chat_history.py
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
 import os
-from datetime import datetime as dt
+from datetime import datetime as dt, timezone
 import logging
-import asyncio
+import base64
+import time
 
-from sqlalchemy.orm import Session
-from database import get_db, SessionLocal, ChatHistory
+from sqlalchemy import select, update, delete, func, tuple_, cast, literal_column, Text
+from sqlalchemy.dialects.postgresql import array, ARRAY
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, ChatHistory
+from extraction_service import parse_search_query, make_highlighted_snippet
+import chat_history_writer
 
 router = APIRouter()
 
+HISTORY_PAGE_SIZE = 100  # チャット履歴の1回の取得件数（既定値）
+HISTORY_MAX_PAGE_SIZE = 1000
+SEARCH_PAGE_SIZE = 20  # 検索結果の件数（既定値）
+SEARCH_MAX_PAGE_SIZE = 100
+
 class MessageItem(BaseModel):
+    message_id: str = Field(..., min_length=1, max_length=36)  # クライアントが採番するID（保存時の重複判定に使用）
     sender: str
     message: str
     timestamp: dt
@@ -21,6 +34,7 @@ class MessageItem(BaseModel):
 class SessionItem(BaseModel):
     session_title: str
     latest_timestamp: dt
+    message_count: int
 
 class SaveChatRequest(BaseModel):
     project_id: int
@@ -28,135 +42,220 @@ class SaveChatRequest(BaseModel):
     messages: List[MessageItem]
 
 @router.post("/save", response_model=List[MessageItem])
-async def save_chat(request: SaveChatRequest, db: Session = Depends(get_db)):
+async def save_chat(request: SaveChatRequest, wait: bool = False):
+    """
+    メッセージを書き込みバッファに追加する（書き込みは chat_history_writer がまとめて行う）。
+    wait=true の場合はDBへの書き込みが完了するまで待ち、失敗した場合は 500 を返す。
+    """
     logging.debug(f"Received save request: {request}")
 
-    async def write_to_db():
+    written = await chat_history_writer.get_writer().add(
+        request.project_id,
+        request.session_title,
+        'user_888',  # 固定のユーザーID
+        [(msg.message_id, _to_db_timestamp(msg.timestamp), msg.sender, msg.message) for msg in request.messages]
+    )
+    if wait:
         try:
-            await asyncio.to_thread(_write_messages_to_db, request)
+            await written
         except Exception as e:
             logging.error(f"Failed to write to DB: {e}")
             raise HTTPException(status_code=500, detail="DBへの書き込み中にエラーが発生しました。")
-
-    # 非同期に書き込み処理を実行
-    asyncio.create_task(write_to_db())
     return request.messages
 
-def _write_messages_to_db(request: SaveChatRequest):
-    db = SessionLocal()  # 新しいセッションをこのスレッド内で生成する
+def _to_db_timestamp(timestamp: dt) -> dt:
+    # timestamp 列はタイムゾーンなしのため、"2025-02-03T01:32:00.715Z" のような時刻はUTCに揃えてから保存する
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+async def _flush_pending():
+    # 書き込み待ちのメッセージが変更前のセッションに後から保存されないよう、先に書き込んでおく
+    await chat_history_writer.get_writer().flush()
+
+def _encode_cursor(timestamp: dt, message_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()},{message_id}".encode()).decode()
+
+def _decode_cursor(cursor: str):
     try:
-        for msg in request.messages:
-            # ISO形式の文字列（例："2025-02-03T01:32:00.715Z"）の末尾の 'Z' を除去
-            timestamp_str = msg.timestamp.rstrip("Z")
-            try:
-                # 文字列を datetime オブジェクトに変換
-                timestamp_dt = dt.fromisoformat(timestamp_str)
-            except Exception as e:
-                # 変換に失敗した場合は、UTCの現在時刻を利用する
-                timestamp_dt = dt.utcnow()
-
-            # ChatHistoryのインスタンスを生成
-            db_chat_history = ChatHistory(
-                project_id=request.project_id,
-                user_id='user_888',  # 固定のユーザーID
-                session_title=request.session_title,
-                # モデルでは timestamp を文字列として保存している場合は、isoformat()で文字列に変換
-                timestamp=timestamp_dt,
-                sender=msg.sender,
-                message=msg.message
-            )
-            db.add(db_chat_history)
-        db.commit()
-    except Exception as e:
-        # エラーログを残し、例外を再送出する
-        raise e
-    finally:
-        db.close()
-
-@router.get("/history/{project_id}/{session_title}", response_model=List[MessageItem])
-async def get_chat_history(project_id: int, session_title: str, db: Session = Depends(get_db)):
-    records = []
+        timestamp, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit(",", 1)
+        return dt.fromisoformat(timestamp), int(message_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="カーソルの形式が正しくありません。")
+
+@router.get("/history/{project_id}/{session_title}")
+async def get_chat_history(
+    project_id: int,
+    session_title: str,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    セッションのメッセージを新しい順に limit 件返す。
+    さらに古いメッセージがある場合は next_cursor を before に指定して続きを取得する。
+    """
+    cursor = _decode_cursor(before) if before else None
     try:
-        db_records = db.query(ChatHistory).filter(
+        query = select(
+            ChatHistory.id, ChatHistory.message_id, ChatHistory.sender, ChatHistory.message, ChatHistory.timestamp
+        ).where(
             ChatHistory.project_id == project_id,
             ChatHistory.session_title == session_title
-        ).all()
-        for record in db_records:
-            records.append(MessageItem(
-                sender=record.sender,
-                message=record.message,
-                timestamp=record.timestamp
-            ))
-        return records
+        )
+        if cursor:
+            query = query.where(tuple_(ChatHistory.timestamp, ChatHistory.id) < tuple_(*cursor))
+        query = query.order_by(ChatHistory.timestamp.desc(), ChatHistory.id.desc()).limit(limit + 1)
+        rows = (await db.execute(query)).all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].timestamp, rows[-1].id)
+    # 件数が多くてもモデルを経由せずに orjson で直接シリアライズする
+    return ORJSONResponse({
+        "messages": [
+            {"message_id": row.message_id, "sender": row.sender, "message": row.message, "timestamp": row.timestamp}
+            for row in rows
+        ],
+        "next_cursor": next_cursor,
+    })
+
 @router.get("/sessions/{project_id}", response_model=List[SessionItem])
-async def get_session_titles(project_id: int, db: Session = Depends(get_db)):
-    sessions = {}
+async def get_session_titles(
+    project_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """セッションごとの最新のタイムスタンプとメッセージ数を、最新のタイムスタンプが新しい順に返す"""
     try:
-        db_records = db.query(ChatHistory).filter(ChatHistory.project_id == project_id).all()
-        for record in db_records:
-            session = record.session_title
-            timestamp = record.timestamp
-            if session not in sessions or sessions[session] < timestamp:
-                sessions[session] = timestamp
-        # タイムスタンプが新しい順にソートしてセッション一覧を作成
-        sorted_sessions = sorted(sessions.items(), key=lambda x: x[1], reverse=True)
-        return [SessionItem(session_title=session, latest_timestamp=timestamp) for session, timestamp in sorted_sessions]
+        latest_timestamp = func.max(ChatHistory.timestamp)
+        query = select(
+            ChatHistory.session_title,
+            latest_timestamp.label("latest_timestamp"),
+            func.count().label("message_count")
+        ).where(
+            ChatHistory.project_id == project_id
+        ).group_by(
+            ChatHistory.session_title
+        ).order_by(
+            latest_timestamp.desc(), ChatHistory.session_title
+        ).offset(offset).limit(limit)
+        rows = (await db.execute(query)).all()
+        return [
+            SessionItem(session_title=row.session_title, latest_timestamp=row.latest_timestamp, message_count=row.message_count)
+            for row in rows
+        ]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.put("/rename")
-async def rename_session(project_id: int, old_title: str, new_title: str, db: Session = Depends(get_db)):
+async def _execute_session_change(db: AsyncSession, statement) -> int:
+    """セッション単位の UPDATE / DELETE を1文で実行し、対象の行数を返す（0件の場合は 404）"""
     try:
-        db_records = db.query(ChatHistory).filter(
-            ChatHistory.project_id == project_id,
-            ChatHistory.session_title == old_title
-        ).all()
-        if not db_records:
+        result = await db.execute(statement.execution_options(synchronize_session=False))
+        if result.rowcount == 0:
+            await db.rollback()
             raise HTTPException(status_code=404, detail="該当するセッションが見つかりません")
-
-        for record in db_records:
-            record.session_title = new_title
-        db.commit()
-
-        return {"detail": "セッション名が変更されました", "old_title": old_title, "new_title": new_title}
+        await db.commit()
+        return result.rowcount
+    except HTTPException:
+        raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="変更先のセッションに同じメッセージが既に存在します")
     except Exception as e:
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.delete("/delete")
-async def delete_session(project_id: int, session_title: str, db: Session = Depends(get_db)):
+# チャット履歴の全文検索
+@router.get("/search")
+async def search_chat_history(
+    q: str,
+    project_id: Optional[int] = None,
+    session_title: Optional[str] = None,
+    sender: Optional[str] = None,
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    メッセージを全文検索し、新しい順に返す。q は空白区切りで複数の語を指定でき、すべての語を含むメッセージが対象になる
+    （2文字以上の語が1つ以上必要）。highlights はスニペット内の検索語の位置（文字単位の [開始, 終了]）。
+    """
     try:
-        db_records = db.query(ChatHistory).filter(
-            ChatHistory.project_id == project_id,
-            ChatHistory.session_title == session_title
-        ).all()
-        if not db_records:
-            raise HTTPException(status_code=404, detail="該当するセッションが見つかりません")
+        terms, bigrams = parse_search_query(q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    start = time.perf_counter()
 
-        for record in db_records:
-            db.delete(record)
-        db.commit()
-
-        return {"detail": "セッションが削除されました", "session_title": session_title}
+    normalized = func.lower(func.normalize(ChatHistory.message, literal_column("NFKC")))
+    query = select(
+        ChatHistory.id, ChatHistory.project_id, ChatHistory.session_title, ChatHistory.sender,
+        ChatHistory.timestamp, ChatHistory.message
+    ).where(
+        # ファイルの全文検索と同じく text_bigrams のバイグラム GIN インデックスで候補を絞り込む
+        func.text_bigrams(ChatHistory.message).op("@>")(cast(array(bigrams), ARRAY(Text))),
+        *[func.strpos(normalized, term) > 0 for term in terms]
+    )
+    if project_id is not None:
+        query = query.where(ChatHistory.project_id == project_id)
+    if session_title is not None:
+        query = query.where(ChatHistory.session_title == session_title)
+    if sender is not None:
+        query = query.where(ChatHistory.sender == sender)
+    try:
+        rows = (await db.execute(query.order_by(ChatHistory.timestamp.desc(), ChatHistory.id.desc()).limit(limit))).all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.put("/move")
-async def move_session(old_project_id: int, new_project_id: int, session_title: str, db: Session = Depends(get_db)):
-    try:
-        db_records = db.query(ChatHistory).filter(
-            ChatHistory.project_id == old_project_id,
-            ChatHistory.session_title == session_title
-        ).all()
-        if not db_records:
-            raise HTTPException(status_code=404, detail="該当するセッションが見つかりません")
+    results = []
+    for row in rows:
+        snippet, highlights = make_highlighted_snippet(row.message or "", terms)
+        results.append({
+            "id": row.id,
+            "project_id": row.project_id,
+            "session_title": row.session_title,
+            "sender": row.sender,
+            "timestamp": row.timestamp,
+            "snippet": snippet,
+            "highlights": highlights,
+        })
+    return ORJSONResponse({
+        "query": q,
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    })
 
-        for record in db_records:
-            record.project_id = new_project_id
-        db.commit()
+@router.put("/rename")
+async def rename_session(project_id: int, old_title: str, new_title: str, db: AsyncSession = Depends(get_async_db)):
+    await _flush_pending()
+    updated = await _execute_session_change(db, update(ChatHistory).where(
+        ChatHistory.project_id == project_id,
+        ChatHistory.session_title == old_title
+    ).values(session_title=new_title))
+    return {"detail": "セッション名が変更されました", "old_title": old_title, "new_title": new_title, "updated": updated}
 
-        return {"detail": "セッションのプロジェクトが移動されました", "session_title": session_title, "new_project_id": new_project_id}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@router.delete("/delete")
+async def delete_session(project_id: int, session_title: str, db: AsyncSession = Depends(get_async_db)):
+    await _flush_pending()
+    deleted = await _execute_session_change(db, delete(ChatHistory).where(
+        ChatHistory.project_id == project_id,
+        ChatHistory.session_title == session_title
+    ))
+    return {"detail": "セッションが削除されました", "session_title": session_title, "deleted": deleted}
+
+@router.put("/move")
+async def move_session(old_project_id: int, new_project_id: int, session_title: str, db: AsyncSession = Depends(get_async_db)):
+    await _flush_pending()
+    updated = await _execute_session_change(db, update(ChatHistory).where(
+        ChatHistory.project_id == old_project_id,
+        ChatHistory.session_title == session_title
+    ).values(project_id=new_project_id))
+    return {
+        "detail": "セッションのプロジェクトが移動されました",
+        "session_title": session_title,
+        "new_project_id": new_project_id,
+        "updated": updated
+    }
@@ -1,17 +1,19 @@
 # src/backend/api/files.py
-from fastapi import APIRouter, Depends #UploadFile, File, HTTPException, Form, Query, Request
-from fastapi.responses import FileResponse, PlainTextResponse
+from fastapi import APIRouter, Depends, HTTPException, Request #UploadFile, File, Form, Query
+from fastapi.responses import FileResponse, PlainTextResponse, Response
 from pydantic import BaseModel
 from typing import List
 import os
+import hashlib
 # import csv
 # import shutil
 import logging
-from pypdf import PdfReader
 # import json
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
 from sqlalchemy.orm import Session
 from database import SessionLocal, UploadedFile
+from api.box import get_project_folder
 
 
 logging.basicConfig(level=logging.DEBUG)
@@ -38,6 +40,58 @@ def get_db():
     finally:
         db.close()
 
+def _make_etag(stat: os.stat_result) -> str:
+    # FileResponse が付与する ETag と同じ値（If-Range の判定も FileResponse がこの値で行う）
+    return f'"{hashlib.md5(f"{stat.st_mtime}-{stat.st_size}".encode(), usedforsecurity=False).hexdigest()}"'
+
+def _is_not_modified(request: Request, etag: str, stat: os.stat_result) -> bool:
+    """If-None-Match / If-Modified-Since から、クライアントのキャッシュが最新かどうかを判定する"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match がある場合は If-Modified-Since を見ない（RFC 9110）
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(stat.st_mtime) <= since.timestamp()
+    return False
+
+# プロジェクトのBoxフォルダ内のファイルのダウンロード
+@router.api_route("/download-file/{project_id}/{filename}", methods=["GET", "HEAD"])
+def download_file(project_id: int, filename: str, request: Request, inline: bool = False,
+                  db: Session = Depends(get_db)):
+    """
+    ファイルをそのまま返す。Range（部分取得）と ETag / If-Modified-Since による条件付き取得に対応する。
+    inline=true の場合はブラウザで表示する（プレビュー用）。
+    同期セッションでDBにアクセスするため def とし、スレッドプールで実行させる。
+    """
+    project_folder = os.path.realpath(get_project_folder(project_id, db))
+    file_path = os.path.realpath(os.path.join(project_folder, filename))
+    # プロジェクトのフォルダの外（../ など）は返さない
+    if os.path.commonpath([project_folder, file_path]) != project_folder or not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    stat = os.stat(file_path)
+    etag = _make_etag(stat)
+    # キャッシュは保持してよいが、使う前に毎回確認させる（変わっていなければ 304 で本文を送らない）
+    headers = {"Cache-Control": "private, no-cache"}
+    if _is_not_modified(request, etag, stat):
+        headers.update({"ETag": etag, "Last-Modified": formatdate(stat.st_mtime, usegmt=True)})
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse は Range / If-Range を処理し、ファイルを少しずつ読みながら送信する（全体をメモリに載せない）
+    return FileResponse(
+        file_path,
+        stat_result=stat,
+        filename=filename,
+        headers=headers,
+        content_disposition_type="inline" if inline else "attachment",
+    )
+
 # @router.post("/list-local-files", response_model=list[FileInfo])
 # def list_local_files(data: dict, db: Session = Depends(get_db)):
 #     """
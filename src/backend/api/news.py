@@ -7,10 +7,12 @@ from datetime import datetime, timedelta
 import pytz
 import os
 from pathlib import Path
-from sqlalchemy.orm import Session
-from database import get_db, NewsKeyword as DBNewsKeyword  # Import database model
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, NewsKeyword as DBNewsKeyword  # Import database model
 from pydantic import BaseModel
 import logging
+import asyncio
 
 router = APIRouter()
 
@@ -62,27 +64,27 @@ def fetch_google_news(keyword: str) -> List[Dict]:
         return []
 
 @router.get("/keywords", response_model=List[NewsKeywordOut])
-async def get_keywords(db: Session = Depends(get_db)) -> List[NewsKeywordOut]:
+async def get_keywords(db: AsyncSession = Depends(get_async_db)) -> List[NewsKeywordOut]:
     """保存されたニュースキーワードをデータベースから取得する"""
     user_id = "user_888" # 固定のユーザーID
-    keywords = db.query(DBNewsKeyword).filter(DBNewsKeyword.user_id == user_id).all()
+    keywords = (await db.scalars(select(DBNewsKeyword).where(DBNewsKeyword.user_id == user_id))).all()
     return keywords
 
 @router.post("/keywords")
-async def update_keywords(keywords: List[str], db: Session = Depends(get_db)):
+async def update_keywords(keywords: List[str], db: AsyncSession = Depends(get_async_db)):
     """ニュースキーワードをデータベースで更新する (全キーワードを置き換え)"""
     try:
         user_id = "user_888" # 固定のユーザーID
         # 古いキーワードを削除 (特定のuser_idに関連するもののみ)
-        db.query(DBNewsKeyword).filter(DBNewsKeyword.user_id == user_id).delete()
+        await db.execute(delete(DBNewsKeyword).where(DBNewsKeyword.user_id == user_id))
         for keyword_str in keywords:
             keyword = NewsKeywordCreate(keyword=keyword_str)
             db_keyword = DBNewsKeyword(**keyword.dict())
             db.add(db_keyword)
-        db.commit()
+        await db.commit()
         return {"message": "Keywords updated successfully"}
     except Exception as e:
-        db.rollback() # ロールバック
+        await db.rollback() # ロールバック
         raise HTTPException(status_code=500, detail=f"Failed to update keywords: {str(e)}")
 
 @router.get("/news")
@@ -99,7 +101,7 @@ async def get_news(keyword: str = Query(..., title="検索キーワード")):
         return cached_news['articles']
 
     print(f"APIからニュースをリフレッシュ: キーワード={keyword}")
-    news_articles = fetch_google_news(keyword)
+    news_articles = await asyncio.to_thread(fetch_google_news, keyword)  # HTTP通信でイベントループをブロックしない
     NEWS_CACHE[keyword] = {
         'articles': news_articles,
         'timestamp': now
@@ -1,14 +1,15 @@
 # src/backend/api/notes.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-import pandas as pd
-import os
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
+from database import get_async_db, Note as NoteRecord
 
 router = APIRouter()
 
-NOTES_CSV = os.path.join(os.path.dirname(__file__), '../../../data/notes.csv')
-
 # Pydanticモデルの定義
 class Note(BaseModel):
     project_id: int
@@ -17,37 +18,36 @@ class Note(BaseModel):
 
 logging.basicConfig(level=logging.DEBUG)
 
-def read_notes() -> pd.DataFrame:
-    if not os.path.exists(NOTES_CSV):
-        df = pd.DataFrame(columns=['project_id', 'concept_text', 'design_notes'])
-        df.to_csv(NOTES_CSV, index=False)
-    df = pd.read_csv(NOTES_CSV)
-    df.fillna("", inplace=True)  # NaNを空文字列に変換
-    return df
-
-def write_notes(df: pd.DataFrame):
-    logging.debug(f"Writing notes to {NOTES_CSV}")
-    df.to_csv(NOTES_CSV, index=False)
-
 # メモを取得
 @router.get("/{project_id}", response_model=Note)
-async def get_note(project_id: int):
-    df = read_notes()
-    if project_id not in df['project_id'].values:
+async def get_note(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    row = (await db.execute(
+        select(NoteRecord.project_id, NoteRecord.concept_text, NoteRecord.design_notes).where(
+            NoteRecord.project_id == project_id
+        )
+    )).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="メモが見つかりません")
-    note = df[df['project_id'] == project_id].iloc[0].fillna("").to_dict()  # NaNを空文字列に変換
-    return note
+    return Note(project_id=row.project_id, concept_text=row.concept_text or "", design_notes=row.design_notes or "")
 
 # メモを保存
 @router.post("/", response_model=Note)
-async def save_note(note: Note):
-    df = read_notes()
-    if note.project_id in df['project_id'].values:
-        df.loc[df['project_id'] == note.project_id, ['concept_text', 'design_notes']] = [
-            note.concept_text, note.design_notes
-        ]
-    else:
-        new_row = pd.DataFrame([note.dict()])
-        df = pd.concat([df, new_row], ignore_index=True)
-    write_notes(df)
+async def save_note(note: Note, db: AsyncSession = Depends(get_async_db)):
+    # 1文の upsert で保存し、同時に保存されても行が重複したり他のプロジェクトのメモを上書きしたりしない
+    statement = insert(NoteRecord).values(
+        project_id=note.project_id,
+        concept_text=note.concept_text,
+        design_notes=note.design_notes,
+        updated_at=datetime.utcnow()
+    )
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[NoteRecord.project_id],
+        set_={
+            "concept_text": statement.excluded.concept_text,
+            "design_notes": statement.excluded.design_notes,
+            "updated_at": statement.excluded.updated_at,
+        }
+    ))
+    await db.commit()
+    logging.debug(f"Saved note for project {note.project_id}")
     return note
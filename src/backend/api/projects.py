@@ -1,9 +1,9 @@
 # src/backend/api/projects.py
-from fastapi import APIRouter, HTTPException, Path, Response, Body, Depends
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Path, Response, Body, Depends, Query, Request
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, TypeAdapter
 from datetime import datetime
-import pandas as pd
 import os
 from pptx import Presentation
 from pptx.util import Inches
@@ -17,7 +17,8 @@ import logging
 import io
 import json
 from typing import List, Optional
-from database import get_db, Project
+from database import get_async_db, Project
+import table_cache
 
 # ロギング設定
 logging.basicConfig(level=logging.DEBUG)
@@ -69,6 +70,29 @@ class ProjectOut(ProjectBase):
     class Config:
         from_attributes = True
 
+class ProjectSummary(BaseModel):
+    """一覧用（業務フローの XML とソリューション要件は含めない。必要な場合は GET /{project_id} で取得する）"""
+    id: int
+    user_id: Optional[str] = None
+    customer_name: Optional[str] = None
+    issues: Optional[str] = None
+    is_archived: bool = False
+    stage: Optional[str] = None
+    category: Optional[str] = None
+    slack_channel_id: Optional[str] = None
+    slack_tag: Optional[str] = None
+    box_folder_path: Optional[str] = None
+    schedule: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ProjectSummaryPage(BaseModel):
+    projects: List[ProjectSummary]
+    next_cursor: Optional[int] = None  # 続きを取得するときに cursor に指定する（最後のページでは None）
+
+_projects_adapter = TypeAdapter(List[ProjectOut])
+
 class ArchiveProjectUpdate(BaseModel):
     is_archived: bool
 
@@ -82,7 +106,17 @@ class FlowUpdate(BaseModel):
 class RequirementsUpdate(BaseModel):
     solution_requirements: str
 
-PROJECTS_CSV = os.path.join(os.path.dirname(__file__), '../../../data/projects.csv')
+PROJECT_PAGE_SIZE = 100  # プロジェクト一覧の1回の取得件数（既定値）
+PROJECT_MAX_PAGE_SIZE = 1000
+
+# 一覧で返す列（サイズの大きい bpmn_xml と solution_requirements は含めない）
+PROJECT_SUMMARY_COLUMNS = (
+    Project.id, Project.user_id, Project.customer_name, Project.issues, Project.is_archived, Project.stage,
+    Project.category, Project.slack_channel_id, Project.slack_tag, Project.box_folder_path, Project.schedule,
+)
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 def replace_none_with_empty(project):
     """プロジェクトオブジェクトの特定のフィールドが None なら空文字に置き換える"""
@@ -98,43 +132,87 @@ def replace_none_with_empty(project):
         if getattr(project, field) is None:
             setattr(project, field, "")
 
-# プロジェクトCSVの読み込み
-def read_projects() -> pd.DataFrame:
-    if not os.path.exists(PROJECTS_CSV):
-        df = pd.DataFrame(columns=['id', 'customer_name', 'issues', 'is_archived', 'bpmn_xml', 'solution_requirements', 'stage', 'category', 'slack_channel_id', 'slack_tag', 'box_folder_path', 'schedule'])
-        df.to_csv(PROJECTS_CSV, index=False)
-    df = pd.read_csv(PROJECTS_CSV, dtype={'id': int, 'customer_name': str, 'issues': str, 'is_archived': bool, 'bpmn_xml': str, 'solution_requirements': str, 'stage': str, 'category': str, 'slack_channel_id': str, 'slack_tag': str, 'box_folder_path': str, 'schedule': str})
-    # 必要な列が存在しない場合は追加
-    for col in ['slack_channel_id', 'slack_tag', 'box_folder_path', 'schedule']:
-        if col not in df.columns or df[col].isnull().all():
-            df[col] = ''
-    # NaN を空文字列やデフォルト値に置き換える
-    df['bpmn_xml'] = df['bpmn_xml'].fillna('')
-    df['solution_requirements'] = df['solution_requirements'].fillna('')
-    df['stage'] = df['stage'].fillna('営業')
-    df['category'] = df['category'].fillna('プロジェクト')
-    df['slack_channel_id'] = df['slack_channel_id'].fillna('').astype(str)
-    df['slack_tag'] = df['slack_tag'].fillna('').astype(str)
-    df['box_folder_path'] = df['box_folder_path'].fillna('').astype(str)
-    df['schedule'] = df['schedule'].fillna('').astype(str)
-
-    return df
-
-# プロジェクトCSVへの書き込み
-def write_projects(df: pd.DataFrame):
-    df.to_csv(PROJECTS_CSV, index=False)
+async def update_project_fields(db: AsyncSession, project_id: int, **values) -> Project:
+    """
+    プロジェクトの指定した列だけを1行の UPDATE ... RETURNING で更新し、更新後のプロジェクトを返す。
+    同時に別の列を更新するリクエストがあっても互いの変更を上書きしない。
+    """
+    db_project = (await db.scalars(
+        update(Project).where(Project.id == project_id).values(**values).returning(Project),
+        execution_options={"synchronize_session": False}
+    )).first()
+    if not db_project:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Project not found")
+    await db.commit()
+    table_cache.invalidate("projects")
+    replace_none_with_empty(db_project)
+    return db_project
 
 # プロジェクトの取得
-@router.get("/", response_model=List[ProjectOut])
-async def get_projects(db: Session = Depends(get_db)):
-    projects = db.query(Project).all()
-    for project in projects:
-        replace_none_with_empty(project)
-    return projects
+@router.get("/", response_model=List[ProjectOut])  # キャッシュしたJSONをそのまま返す（If-None-Match に対応）
+async def get_projects(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load() -> bytes:
+        projects = (await db.scalars(select(Project).order_by(Project.id))).all()
+        for project in projects:
+            replace_none_with_empty(project)
+        return _projects_adapter.dump_json(_projects_adapter.validate_python(projects, from_attributes=True))
+
+    return await table_cache.cached_json_response(request, "projects", "all", load)
+
+async def _load_project_summaries(db, stage, category, is_archived, customer_name, cursor, limit) -> ProjectSummaryPage:
+    query = select(*PROJECT_SUMMARY_COLUMNS)
+    if stage is not None:
+        query = query.where(Project.stage == stage)
+    if category is not None:
+        query = query.where(Project.category == category)
+    if is_archived is not None:
+        query = query.where(Project.is_archived == is_archived)
+    if customer_name:
+        query = query.where(Project.customer_name.ilike(f"%{_escape_like(customer_name)}%", escape="\\"))
+    if cursor is not None:
+        query = query.where(Project.id > cursor)
+    rows = (await db.execute(query.order_by(Project.id).limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    return ProjectSummaryPage(
+        projects=[ProjectSummary.model_validate(row) for row in rows],
+        next_cursor=next_cursor
+    )
+
+# プロジェクト一覧（軽量な列のみ、サーバー側で絞り込み、id 順のカーソルページング）
+@router.get("/summary", response_model=ProjectSummaryPage)
+async def get_project_summaries(
+    request: Request,
+    stage: Optional[str] = None,
+    category: Optional[str] = None,
+    is_archived: Optional[bool] = None,
+    customer_name: Optional[str] = Query(None, description="顧客名の部分一致（大文字・小文字を区別しない）"),
+    cursor: Optional[int] = Query(None, description="前のページの next_cursor"),
+    limit: int = Query(PROJECT_PAGE_SIZE, ge=1, le=PROJECT_MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    async def load() -> bytes:
+        return (await _load_project_summaries(db, stage, category, is_archived, customer_name, cursor, limit)).model_dump_json().encode()
+
+    key = (stage, category, is_archived, customer_name, cursor, limit)
+    return await table_cache.cached_json_response(request, "projects", key, load)
+
+# プロジェクトの取得（業務フローの XML・ソリューション要件を含む）
+@router.get("/{project_id}", response_model=ProjectOut)
+async def get_project(project_id: int = Path(..., gt=0), db: AsyncSession = Depends(get_async_db)):
+    db_project = await db.get(Project, project_id)
+    if not db_project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    replace_none_with_empty(db_project)
+    return db_project
 
 # 新規プロジェクトの作成
 @router.post("/", response_model=ProjectOut, status_code=201)
-async def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
+async def create_project(project: ProjectCreate, db: AsyncSession = Depends(get_async_db)):
     new_project = Project(
         user_id="user_888", # ユーザーIDをバックエンドで設定 (実際には認証などから取得)
         customer_name=project.customer_name,
@@ -150,14 +228,15 @@ async def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
     )
     logging.debug(f"作成するプロジェクトオブジェクト: {new_project.__dict__}")
     db.add(new_project)
-    db.commit()
-    db.refresh(new_project)
+    await db.commit()
+    table_cache.invalidate("projects")
+    await db.refresh(new_project)
     return new_project
 
 # プロジェクトの更新（顧客情報と課題）
 @router.put("/{project_id}", response_model=ProjectOut)
-async def update_project(project_id: int, project: ProjectUpdate, db: Session = Depends(get_db)):
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+async def update_project(project_id: int, project: ProjectUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_project = await db.get(Project, project_id)
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
 
@@ -174,8 +253,9 @@ async def update_project(project_id: int, project: ProjectUpdate, db: Session =
     if project.schedule:
         db_project.schedule = project.schedule
 
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    table_cache.invalidate("projects")
+    await db.refresh(db_project)
     return db_project
 
 # アーカイブ状態の更新
@@ -183,17 +263,18 @@ async def update_project(project_id: int, project: ProjectUpdate, db: Session =
 async def archive_project(
     project_id: int,
     project_update: ArchiveProjectUpdate = Body(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+    db_project = await db.get(Project, project_id)
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
 
     if project_update.is_archived is not None:
         db_project.is_archived = project_update.is_archived
 
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    table_cache.invalidate("projects")
+    await db.refresh(db_project)
     
     # ヘルパー関数で None を空文字に置換
     replace_none_with_empty(db_project)
@@ -204,15 +285,16 @@ async def archive_project(
 async def update_stage(
     project_id: int = Path(..., gt=0),
     stage_update: StageUpdate = Body(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+    db_project = await db.get(Project, project_id)
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
 
     db_project.stage = stage_update.stage
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    table_cache.invalidate("projects")
+    await db.refresh(db_project)
     
     # ヘルパー関数で None を空文字に置換
     replace_none_with_empty(db_project)
@@ -221,28 +303,24 @@ async def update_stage(
 
 # 業務フローの更新
 @router.put("/{project_id}/flow", response_model=ProjectOut)
-async def update_flow(project_id: int = Path(..., gt=0), flow: FlowUpdate = None):
-    df = read_projects()
-    if project_id not in df['id'].values:
-        raise HTTPException(status_code=404, detail="Project not found")
-    index = df.index[df['id'] == project_id].tolist()[0]
-    if flow.bpmn_xml:
-        df.at[index, 'bpmn_xml'] = flow.bpmn_xml
-    write_projects(df)
-    updated_project = df.loc[index].to_dict()
-    return ProjectOut(**updated_project)
+async def update_flow(project_id: int = Path(..., gt=0), flow: FlowUpdate = None, db: AsyncSession = Depends(get_async_db)):
+    if not flow or not flow.bpmn_xml:
+        db_project = await db.get(Project, project_id)
+        if not db_project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        replace_none_with_empty(db_project)
+        return db_project
+    return await update_project_fields(db, project_id, bpmn_xml=flow.bpmn_xml)
 
 @router.put("/{project_id}/requirements", response_model=ProjectOut)
-async def update_requirements(project_id: int = Path(..., gt=0), req_update: RequirementsUpdate = None):
-    df = read_projects()
-    if project_id not in df['id'].values:
-        raise HTTPException(status_code=404, detail="Project not found")
-    index = df.index[df['id'] == project_id].tolist()[0]
-    if req_update and req_update.solution_requirements is not None:
-        df.at[index, 'solution_requirements'] = req_update.solution_requirements
-    write_projects(df)
-    updated_project = df.loc[index].to_dict()
-    return ProjectOut(**updated_project)
+async def update_requirements(project_id: int = Path(..., gt=0), req_update: RequirementsUpdate = None, db: AsyncSession = Depends(get_async_db)):
+    if not req_update or req_update.solution_requirements is None:
+        db_project = await db.get(Project, project_id)
+        if not db_project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        replace_none_with_empty(db_project)
+        return db_project
+    return await update_project_fields(db, project_id, solution_requirements=req_update.solution_requirements)
 
 def parse_bpmn_xml_content(xml_content):
     """BPMN XMLコンテンツを解析し、形状とコネクタのデータを抽出する。"""
@@ -413,12 +491,11 @@ def create_powerpoint_file(shapes_data, connectors):
 
 # PowerPoint ファイルのエンドポイント (オブジェクト版)
 @router.get("/{project_id}/powerpoint")
-async def get_project_powerpoint(project_id: int = Path(..., gt=0)):
-    df = read_projects()
-    project_row = df[df['id'] == project_id]
-    if project_row.empty:
+async def get_project_powerpoint(project_id: int = Path(..., gt=0), db: AsyncSession = Depends(get_async_db)):
+    bpmn_xml = (await db.execute(select(Project.bpmn_xml).where(Project.id == project_id))).first()
+    if bpmn_xml is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    bpmn_xml = project_row.iloc[0]['bpmn_xml']
+    bpmn_xml = bpmn_xml[0]
     if not bpmn_xml:
         raise HTTPException(status_code=400, detail="BPMN flow is not generated for this project.")
 
@@ -445,57 +522,34 @@ async def get_project_powerpoint(project_id: int = Path(..., gt=0)):
 
 # 業務フローの削除
 @router.delete("/{project_id}/flow", response_model=ProjectOut)
-async def delete_flow(project_id: int = Path(..., gt=0)):
-    df = read_projects()
-    if project_id not in df['id'].values:
-        raise HTTPException(status_code=404, detail="Project not found")
-    index = df.index[df['id'] == project_id].tolist()[0]
-    df.at[index, 'bpmn_xml'] = ""
-    write_projects(df)
-    updated_project = df.loc[index].to_dict()
-    return ProjectOut(**updated_project)
+async def delete_flow(project_id: int = Path(..., gt=0), db: AsyncSession = Depends(get_async_db)):
+    return await update_project_fields(db, project_id, bpmn_xml="")
 
 # プロジェクトの削除
 @router.delete("/{project_id}", status_code=204)
-async def delete_project(project_id: int, db: Session = Depends(get_db)):
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+async def delete_project(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_project = await db.get(Project, project_id)
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
-    db.delete(db_project)
-    db.commit()
+    await db.delete(db_project)
+    await db.commit()
+    table_cache.invalidate("projects")
     return {"detail": "Project deleted successfully"}
 
 @router.put("/{project_id}/slack", response_model=ProjectOut)
 async def connect_slack_channel(
     project_id: int = Path(..., gt=0),
-    slack_data: SlackUpdate = Body(...)
+    slack_data: SlackUpdate = Body(...),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     プロジェクトにSlackチャンネルを連携し、タグも登録する
     """
-    df = read_projects()
-    if project_id not in df['id'].values:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    index = df.index[df['id'] == project_id][0]
-    df.at[index, 'slack_channel_id'] = slack_data.channel_id
-    df.at[index, 'slack_tag'] = slack_data.tag
-    write_projects(df)
-    updated_project = df.loc[index].to_dict()
-    return ProjectOut(**updated_project)
+    return await update_project_fields(db, project_id, slack_channel_id=slack_data.channel_id, slack_tag=slack_data.tag)
 
 @router.delete("/{project_id}/slack", response_model=ProjectOut)
-async def disconnect_slack_channel(project_id: int = Path(..., gt=0)):
+async def disconnect_slack_channel(project_id: int = Path(..., gt=0), db: AsyncSession = Depends(get_async_db)):
     """
     プロジェクトからSlackチャンネル連携を解除（チャンネルIDやタグをクリア）
     """
-    df = read_projects()
-    if project_id not in df['id'].values:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    index = df.index[df['id'] == project_id][0]
-    df.at[index, 'slack_channel_id'] = ""
-    df.at[index, 'slack_tag'] = ""
-    write_projects(df)
-    updated_project = df.loc[index].to_dict()
-    return ProjectOut(**updated_project)
\ No newline at end of file
+    return await update_project_fields(db, project_id, slack_channel_id="", slack_tag="")
\ No newline at end of file
@@ -1,5 +1,7 @@
 # backend/api/proposals.py
-from fastapi import APIRouter, HTTPException, Path, Response
+from fastapi import APIRouter, HTTPException, Path, Response, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, Project
 from pydantic import BaseModel
 # from database import read_csv, write_csv
 from llm_service import generate_proposal
@@ -10,7 +12,6 @@ from pptx.enum.shapes import MSO_SHAPE, MSO_CONNECTOR
 from pptx.dml.color import RGBColor
 import os
 import io
-from .projects import read_projects, PROJECTS_CSV # projects.py から関数と定数を import
 from .projects import parse_bpmn_xml_content, create_powerpoint_file as create_bpmn_pptx # projects.py の関数を import (名前衝突を避けるため別名で import)
 import logging
 from openai import OpenAI
@@ -229,17 +230,19 @@ def create_proposal_powerpoint(project_id: int, customer_info: str, bpmn_xml: st
 
 # PowerPoint ファイルのエンドポイント (提案書版)
 @router.get("/{project_id}/proposal")
-async def get_project_proposal(project_id: int = Path(..., gt=0), solution_requirements: Optional[str] = None):
-    df = read_projects()
-    project_row = df[df['id'] == project_id]
-    if project_row.empty:
+async def get_project_proposal(
+    project_id: int = Path(..., gt=0),
+    solution_requirements: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    project = await db.get(Project, project_id)
+    if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    customer_name = project_row.iloc[0]['customer_name']
-    bpmn_xml = project_row.iloc[0]['bpmn_xml']
-    issues = project_row.iloc[0]['issues'] # 課題 (issues) を取得
+    customer_name = project.customer_name
+    bpmn_xml = project.bpmn_xml or ""
+    issues = project.issues or "" # 課題 (issues) を取得
     if solution_requirements is None:
-        solution_requirements_db = project_row.iloc[0]['solution_requirements']
-        solution_requirements = solution_requirements_db if solution_requirements_db else "" # DBに値がない場合は空文字
+        solution_requirements = project.solution_requirements or "" # DBに値がない場合は空文字
 
     pptx_file_path = None
     try:
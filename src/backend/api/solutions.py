@@ -1,9 +1,11 @@
 # src/backend/api/solutions.py
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, Request
+from pydantic import BaseModel, TypeAdapter
 from typing import List
-from sqlalchemy.orm import Session
-from database import get_db, Solution as DBSolution
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, Solution as DBSolution
+import table_cache
 
 router = APIRouter()
 
@@ -25,20 +27,25 @@ class SolutionOut(SolutionBase):
     class Config:
         from_attributes = True
 
+_solutions_adapter = TypeAdapter(List[SolutionOut])
+
 @router.get("/")
-async def get_solutions(db: Session = Depends(get_db)):
-    """Retrieve all solutions from the database."""
+async def get_solutions(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Retrieve all solutions from the database (cached per worker, supports If-None-Match)."""
+    async def load() -> bytes:
+        solutions = (await db.scalars(select(DBSolution).order_by(DBSolution.id))).all()
+        return _solutions_adapter.dump_json(_solutions_adapter.validate_python(solutions, from_attributes=True))
+
     try:
-        solutions = db.query(DBSolution).all()
-        return solutions
+        return await table_cache.cached_json_response(request, "solutions", "all", load)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read solutions: {str(e)}")
 
 @router.get("/{solution_id}", response_model=SolutionOut)
-async def get_solution(solution_id: str, db: Session = Depends(get_db)):
+async def get_solution(solution_id: str, db: AsyncSession = Depends(get_async_db)):
     """Retrieve a single solution by ID from the database."""
     try:
-        solution = db.query(DBSolution).filter(DBSolution.id == solution_id).first()
+        solution = await db.get(DBSolution, solution_id)
         if not solution:
             raise HTTPException(status_code=404, detail="Solution not found")
         return solution
@@ -46,22 +53,23 @@ async def get_solution(solution_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to fetch solution: {str(e)}")
 
 @router.post("/", response_model=SolutionOut, status_code=201)
-async def create_solution(solution: SolutionCreate, db: Session = Depends(get_db)):
+async def create_solution(solution: SolutionCreate, db: AsyncSession = Depends(get_async_db)):
     """Add a new solution to the database."""
     try:
         db_solution = DBSolution(**solution.dict())
         db.add(db_solution)
-        db.commit()
-        db.refresh(db_solution)
+        await db.commit()
+        table_cache.invalidate("solutions")
+        await db.refresh(db_solution)
         return db_solution
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create solution: {str(e)}")
 
 @router.put("/{solution_id}", response_model=SolutionOut)
-async def update_solution(solution_id: str, updated_solution: SolutionUpdate, db: Session = Depends(get_db)):
+async def update_solution(solution_id: str, updated_solution: SolutionUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update an existing solution in the database."""
     try:
-        db_solution = db.query(DBSolution).filter(DBSolution.id == solution_id).first()
+        db_solution = await db.get(DBSolution, solution_id)
         if not db_solution:
             raise HTTPException(status_code=404, detail="Solution not found")
 
@@ -69,22 +77,24 @@ async def update_solution(solution_id: str, updated_solution: SolutionUpdate, db
         for key, value in update_data.items():
             setattr(db_solution, key, value)
 
-        db.commit()
-        db.refresh(db_solution)
+        await db.commit()
+        table_cache.invalidate("solutions")
+        await db.refresh(db_solution)
         return db_solution
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update solution: {str(e)}")
 
 @router.delete("/{solution_id}", status_code=204)
-async def delete_solution(solution_id: str, db: Session = Depends(get_db)):
+async def delete_solution(solution_id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete a solution from the database."""
     try:
-        db_solution = db.query(DBSolution).filter(DBSolution.id == solution_id).first()
+        db_solution = await db.get(DBSolution, solution_id)
         if not db_solution:
             raise HTTPException(status_code=404, detail="Solution not found")
 
-        db.delete(db_solution)
-        db.commit()
+        await db.delete(db_solution)
+        await db.commit()
+        table_cache.invalidate("solutions")
         return {"message": "Solution deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete solution: {str(e)}")
@@ -1,42 +1,369 @@
 # backend/api/text_extract.py
+"""
+ファイル形式（拡張子）ごとのテキスト抽出器のレジストリ。
+
+1つの形式に複数のバックエンドを登録でき、環境変数 EXTRACTOR_BACKENDS
+（例: "pdf=pypdf,boxnote=text_extract"）で使用するバックエンドを切り替えられる。
+どのエンドポイントから呼ばれても同じ抽出器が使われる。
+抽出器はページ単位のテキストを返すジェネレーターで、ページの概念がない形式は全体を1ページとする。
+"""
+import io
 import os
-from fastapi import HTTPException
-from PyPDF2 import PdfReader
 import json
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# 拡張子 → バックエンド名 → 抽出関数（ファイルパスを受け取りページ単位のテキストを返す）
+EXTRACTORS: Dict[str, Dict[str, Callable[[str], Iterator[str]]]] = {}
+# 拡張子ごとの既定のバックエンド
+DEFAULT_BACKENDS: Dict[str, str] = {}
+# 登録されていない拡張子はテキストファイルとして扱う
+FALLBACK_FILE_TYPE = 'txt'
+
+def register_extractor(file_types: List[str], backend: str, default: bool = False):
+    """抽出関数を指定した拡張子（ドットなし・小文字）のバックエンドとして登録するデコレーター"""
+    def decorator(func: Callable[[str], Iterator[str]]):
+        for file_type in file_types:
+            EXTRACTORS.setdefault(file_type, {})[backend] = func
+            if default or file_type not in DEFAULT_BACKENDS:
+                DEFAULT_BACKENDS[file_type] = backend
+        return func
+    return decorator
+
+def _configured_backends() -> Dict[str, str]:
+    configured = {}
+    for item in os.getenv("EXTRACTOR_BACKENDS", "").split(','):
+        if '=' in item:
+            file_type, backend = item.split('=', 1)
+            configured[file_type.strip().lower().lstrip('.')] = backend.strip()
+    return configured
+
+def get_file_type(file_path: str) -> str:
+    file_type = os.path.splitext(file_path)[1].lower().lstrip('.')
+    return file_type if file_type in EXTRACTORS else FALLBACK_FILE_TYPE
+
+def resolve_backend(file_path: str, backend: Optional[str] = None) -> Tuple[str, Callable[[str], Iterator[str]]]:
+    """ファイルに使用するバックエンド名と抽出関数を返す"""
+    file_type = get_file_type(file_path)
+    backend = backend or _configured_backends().get(file_type) or DEFAULT_BACKENDS[file_type]
+    if backend not in EXTRACTORS[file_type]:
+        raise ValueError(f"{file_type} に対応する抽出バックエンド '{backend}' はありません。({', '.join(EXTRACTORS[file_type])})")
+    return backend, EXTRACTORS[file_type][backend]
+
+def iter_pages(file_path: str, backend: Optional[str] = None) -> Iterator[str]:
+    """ファイルのテキストをページ単位で返す。全ページを連結したものが extract_text の結果と一致する"""
+    _, extractor = resolve_backend(file_path, backend)
+    yield from extractor(file_path)
+
+def extract_text(file_path: str, backend: Optional[str] = None) -> str:
+    return "".join(iter_pages(file_path, backend))
+
+def extract_pages_timed(file_path: str, backend: Optional[str] = None) -> Tuple[List[str], str, float]:
+    """
+    ページ単位のテキストと、使用したバックエンド名・所要時間（秒）を返す。
+    プロセスプールのワーカー用（ジェネレーターは受け渡せないためリストで返す）。
+    """
+    backend, extractor = resolve_backend(file_path, backend)
+    start = time.perf_counter()
+    pages = list(extractor(file_path))
+    return pages, backend, time.perf_counter() - start
+
+# バックエンドごとの処理時間の集計（親プロセスで record_timing を呼んで集計する）
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+def record_timing(file_type: str, backend: str, seconds: float, size: int):
+    key = f"{file_type}:{backend}"
+    logging.info(f"テキスト抽出 {key}: {seconds * 1000:.0f}ms ({size} bytes)")
+    with _stats_lock:
+        stats = _stats.setdefault(key, {"files": 0, "seconds": 0.0, "bytes": 0})
+        stats["files"] += 1
+        stats["seconds"] += seconds
+        stats["bytes"] += size
+
+def get_timing_stats() -> Dict[str, Dict[str, float]]:
+    with _stats_lock:
+        return {
+            key: {**stats, "avg_ms": stats["seconds"] * 1000 / stats["files"]}
+            for key, stats in _stats.items()
+        }
+
+# --- テキスト ---
+
+@register_extractor(['txt', 'md', 'csv'], 'text')
+def extract_plain_text(file_path: str) -> Iterator[str]:
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            yield file.read()
+            return
+    except UnicodeDecodeError:
+        pass
+    with open(file_path, 'r', encoding='cp932') as file: # Shift-JIS
+        yield file.read()
+
+# --- PDF ---
+
+def remove_pdf_noise(text: str) -> str:
+    # PDFのメタデータやオブジェクトIDなどを正規表現で削除
+    text = text.replace("trailer", "").replace("%%EOF", "").strip()
+    return text
+
+@register_extractor(['pdf'], 'pymupdf', default=True)
+def extract_pdf_pymupdf(file_path: str) -> Iterator[str]:
+    import fitz  # PyMuPDF
+
+    with fitz.open(file_path) as doc:
+        for page in doc:
+            page_text = page.get_text("text")  # テキスト抽出
+            # 不要な部分を削除（メタデータやオブジェクトIDなど）
+            yield remove_pdf_noise(page_text) + "\n"
+
+@register_extractor(['pdf'], 'pypdf')
+def extract_pdf_pypdf(file_path: str) -> Iterator[str]:
+    from pypdf import PdfReader
+
+    for page in PdfReader(file_path).pages:
+        yield remove_pdf_noise(page.extract_text() or "") + "\n"
+
+@register_extractor(['pdf'], 'pypdf2')
+def extract_pdf_pypdf2(file_path: str) -> Iterator[str]:
+    from PyPDF2 import PdfReader
+
+    for page in PdfReader(file_path).pages:
+        yield remove_pdf_noise(page.extract_text() or "") + "\n"
+
+# --- BoxNote ---
+
+def _load_boxnote(file_path: str) -> dict:
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return json.load(file)
 
-def extract_text_from_file(file_path: str) -> str:
+@register_extractor(['boxnote'], 'streaming', default=True)
+def extract_boxnote_streaming(file_path: str) -> Iterator[str]:
     """
-    ファイルパスからテキストを抽出する関数。
+    ノートを先頭から少しずつ読み込み、最上位のブロックごとに変換する。
+    ノート全体を json.load しないため、巨大なノートでもメモリ使用量はブロック単位に収まる。
     """
-    file_extension = os.path.splitext(file_path)[1].lower()
-
-    if file_extension == '.txt':
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
-        except UnicodeDecodeError:
-            with open(file_path, 'r', encoding='cp932') as file: # Shift-JIS
-                return file.read()
-    elif file_extension == '.pdf':
-        text = ""
-        try:
-            reader = PdfReader(file_path)
-            for page in reader.pages:
-                text += page.extract_text()
-            return text
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"PDFファイル読み込みエラー: {e}")
-    elif file_extension == '.boxnote':
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                boxnote_json = json.load(file)
-                return boxnote_to_markdown(boxnote_json)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"BoxNoteファイル読み込みエラー: {e}")
-    else:
-        raise HTTPException(status_code=400, detail="対応していないファイル形式です。")
-
-# boxnoteJsonToMarkdown を backend に移動
+    output = io.StringIO()
+    with open(file_path, 'rb') as file:
+        for block in _iter_boxnote_blocks(file):
+            write_boxnote_markdown([block], output)
+    yield output.getvalue()
+
+def _iter_boxnote_blocks(file) -> Iterator[dict]:
+    """
+    .boxnote の doc.content の要素（最上位のブロック）を1つずつ組み立てて返す。
+    ijson.items はネストの深さに比例する長さのパス文字列をイベントごとに作るため、
+    パスを持たない basic_parse のイベントから自前で組み立てる。
+    """
+    import ijson
+
+    stack = []  # [組み立て中のコンテナ, 直前のキー, 役割（root / doc / blocks）]
+    for event, value in ijson.basic_parse(file, use_float=True):
+        if event in ('start_map', 'start_array'):
+            role = 'root' if not stack else None
+            if stack and event == 'start_map' and stack[-1][2] == 'root' and stack[-1][1] == 'doc':
+                role = 'doc'
+            elif stack and event == 'start_array' and stack[-1][2] == 'doc' and stack[-1][1] == 'content':
+                role = 'blocks'
+            stack.append([{} if event == 'start_map' else [], None, role])
+            continue
+        if event == 'map_key':
+            stack[-1][1] = value
+            continue
+        if event in ('end_map', 'end_array'):
+            value = stack.pop()[0]
+            if not stack:
+                continue
+        parent = stack[-1]
+        if parent[2] == 'blocks':
+            yield value  # 変換済みのブロックは保持しない
+        elif isinstance(parent[0], list):
+            parent[0].append(value)
+        else:
+            parent[0][parent[1]] = value
+
+@register_extractor(['boxnote'], 'box')
+def extract_boxnote_box(file_path: str) -> Iterator[str]:
+    """box.py で使われていた変換（再帰版）"""
+    yield boxnote_json_to_markdown(_load_boxnote(file_path))
+
+@register_extractor(['boxnote'], 'text_extract')
+def extract_boxnote_text_extract(file_path: str) -> Iterator[str]:
+    """text_extract.py で使われていた変換（再帰版。未知のノード型や属性の欠落に寛容）"""
+    yield boxnote_to_markdown(_load_boxnote(file_path))
+
+def _boxnote_media(node: dict) -> Optional[str]:
+    attrs = node.get('attrs') or {}
+    if node.get('type') == 'image':
+        return f"![{attrs.get('alt') or 'image'}]({attrs.get('src') or attrs.get('boxSharedLink')})"
+    if node.get('type') == 'embed':
+        return f"[{attrs.get('title')}]({attrs.get('url')})"
+    return None
+
+def _boxnote_text(node: dict) -> str:
+    text = node.get('text', '')
+    for mark in node.get('marks') or []:
+        if mark.get('type') == 'strong':
+            text = f"**{text}**"
+        elif mark.get('type') == 'highlight':
+            text = f"<mark style='background-color:{(mark.get('attrs') or {}).get('color', '')}'>{text}</mark>"
+    return text
+
+# スタックに積む処理の種類
+_BLOCK, _INLINE, _LITERAL, _LIST_ITEM, _END_LIST_ITEM = range(5)
+
+def write_boxnote_markdown(content: list, output) -> None:
+    """
+    BoxNote（ProseMirror形式）のノード列を Markdown に変換して output に書き込む。
+    再帰の代わりに明示的なスタックでノードをたどるため、深くネストしたノートでも再帰上限に達しない。
+    文字列の連結は行わず、リスト項目の本文だけを一時バッファに集めてから整形する。
+    """
+    # (処理の種類, ノードまたは文字列, リストの接頭辞)。後に積んだものから処理されるため子は逆順に積む
+    stack = [(_BLOCK, node, None) for node in reversed(content or [])]
+    item_buffers: List[List[str]] = []  # 処理中のリスト項目ごとの出力バッファ
+
+    def write(text: str):
+        if item_buffers:
+            item_buffers[-1].append(text)
+        else:
+            output.write(text)
+
+    def push_children(node: dict, kind: int):
+        stack.extend((kind, child, None) for child in reversed(node.get('content') or []))
+
+    while stack:
+        kind, node, prefix = stack.pop()
+
+        if kind == _LITERAL:
+            write(node)
+        elif kind == _END_LIST_ITEM:
+            item_content = ''.join(item_buffers.pop()).replace('\n+', ' ').strip()
+            write(f"{prefix}{item_content}\n")
+        elif kind == _LIST_ITEM:
+            item_buffers.append([])
+            stack.append((_END_LIST_ITEM, None, prefix))
+            push_children(node, _BLOCK)
+        elif kind == _INLINE:
+            node_type = node.get('type')
+            if node_type == 'text':
+                write(_boxnote_text(node))
+            elif node_type == 'hard_break':
+                write('\n')
+            elif node_type in ('image', 'embed'):
+                write(_boxnote_media(node))
+            elif node.get('content'):
+                push_children(node, _INLINE)
+        else:
+            node_type = node.get('type')
+            if node_type == 'heading':
+                write('#' * int((node.get('attrs') or {}).get('level', 1)) + ' ')
+                stack.append((_LITERAL, '\n', None))
+                push_children(node, _INLINE)
+            elif node_type == 'paragraph':
+                stack.append((_LITERAL, '\n\n', None))
+                push_children(node, _INLINE)
+            elif node_type in ('bullet_list', 'ordered_list'):
+                items = [item for item in node.get('content') or [] if item.get('type') == 'list_item']
+                stack.append((_LITERAL, '\n', None))
+                for index in range(len(items), 0, -1):
+                    item_prefix = f"{index}. " if node_type == 'ordered_list' else '* '
+                    stack.append((_LIST_ITEM, items[index - 1], item_prefix))
+            elif node_type == 'horizontal_rule':
+                write('---\n')
+            elif node_type == 'text':
+                write(_boxnote_text(node))
+            elif node_type == 'hard_break':
+                write('\n')
+            elif node_type in ('image', 'embed'):
+                write(_boxnote_media(node) + '\n')
+            else:
+                # list_item, doc, 未知のノード型は子ノードをそのまま処理
+                push_children(node, _BLOCK)
+
+def boxnote_json_to_markdown(json_data: dict) -> str:
+    if not json_data or not json_data.get('doc') or not json_data['doc'].get('content'):
+        return ''
+
+    def process_content(content: list) -> str:
+        markdown = ''
+        if not content:
+            return markdown
+        for node in content:
+            if node['type'] == 'heading':
+                markdown += f"{'#' * node['attrs']['level']} {process_inline_content(node.get('content', []))}\n"
+            elif node['type'] == 'paragraph':
+                markdown += f"{process_inline_content(node.get('content', []))}\n\n"
+            elif node['type'] == 'bullet_list':
+                markdown += process_list(node.get('content', []), '* ')
+            elif node['type'] == 'ordered_list':
+                markdown += process_list(node.get('content', []), '1. ')
+            elif node['type'] == 'list_item':
+                markdown += process_content(node.get('content', []))
+            elif node['type'] == 'horizontal_rule':
+                markdown += '---\n'
+            elif node['type'] == 'text':
+                markdown += process_text(node)
+            elif node['type'] == 'hard_break':
+                markdown += '\n'
+            elif node['type'] == 'image':
+                markdown += f"![{node['attrs']['alt'] or 'image'}]({node['attrs']['src'] or node['attrs']['boxSharedLink']})\n"
+            elif node['type'] == 'embed':
+                markdown += f"[{node['attrs']['title']}]({node['attrs']['url']})\n"
+            elif node['type'] == 'doc':
+                markdown += process_content(node.get('content', []))
+            else:
+                markdown += process_content(node.get('content', []))
+        return markdown
+
+    def process_inline_content(content: list) -> str:
+        inline_markdown = ''
+        if not content:
+            return inline_markdown
+        for node in content:
+            if node['type'] == 'text':
+                inline_markdown += process_text(node)
+            elif node['type'] == 'hard_break':
+                inline_markdown += '\n'
+            elif node['type'] == 'image':
+                inline_markdown += f"![{node['attrs']['alt'] or 'image'}]({node['attrs']['src'] or node['attrs']['boxSharedLink']})"
+            elif node['type'] == 'embed':
+                inline_markdown += f"[{node['attrs']['title']}]({node['attrs']['url']})"
+            elif node.get('content'):
+                inline_markdown += process_inline_content(node.get('content', []))
+        return inline_markdown
+
+    def process_text(node: dict) -> str:
+        text = node.get('text', '')
+        if node.get('marks'):
+            for mark in node['marks']:
+                if mark['type'] == 'strong':
+                    text = f"**{text}**"
+                elif mark['type'] == 'highlight':
+                    text = f"<mark style='background-color:{mark['attrs'].get('color', '')}'>{text}</mark>"
+        return text
+
+    def process_list(content: list, prefix: str) -> str:
+        list_markdown = ''
+        index = 1
+        for item in content:
+            if item['type'] == 'list_item':
+                current_prefix = f"{index}. " if prefix == '1. ' else prefix
+                item_content = process_content(item['content'])
+                item_content = item_content.replace('\n+', ' ').strip()
+                list_markdown += f"{current_prefix}{item_content}\n"
+                if prefix == '1. ':
+                    index += 1
+        list_markdown += '\n'
+        return list_markdown
+
+    return process_content(json_data['doc'].get('content', []))
+
 def boxnote_to_markdown(json_data: dict) -> str:
     if not json_data or not json_data.get('doc') or not json_data['doc'].get('content'):
         return ''
@@ -131,3 +458,97 @@ def boxnote_to_markdown(json_data: dict) -> str:
 
     # Process the root content
     return process_content(json_data['doc'].get('content', []))
+
+# --- Office（docx / pptx / xlsx） ---
+# ZIP 内の XML をストリームで読み、処理し終えた要素は破棄する（メモリ使用量は1ページ分に収まる）
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+def _is_docx_page_break(elem) -> bool:
+    # Word が最後に描画したときの改ページ位置、または明示的な改ページ
+    return elem.tag == _W + 'lastRenderedPageBreak' or (elem.tag == _W + 'br' and elem.get(_W + 'type') == 'page')
+
+@register_extractor(['docx'], 'xml', default=True)
+def extract_docx_xml(file_path: str) -> Iterator[str]:
+    """word/document.xml を iterparse で読み、改ページごとに1ページとして返す"""
+    with zipfile.ZipFile(file_path) as docx, docx.open('word/document.xml') as file:
+        page: List[str] = []
+        body = None
+        depth = 0
+        for event, elem in ET.iterparse(file, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if elem.tag == _W + 'body':
+                    body = elem
+                elif _is_docx_page_break(elem) and ''.join(page).strip():
+                    # 改ページが続く場合に空のページを作らない
+                    yield ''.join(page)
+                    page = []
+                continue
+
+            depth -= 1
+            if elem.tag == _W + 't':
+                page.append(elem.text or '')
+            elif elem.tag == _W + 'tab':
+                page.append('\t')
+            elif elem.tag in (_W + 'br', _W + 'cr') and not _is_docx_page_break(elem):
+                page.append('\n')
+            elif elem.tag == _W + 'p':
+                page.append('\n')
+            if depth == 2 and body is not None:
+                # 段落・表を読み終えるたびに本文の要素を破棄する（document → body → 段落・表）
+                body.clear()
+        yield ''.join(page)
+
+def _pptx_slide_paths(pptx: zipfile.ZipFile) -> List[str]:
+    """presentation.xml の並び順でスライドの XML のパスを返す"""
+    with pptx.open('ppt/_rels/presentation.xml.rels') as file:
+        targets = {rel.get('Id'): rel.get('Target') for rel in ET.parse(file).getroot()}
+    with pptx.open('ppt/presentation.xml') as file:
+        presentation = ET.parse(file).getroot()
+
+    paths = []
+    for slide_id in presentation.iter(_P + 'sldId'):
+        target = targets.get(slide_id.get(_R + 'id'))
+        if target:
+            paths.append(target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('ppt', target)))
+    return paths
+
+@register_extractor(['pptx'], 'xml', default=True)
+def extract_pptx_xml(file_path: str) -> Iterator[str]:
+    """スライドの XML を1枚ずつ iterparse で読み、スライドごとに1ページとして返す"""
+    with zipfile.ZipFile(file_path) as pptx:
+        for path in _pptx_slide_paths(pptx):
+            slide: List[str] = []
+            with pptx.open(path) as file:
+                for _, elem in ET.iterparse(file):
+                    if elem.tag == _A + 't':
+                        slide.append(elem.text or '')
+                    elif elem.tag == _A + 'br':
+                        slide.append('\n')
+                    elif elem.tag == _A + 'p':
+                        slide.append('\n')
+                        elem.clear()
+            yield ''.join(slide) + '\n'
+
+@register_extractor(['xlsx', 'xlsm'], 'openpyxl', default=True)
+def extract_xlsx_openpyxl(file_path: str) -> Iterator[str]:
+    """openpyxl の read-only モードで行を順に読み、シートごとに1ページ（タブ区切り）として返す"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            lines = [f"# {sheet.title}\n"]
+            for row in sheet.iter_rows(values_only=True):
+                values = ['' if value is None else str(value) for value in row]
+                while values and values[-1] == '':
+                    values.pop()
+                if values:
+                    lines.append('\t'.join(values) + '\n')
+            yield ''.join(lines) + '\n'
+    finally:
+        workbook.close()
@@ -0,0 +1,111 @@
+# src/backend/benchmarks/async_db.py
+"""
+DBアクセスの同時実行性能のベンチマーク。
+
+同時に --clients 件のクライアントからリクエストを送り、スループット（req/s）とレイテンシ（p50 / p95）を表示する。
+
+- engines: アプリを起動せずにエンジン単位で比較する
+    - sync-blocking: 同期エンジンをイベントループ上でそのまま使う（従来の async def + Session と同じ状態）
+    - sync-threads:  同期エンジンをスレッドプールで使う（def のエンドポイントと同じ状態）
+    - async:         asyncpg の非同期エンジンを使う
+- http: 起動中のサーバーのエンドポイントに httpx でリクエストを送る
+
+実行例（src/backend で実行）:
+    python -m benchmarks.async_db engines --clients 100 --requests 2000 --project-id 1
+    python -m benchmarks.async_db http --url http://localhost:8000/api/chat_history/sessions/1 --clients 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+def report(name: str, latencies, elapsed: float, errors: int = 0):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] if latencies else 0
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    print(f"{name:<14} {len(latencies) / elapsed:>10.1f} {p50 * 1000:>10.2f} {p95 * 1000:>10.2f} "
+          f"{statistics.mean(latencies) * 1000 if latencies else 0:>10.2f} {errors:>7}")
+
+async def run_clients(clients: int, requests: int, call):
+    """clients 件のクライアントで合計 requests 回 call を実行し、(レイテンシの一覧, 経過時間, エラー数) を返す"""
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                await call()
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, time.perf_counter() - start, errors
+
+async def benchmark_engines(clients: int, requests: int, project_id: int):
+    from sqlalchemy import select
+    from database import SessionLocal, AsyncSessionLocal, ChatHistory, engine, async_engine
+
+    query = select(ChatHistory.session_title, ChatHistory.timestamp).where(
+        ChatHistory.project_id == project_id
+    ).order_by(ChatHistory.timestamp.desc()).limit(50)
+
+    def sync_query():
+        with SessionLocal() as db:
+            return db.execute(query).all()
+
+    async def sync_blocking():
+        return sync_query()
+
+    async def sync_threads():
+        return await asyncio.to_thread(sync_query)
+
+    async def async_query():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(query)).all()
+
+    print(f"{clients} clients, {requests} requests")
+    print(f"{'mode':<14} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'mean ms':>10} {'errors':>7}")
+    for name, call in (("sync-blocking", sync_blocking), ("sync-threads", sync_threads), ("async", async_query)):
+        # 接続を確立しておき、プールの初期化を計測に含めない
+        await run_clients(clients, clients, call)
+        report(name, *await run_clients(clients, requests, call))
+
+    engine.dispose()
+    await async_engine.dispose()
+
+async def benchmark_http(url: str, clients: int, requests: int):
+    import httpx
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        async def call():
+            response = await client.get(url)
+            response.raise_for_status()
+
+        print(f"{url}: {clients} clients, {requests} requests")
+        print(f"{'mode':<14} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'mean ms':>10} {'errors':>7}")
+        await run_clients(clients, clients, call)
+        report("http", *await run_clients(clients, requests, call))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", choices=("engines", "http"))
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--project-id", type=int, default=1)
+    parser.add_argument("--url", default="http://localhost:8000/api/projects/")
+    args = parser.parse_args()
+
+    if args.mode == "engines":
+        asyncio.run(benchmark_engines(args.clients, args.requests, args.project_id))
+    else:
+        asyncio.run(benchmark_http(args.url, args.clients, args.requests))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# src/backend/benchmarks/boxnote_scaling.py
+"""
+BoxNote 変換のスケーリング確認用ベンチマーク。
+
+サイズを倍々にした合成ノート（数MB）を生成し、各バックエンドの処理時間と MB あたりの時間を表示する。
+MB あたりの時間がサイズによらずほぼ一定であれば線形にスケールしている。
+あわせて深くネストしたノートを変換し、再帰上限に達しないことを確認する。
+json.load で全体を読み込むバックエンド（box / text_extract）は深いノートで RecursionError になるため、
+失敗したバックエンドとサイズは最後にまとめて表示する。
+
+実行例（src/backend で実行）:
+    python -m benchmarks.boxnote_scaling --sizes 1 2 4 8
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from api.text_extract import EXTRACTORS, extract_text
+
+def make_block(i: int) -> dict:
+    paragraph = {"type": "paragraph", "content": [
+        {"type": "text", "text": f"第{i}回 打ち合わせ: 業務フローの現状確認と課題の整理を行った。"},
+        {"type": "hard_break"},
+        {"type": "text", "text": "次回までに対応方針をまとめる", "marks": [{"type": "strong"}]},
+    ]}
+    items = [
+        {"type": "list_item", "content": [{"type": "paragraph", "content": [{"type": "text", "text": f"タスク {i}-{n}"}]}]}
+        for n in range(3)
+    ]
+    return [
+        {"type": "heading", "attrs": {"level": 2}, "content": [{"type": "text", "text": f"議題 {i}"}]},
+        paragraph,
+        {"type": "bullet_list", "content": items},
+    ]
+
+def write_note(path: str, target_mb: float):
+    """目標サイズに達するまでブロックを追記する（ノート全体をメモリ上に作らない）"""
+    target = target_mb * 1024 * 1024
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"doc": {"type": "doc", "content": [')
+        i = 0
+        while f.tell() < target:
+            for block in make_block(i):
+                f.write(("," if i or block["type"] != "heading" else "") + json.dumps(block, ensure_ascii=False))
+            i += 1
+        f.write("]}}")
+
+def write_deep_note(path: str, depth: int):
+    """リストを depth 段ネストしたノート"""
+    open_item = '{"type": "bullet_list", "content": [{"type": "list_item", "content": ['
+    close_item = ']}]}'
+    leaf = '{"type": "paragraph", "content": [{"type": "text", "text": "leaf"}]}'
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"doc": {"type": "doc", "content": [')
+        f.write(open_item * depth + leaf + close_item * depth)
+        f.write("]}}")
+
+def time_backend(path: str, backend: str):
+    start = time.perf_counter()
+    try:
+        extract_text(path, backend)
+    except RecursionError:
+        return None
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--depth", type=int, default=5000)
+    args = parser.parse_args()
+    backends = list(EXTRACTORS["boxnote"])
+    failures = []  # (バックエンド, 入力)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'size':>8} " + " ".join(f"{b:>22}" for b in backends))
+        for size in args.sizes:
+            path = os.path.join(tmp, f"note_{size}.boxnote")
+            write_note(path, size)
+            actual_mb = os.path.getsize(path) / (1024 * 1024)
+            cells = []
+            for backend in backends:
+                elapsed = time_backend(path, backend)
+                if elapsed is None:
+                    failures.append((backend, f"{actual_mb:.1f}MB"))
+                    cells.append("failed")
+                else:
+                    cells.append(f"{elapsed * 1000:>9.0f}ms ({elapsed * 1000 / actual_mb:>5.0f}ms/MB)")
+            print(f"{actual_mb:>6.1f}MB " + " ".join(f"{c:>22}" for c in cells))
+
+        path = os.path.join(tmp, "deep.boxnote")
+        write_deep_note(path, args.depth)
+        for backend in backends:
+            elapsed = time_backend(path, backend)
+            if elapsed is None:
+                failures.append((backend, f"depth={args.depth}"))
+            result = "RecursionError" if elapsed is None else f"{elapsed * 1000:.0f}ms"
+            print(f"depth={args.depth} {backend}: {result}")
+
+    if failures:
+        print("failures (RecursionError):")
+        for backend, case in failures:
+            print(f"  {backend}: {case}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# src/backend/benchmarks/extractors.py
+"""
+テキスト抽出バックエンドのベンチマーク。
+
+コーパス（既定は benchmarks/corpus）の各ファイルについて、形式ごとに登録された全バックエンドで抽出を行い、
+スループット（ファイル/秒・MB/秒）と既定バックエンドの出力との一致度を表示する。
+
+実行例（src/backend で実行）:
+    python -m benchmarks.extractors --iterations 20
+    python -m benchmarks.extractors --corpus /path/to/box/folder
+"""
+import argparse
+import difflib
+import os
+import time
+
+from api.text_extract import EXTRACTORS, DEFAULT_BACKENDS, get_file_type, extract_text
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+def similarity(expected: str, actual: str) -> float:
+    if expected == actual:
+        return 1.0
+    return difflib.SequenceMatcher(None, normalize(expected), normalize(actual)).ratio()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    files = sorted(
+        os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+        if os.path.isfile(os.path.join(args.corpus, name))
+    )
+    by_type = {}
+    for file_path in files:
+        by_type.setdefault(get_file_type(file_path), []).append(file_path)
+
+    print(f"{'type':<8} {'backend':<14} {'files/s':>9} {'MB/s':>8} {'parity':>7}")
+    for file_type, paths in sorted(by_type.items()):
+        total_bytes = sum(os.path.getsize(p) for p in paths)
+        baseline = {}
+        for backend in [DEFAULT_BACKENDS[file_type]] + [b for b in EXTRACTORS[file_type] if b != DEFAULT_BACKENDS[file_type]]:
+            try:
+                outputs = {p: extract_text(p, backend) for p in paths}  # ウォームアップ兼パリティ確認用
+            except ImportError as e:
+                print(f"{file_type:<8} {backend:<14} {'(unavailable: ' + str(e) + ')'}")
+                continue
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                for p in paths:
+                    extract_text(p, backend)
+            elapsed = time.perf_counter() - start
+
+            if not baseline:
+                baseline = outputs
+            parity = min(similarity(baseline[p], outputs[p]) for p in paths)
+            runs = args.iterations * len(paths)
+            print(f"{file_type:<8} {backend:<14} {runs / elapsed:>9.1f} "
+                  f"{total_bytes * args.iterations / elapsed / (1024 * 1024):>8.2f} {parity:>7.3f}")
+
+    # 同じ内容の UTF-8 / CP932 テキストが同じ結果になるか
+    utf8_path = os.path.join(args.corpus, "sample_utf8.txt")
+    cp932_path = os.path.join(args.corpus, "sample_cp932.txt")
+    if os.path.exists(utf8_path) and os.path.exists(cp932_path):
+        same = extract_text(utf8_path) == extract_text(cp932_path)
+        print(f"UTF-8 / CP932 parity: {'OK' if same else 'NG'}")
+
+if __name__ == "__main__":
+    main()
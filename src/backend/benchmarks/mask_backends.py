@@ -0,0 +1,85 @@
+# src/backend/benchmarks/mask_backends.py
+"""
+マスキングモデルの推論バックエンド比較ベンチマーク。
+
+fp32 の出力を基準に、指定したバックエンド（int8 / onnx）の出力一致率（精度パリティ）と
+1リクエストあたりのレイテンシ、モデル読み込み後のメモリ使用量（RSS）を計測する。
+
+実行例（src/backend で実行）:
+    python -m benchmarks.mask_backends --backend int8 --runs 3
+"""
+import argparse
+import difflib
+import os
+import statistics
+import time
+
+import psutil
+
+# 基準となる fp32 モデルを mask_service の既定モデルとして読み込む
+os.environ["MASK_BACKEND"] = "fp32"
+import mask_service  # noqa: E402
+
+SAMPLE_TEXTS = [
+    "オペレーターの佐藤です。山田太郎様のご住所は東京都千代田区丸の内1-1-1でお間違いないでしょうか。",
+    "担当の鈴木花子（電話: 090-1234-5678、メール: hanako.suzuki@example.com）までご連絡ください。",
+    "本日の会議には株式会社サンプルの田中部長と、経理部の高橋さんが出席しました。",
+    "生年月日は1985年4月12日、会員番号は A-0012345 です。",
+    "次回の打ち合わせは来週火曜日の15時から、大阪支社の会議室で行います。",
+]
+
+def rss_mb() -> float:
+    return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+
+def run_backend(mask_model, runs: int):
+    outputs = []
+    latencies = []
+    for text in SAMPLE_TEXTS:
+        for _ in range(runs):
+            start = time.perf_counter()
+            output = mask_service.generate_masked_text(text, mask_model=mask_model)
+            latencies.append(time.perf_counter() - start)
+        outputs.append(output)
+    return outputs, latencies
+
+def report(name: str, latencies, memory_mb: float):
+    print(f"[{name}] latency mean={statistics.mean(latencies) * 1000:.0f}ms "
+          f"p50={statistics.median(latencies) * 1000:.0f}ms "
+          f"max={max(latencies) * 1000:.0f}ms / model memory={memory_mb:.0f}MB")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default="int8", choices=[b for b in mask_service.MASK_BACKENDS if b != "fp32"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--min-similarity", type=float, default=0.95)
+    args = parser.parse_args()
+
+    baseline_outputs, baseline_latencies = run_backend(mask_service.model, args.runs)
+    report("fp32", baseline_latencies, rss_mb())
+
+    before = rss_mb()
+    candidate = mask_service.load_model(args.backend)
+    candidate_memory = rss_mb() - before
+    candidate_outputs, candidate_latencies = run_backend(candidate, args.runs)
+    report(args.backend, candidate_latencies, candidate_memory)
+
+    exact = 0
+    similarities = []
+    for text, expected, actual in zip(SAMPLE_TEXTS, baseline_outputs, candidate_outputs):
+        similarity = difflib.SequenceMatcher(None, expected, actual).ratio()
+        similarities.append(similarity)
+        if expected == actual:
+            exact += 1
+        else:
+            print(f"  差分あり (similarity={similarity:.3f}): {text[:30]}...")
+            print(f"    fp32: {expected}")
+            print(f"    {args.backend}: {actual}")
+
+    mean_similarity = statistics.mean(similarities)
+    print(f"パリティ: 完全一致 {exact}/{len(SAMPLE_TEXTS)}, 平均類似度 {mean_similarity:.3f}")
+    print(f"速度比: x{statistics.mean(baseline_latencies) / statistics.mean(candidate_latencies):.2f}")
+    if mean_similarity < args.min_similarity:
+        raise SystemExit(f"{args.backend} の出力が fp32 と一致しません (平均類似度 {mean_similarity:.3f} < {args.min_similarity})")
+
+if __name__ == "__main__":
+    main()
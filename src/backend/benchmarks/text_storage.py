@@ -0,0 +1,204 @@
+# src/backend/benchmarks/text_storage.py
+"""
+抽出テキストの保存方式のベンチマーク（接続先のDBに一時テーブルを作って計測する）。
+
+1. コーパスの各ファイルを抽出し、次の方式で一時テーブルに保存したときの格納サイズと書き込み・読み出しの時間を表示する。
+   - pages-lz4 / pages-pglz: 現在の方式。extracted_pages と同じくページ単位の行に保存し、TOAST で圧縮する
+     （lz4 は PostgreSQL 14 以降で lz4 付きでビルドされている場合のみ計測する）
+   - processed_text: 従来の方式。uploaded_files.processed_text と同じくファイルの行に全文を保存する
+   読み出しは全文（ページを連結）と1ページ目の取得を1ファイルあたりの時間で表示する。
+2. --listing を指定した場合は、接続先のDBについて以下も表示する。
+   - テーブルごとのサイズ（TOAST・インデックスを含む）と、extracted_pages の TOAST 圧縮の圧縮率
+   - ファイル一覧の取得時間（processed_text を含む全列の取得と、一覧用の列だけの取得の比較）
+
+TOAST で圧縮されるのは約2KBを超える値だけのため、実際のBoxフォルダをコーパスに指定して計測する。
+
+実行例（src/backend で実行）:
+    python -m benchmarks.text_storage --corpus /path/to/box/folder
+    python -m benchmarks.text_storage --corpus /path/to/box/folder --listing --project-id 1
+"""
+import argparse
+import hashlib
+import os
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from api.text_extract import iter_pages
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+# 方式名 → (テーブル定義, 全文の読み出し, 1ページ目の読み出し)
+STORAGES = {
+    "pages-lz4": (
+        "CREATE TEMP TABLE bench_pages_lz4 (content_hash varchar(64), page_number integer, "
+        "text text COMPRESSION lz4, PRIMARY KEY (content_hash, page_number))",
+        "SELECT string_agg(text, '' ORDER BY page_number) FROM bench_pages_lz4 WHERE content_hash = :content_hash",
+        "SELECT text FROM bench_pages_lz4 WHERE content_hash = :content_hash AND page_number = 1",
+    ),
+    "pages-pglz": (
+        "CREATE TEMP TABLE bench_pages_pglz (content_hash varchar(64), page_number integer, "
+        "text text COMPRESSION pglz, PRIMARY KEY (content_hash, page_number))",
+        "SELECT string_agg(text, '' ORDER BY page_number) FROM bench_pages_pglz WHERE content_hash = :content_hash",
+        "SELECT text FROM bench_pages_pglz WHERE content_hash = :content_hash AND page_number = 1",
+    ),
+    # 従来の方式では全文を1つの値として保存していたため、1ページ目だけの取得も全文を展開して切り出すことになる
+    "processed_text": (
+        "CREATE TEMP TABLE bench_processed_text (content_hash varchar(64) PRIMARY KEY, sourcename varchar, "
+        "processed boolean, processed_text text COMPRESSION pglz)",
+        "SELECT processed_text FROM bench_processed_text WHERE content_hash = :content_hash",
+        "SELECT substr(processed_text, 1, :length) FROM bench_processed_text WHERE content_hash = :content_hash",
+    ),
+}
+
+def load_corpus(corpus: str):
+    """コーパスの各ファイルを抽出し、(content_hash, ファイル名, ページのリスト) のリストを返す"""
+    documents = []
+    for name in sorted(os.listdir(corpus)):
+        path = os.path.join(corpus, name)
+        if not os.path.isfile(path):
+            continue
+        try:
+            pages = list(iter_pages(path))
+        except Exception as e:
+            print(f"skip {name}: {e}")
+            continue
+        with open(path, "rb") as f:
+            documents.append((hashlib.sha256(f.read()).hexdigest(), name, pages))
+    return documents
+
+def _write(connection, name: str, documents):
+    if name == "processed_text":
+        connection.execute(text(
+            "INSERT INTO bench_processed_text VALUES (:content_hash, :sourcename, true, :text) ON CONFLICT DO NOTHING"
+        ), [{"content_hash": h, "sourcename": n, "text": "".join(pages)} for h, n, pages in documents])
+    else:
+        table = f"bench_{name.replace('-', '_')}"
+        connection.execute(text(
+            f"INSERT INTO {table} VALUES (:content_hash, :page_number, :text) ON CONFLICT DO NOTHING"
+        ), [
+            {"content_hash": h, "page_number": i, "text": page}
+            for h, _n, pages in documents for i, page in enumerate(pages, start=1)
+        ])
+
+def _stored_size(connection, name: str):
+    """(UTF-8 のバイト数, pg_column_size による格納サイズ, TOAST・インデックスを含むテーブルのサイズ) を返す"""
+    if name == "processed_text":
+        table, column = "bench_processed_text", "processed_text"
+    else:
+        table, column = f"bench_{name.replace('-', '_')}", "text"
+    return connection.execute(text(
+        f"SELECT coalesce(sum(octet_length({column})), 0), coalesce(sum(pg_column_size({column})), 0), "
+        f"pg_total_relation_size('{table}') FROM {table}"
+    )).one()
+
+def _read_ms(connection, sql: str, params, iterations: int) -> float:
+    """params のそれぞれで sql を実行し、1件あたりの平均時間（ミリ秒）を返す"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for p in params:
+            connection.execute(text(sql), p).scalar()
+    return (time.perf_counter() - start) * 1000 / (iterations * len(params))
+
+def benchmark_storage(documents, iterations: int):
+    from database import engine
+
+    raw = sum(len(page.encode("utf-8")) for _h, _n, pages in documents for page in pages)
+    print(f"{len(documents)} files, {sum(len(pages) for _h, _n, pages in documents)} pages, "
+          f"{raw:,} bytes of extracted text (UTF-8)")
+    print(f"{'storage':<15} {'stored':>12} {'ratio':>7} {'table':>12} {'write ms':>9} "
+          f"{'full ms':>8} {'page1 ms':>9}")
+
+    full_params = [{"content_hash": h} for h, _n, _pages in documents]
+    page1_params = [{"content_hash": h, "length": len(pages[0]) if pages else 0} for h, _n, pages in documents]
+
+    with engine.connect() as connection:
+        for name, (create_sql, full_sql, page1_sql) in STORAGES.items():
+            try:
+                with connection.begin_nested():
+                    connection.execute(text(create_sql))
+            except DBAPIError as e:
+                print(f"{name:<15} not available: {str(e.orig).strip().splitlines()[0]}")
+                continue
+
+            start = time.perf_counter()
+            _write(connection, name, documents)
+            connection.commit()
+            write_ms = (time.perf_counter() - start) * 1000
+            connection.execute(text("ANALYZE"))
+
+            size, stored, table_size = _stored_size(connection, name)
+            # 1回読み出してキャッシュに載せてから計測する
+            _read_ms(connection, full_sql, full_params, 1)
+            full_ms = _read_ms(connection, full_sql, full_params, iterations)
+            page1_ms = _read_ms(connection, page1_sql, page1_params, iterations)
+            print(f"{name:<15} {stored:>12,} {size / stored if stored else 0:>6.2f}x {table_size:>12,} "
+                  f"{write_ms:>9.1f} {full_ms:>8.3f} {page1_ms:>9.3f}")
+            connection.commit()
+
+def benchmark_listing(project_id: int, iterations: int):
+    from sqlalchemy import func
+    from sqlalchemy.orm import undefer
+    from database import SessionLocal, UploadedFile, ExtractedText, ExtractedPage
+
+    db = SessionLocal()
+    try:
+        print(f"{'table':<16} {'total':>14} {'toast':>14}")
+        for table in ("uploaded_files", "extracted_texts", "extracted_pages"):
+            total, toast = db.execute(text(
+                "SELECT pg_total_relation_size(c.oid), coalesce(pg_total_relation_size(nullif(c.reltoastrelid, 0)), 0) "
+                "FROM pg_class c WHERE c.relname = :name"
+            ), {"name": table}).one()
+            print(f"{table:<16} {total:>14,} {toast:>14,}")
+
+        # pg_column_size は TOAST で圧縮された後の格納サイズを返す
+        raw, compressed = db.query(
+            func.coalesce(func.sum(func.octet_length(ExtractedPage.text)), 0),
+            func.coalesce(func.sum(func.pg_column_size(ExtractedPage.text)), 0)
+        ).one()
+        print(f"extracted_pages: {raw:,} bytes -> {compressed:,} bytes "
+              f"({raw / compressed if compressed else 0:.2f}x)")
+
+        def full_rows():
+            # 従来の一覧（processed_text を含む全列）
+            return db.query(UploadedFile).options(undefer(UploadedFile.processed_text)).filter(
+                UploadedFile.project_id == project_id
+            ).all()
+
+        def summary_rows():
+            return db.query(
+                UploadedFile.id, UploadedFile.sourcename, UploadedFile.sourcepath, UploadedFile.project_id,
+                UploadedFile.creation_date, UploadedFile.processed, UploadedFile.file_size, ExtractedText.page_count
+            ).outerjoin(
+                ExtractedText, ExtractedText.content_hash == UploadedFile.content_hash
+            ).filter(UploadedFile.project_id == project_id).all()
+
+        for name, query in (("full rows", full_rows), ("summary", summary_rows)):
+            rows = query()
+            start = time.perf_counter()
+            for _ in range(iterations):
+                query()
+                db.expunge_all()
+            elapsed = time.perf_counter() - start
+            print(f"listing ({name}): {len(rows)} files, {elapsed * 1000 / iterations:.2f} ms")
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--listing", action="store_true", help="接続先のDBのテーブルサイズと一覧の取得時間も計測する")
+    parser.add_argument("--project-id", type=int, default=1)
+    args = parser.parse_args()
+
+    documents = load_corpus(args.corpus)
+    if not documents:
+        parser.error(f"抽出できるファイルがありません: {args.corpus}")
+    benchmark_storage(documents, args.iterations)
+    if args.listing:
+        benchmark_listing(args.project_id, args.iterations)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# src/backend/box_watcher.py
+"""
+プロジェクトのBoxフォルダを監視し、新規・更新されたファイルのテキストを事前に抽出しておくバックグラウンドサービス。
+
+BOX_WATCHER_ENABLED=1 のときにアプリ起動時に開始する。uvicorn を複数ワーカーで動かす場合は
+1つのプロセスでのみ有効にすること。監視は watchdog（Linux では inotify）を使い、
+使えない場合や BOX_WATCHER_POLLING=1 のときはポーリングで監視する。
+抽出は優先度を下げた専用のプロセスで1件ずつ行い、利用者のリクエストを妨げない。
+"""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+from database import SessionLocal, Project, UploadedFile
+from extraction_service import sync_folder_files, has_extracted_text, store_extracted_text
+from api.text_extract import extract_pages_timed, record_timing, get_file_type
+
+BOX_WATCHER_ENABLED = os.getenv("BOX_WATCHER_ENABLED", "0") == "1"
+BOX_WATCHER_POLLING = os.getenv("BOX_WATCHER_POLLING", "0") == "1"
+DEBOUNCE_SECONDS = float(os.getenv("BOX_WATCHER_DEBOUNCE_SECONDS", "5"))  # 書き込み中のファイルを避けるための待ち時間
+REFRESH_SECONDS = float(os.getenv("BOX_WATCHER_REFRESH_SECONDS", "60"))  # 監視対象フォルダの再読み込み間隔
+POLLING_INTERVAL_SECONDS = 10
+STOP_TIMEOUT_SECONDS = 10  # 停止時に抽出中のファイルの完了を待つ最大時間
+
+def _lower_priority():
+    """抽出用プロセスの優先度を下げる"""
+    try:
+        if hasattr(os, "nice"):
+            os.nice(10)
+        else:
+            import psutil
+            psutil.Process().nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+    except Exception as e:
+        logging.warning(f"抽出プロセスの優先度を変更できませんでした: {e}")
+
+def _is_ignored(file_path: str) -> bool:
+    # 隠しファイルや Office の一時ファイルは対象外
+    filename = os.path.basename(file_path)
+    return filename.startswith('.') or filename.startswith('~$')
+
+class BoxWatcher:
+    def __init__(self):
+        self._observer = None
+        self._polling_observer = None  # inotify で監視できないフォルダ用
+        self._watches: Dict[str, Tuple[int, tuple]] = {}  # フォルダ → (project_id, (observer, watch))
+        self._pending: Dict[str, Tuple[int, float]] = {}  # ファイルパス → (project_id, 最後にイベントを受けた時刻)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        from watchdog.observers import Observer
+        from watchdog.observers.polling import PollingObserver
+
+        self._pool = ProcessPoolExecutor(max_workers=1, initializer=_lower_priority)
+        if BOX_WATCHER_POLLING:
+            self._observer = PollingObserver(timeout=POLLING_INTERVAL_SECONDS)
+        else:
+            self._observer = Observer()
+        self._observer.start()
+
+        self._thread = threading.Thread(target=self._run, name="box-watcher", daemon=True)
+        self._thread.start()
+        logging.info("Boxフォルダの監視を開始しました。")
+
+    def stop(self):
+        self._stop.set()
+        if self._pool:
+            # 抽出の完了を待っている監視スレッドを止めるため、先に未実行の抽出を取り消す
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        for observer in (self._observer, self._polling_observer):
+            if observer:
+                observer.stop()
+                observer.join()
+        if self._thread:
+            # 実行中の抽出は取り消せないため、長くかかる場合は待たずに終了する（デーモンスレッド）
+            self._thread.join(timeout=STOP_TIMEOUT_SECONDS)
+            if self._thread.is_alive():
+                logging.warning("抽出中のファイルの完了を待たずにBoxフォルダの監視を停止します。")
+        logging.info("Boxフォルダの監視を停止しました。")
+
+    def enqueue(self, project_id: int, file_path: str):
+        """ファイルを抽出待ちに追加する（同じファイルへの連続した変更はまとめて1回にする）"""
+        if _is_ignored(file_path):
+            return
+        with self._lock:
+            self._pending[file_path] = (project_id, time.monotonic())
+
+    def _run(self):
+        next_refresh = 0.0
+        while not self._stop.is_set():
+            if time.monotonic() >= next_refresh:
+                try:
+                    self._refresh_watches()
+                except Exception as e:
+                    logging.error(f"Boxフォルダ一覧の更新に失敗しました: {e}", exc_info=True)
+                next_refresh = time.monotonic() + REFRESH_SECONDS
+
+            item = self._pop_ready()
+            if item is None:
+                self._stop.wait(1)
+                continue
+            file_path, project_id = item
+            try:
+                self._preextract(project_id, file_path)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logging.error(f"事前抽出に失敗しました: {file_path}: {e}")
+
+    def _pop_ready(self) -> Optional[Tuple[str, int]]:
+        now = time.monotonic()
+        with self._lock:
+            for file_path, (project_id, last_event) in self._pending.items():
+                if now - last_event >= DEBOUNCE_SECONDS:
+                    del self._pending[file_path]
+                    return file_path, project_id
+        return None
+
+    def _refresh_watches(self):
+        """DBのプロジェクトとベースディレクトリの設定から監視対象フォルダを更新する"""
+        from api.box import read_config  # api.box からも本モジュールを使うため遅延インポート
+
+        base_directory = read_config().get('box_base_directory', '')
+        folders = {}
+        if base_directory:
+            db = SessionLocal()
+            try:
+                projects = db.query(Project.id, Project.box_folder_path).filter(
+                    Project.box_folder_path.isnot(None),
+                    Project.box_folder_path != ""
+                ).all()
+            finally:
+                db.close()
+            for project in projects:
+                folder = os.path.normpath(os.path.join(base_directory, project.box_folder_path))
+                if os.path.isdir(folder):
+                    folders[folder] = project.id
+
+        for folder in list(self._watches):
+            if folders.get(folder) != self._watches[folder][0]:
+                observer, watch = self._watches.pop(folder)[1]
+                observer.unschedule(watch)
+
+        for folder, project_id in folders.items():
+            if folder in self._watches:
+                continue
+            handler = _FolderEventHandler(self, project_id)
+            try:
+                watch = (self._observer, self._observer.schedule(handler, folder, recursive=False))
+            except OSError as e:
+                # inotify の監視数の上限に達した場合などはポーリングで監視する
+                logging.warning(f"{folder} をポーリングで監視します: {e}")
+                watch = (self._get_polling_observer(), self._get_polling_observer().schedule(handler, folder, recursive=False))
+            self._watches[folder] = (project_id, watch)
+            # 監視開始前に追加・更新されたファイルも対象にする（変わっていなければハッシュ計算も行われない）
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        self.enqueue(project_id, entry.path)
+
+    def _get_polling_observer(self):
+        if self._polling_observer is None:
+            from watchdog.observers.polling import PollingObserver
+
+            self._polling_observer = PollingObserver(timeout=POLLING_INTERVAL_SECONDS)
+            self._polling_observer.start()
+        return self._polling_observer
+
+    def _preextract(self, project_id: int, file_path: str):
+        if not os.path.isfile(file_path):
+            return
+        db = SessionLocal()
+        try:
+            # list-local-files の同期と同じく (project_id, sourcepath) で upsert し、内容が変わっていればハッシュを更新する
+            stat = os.stat(file_path)
+            sync_folder_files(db, project_id, [(file_path, stat.st_size, stat.st_mtime)])
+            db.commit()
+            uploaded_file = db.query(UploadedFile).filter(
+                UploadedFile.project_id == project_id,
+                UploadedFile.sourcepath == file_path
+            ).one()
+            if uploaded_file.processed:
+                return
+            if has_extracted_text(db, uploaded_file.content_hash):
+                uploaded_file.processed = True
+                db.commit()
+                return
+
+            pages, backend, elapsed = self._pool.submit(extract_pages_timed, file_path).result()
+            record_timing(get_file_type(file_path), backend, elapsed, uploaded_file.file_size or 0)
+            store_extracted_text(db, uploaded_file.content_hash, pages)
+            uploaded_file.processed = True
+            db.commit()
+            logging.info(f"事前抽出しました: {file_path}")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+class _FolderEventHandler:
+    """watchdog のイベントハンドラー（ファイルの作成・更新・移動先を抽出待ちに追加する）"""
+
+    def __init__(self, watcher: BoxWatcher, project_id: int):
+        self.watcher = watcher
+        self.project_id = project_id
+
+    def dispatch(self, event):
+        if event.is_directory or event.event_type not in ("created", "modified", "moved", "closed"):
+            return
+        file_path = getattr(event, "dest_path", "") or event.src_path
+        self.watcher.enqueue(self.project_id, file_path)
+
+_watcher: Optional[BoxWatcher] = None
+
+def start():
+    global _watcher
+    if _watcher is None:
+        _watcher = BoxWatcher()
+        _watcher.start()
+
+def stop():
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+
+def enqueue_extraction(project_id: int, file_path: str) -> bool:
+    """監視が有効であればファイルを事前抽出の待ちに追加する"""
+    if _watcher is None:
+        return False
+    _watcher.enqueue(project_id, file_path)
+    return True
@@ -0,0 +1,170 @@
+# src/backend/chat_history_writer.py
+"""
+チャット履歴の書き込みをまとめて行うライトビハインドのバッファ。
+
+/api/chat_history/save は毎回セッションの全メッセージを送ってくるため、受け取ったメッセージを
+（プロジェクト, セッション名, メッセージID）で重複を除いてバッファに溜め、
+CHAT_HISTORY_FLUSH_ROWS 件に達するか CHAT_HISTORY_FLUSH_SECONDS 秒ごとに複数行の INSERT でまとめて書き込む。
+既に保存済みのメッセージは一意制約（uq_chat_history_message）により無視される。
+
+書き込みに失敗した場合、行の内容が原因のエラー（制約違反・型の不一致など）であればバッチを半分ずつに分けて書き込み直し、
+原因の行だけをログに残して破棄する。接続エラーなどの場合は行をバッファに戻して次回再試行するが、
+MAX_FLUSH_ATTEMPTS 回失敗した行は破棄する（1件の不正な行で書き込み全体が止まらないようにする）。
+アプリの終了時（shutdown）には残りをすべて書き込む。
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from database import AsyncSessionLocal, ChatHistory
+
+FLUSH_ROWS = int(os.getenv("CHAT_HISTORY_FLUSH_ROWS", "500"))  # この件数が溜まったらすぐに書き込む
+FLUSH_SECONDS = float(os.getenv("CHAT_HISTORY_FLUSH_SECONDS", "1"))  # 書き込みの最大遅延（秒）
+MAX_BUFFERED_ROWS = int(os.getenv("CHAT_HISTORY_MAX_BUFFERED_ROWS", "20000"))  # これを超えたら保存リクエストを書き込みまで待たせる
+MAX_FLUSH_ATTEMPTS = int(os.getenv("CHAT_HISTORY_MAX_FLUSH_ATTEMPTS", "5"))  # 接続エラーなどで書き込めなかった行を再試行する回数
+
+MessageKey = Tuple[int, str, str]  # (project_id, session_title, message_id)
+
+class ChatHistoryWriter:
+    def __init__(self):
+        self._buffer: Dict[MessageKey, dict] = {}
+        # バッファ内の行を書き込んだときに完了させる Future（書き込みを待つ保存リクエスト用）
+        self._waiters: List[asyncio.Future] = []
+        # 書き込みに失敗した回数（再試行のためにバッファに戻した行のみ）
+        self._attempts: Dict[MessageKey, int] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="chat-history-writer")
+
+    async def stop(self):
+        """バックグラウンドの書き込みを止め、バッファに残っている行をすべて書き込む"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+        if self._buffer:
+            logging.error(f"チャット履歴 {len(self._buffer)} 件を保存できないまま終了します。")
+
+    async def add(self, project_id: int, session_title: str, user_id: str, messages: List[Tuple[str, datetime, str, str]]) -> asyncio.Future:
+        """
+        メッセージ（message_id, timestamp, sender, message）をバッファに追加する。
+        バッファが MAX_BUFFERED_ROWS を超えている場合は書き込みが追いつくまで待つ。
+
+        Returns:
+            asyncio.Future: 追加したメッセージが書き込まれると完了する（失敗した場合は例外が設定される）
+        """
+        for message_id, timestamp, sender, message in messages:
+            self._buffer[(project_id, session_title, message_id)] = {
+                "project_id": project_id,
+                "user_id": user_id,
+                "session_title": session_title,
+                "message_id": message_id,
+                "timestamp": timestamp,
+                "sender": sender,
+                "message": message,
+            }
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        if self._task is None:
+            # バックグラウンドの書き込みが動いていない（起動前・終了後）場合はその場で書き込む
+            await self.flush()
+        elif len(self._buffer) >= FLUSH_ROWS:
+            self._wakeup.set()
+            if len(self._buffer) > MAX_BUFFERED_ROWS:
+                await asyncio.shield(waiter)
+        return waiter
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """バッファの内容を書き込む。書き込めなかった行があった場合は、待っているリクエストに例外を伝える"""
+        async with self._flush_lock:
+            if not self._buffer and not self._waiters:
+                return
+            buffer, self._buffer = self._buffer, {}
+            waiters, self._waiters = self._waiters, []
+            failed, error = await self._write(list(buffer.items())) if buffer else ([], None)
+
+            for key, row in failed:
+                attempts = self._attempts.get(key, 0) + 1
+                if attempts >= MAX_FLUSH_ATTEMPTS:
+                    self._attempts.pop(key, None)
+                    logging.error(f"チャット履歴を {attempts} 回書き込めなかったため破棄します: {key}")
+                    continue
+                self._attempts[key] = attempts
+                # 失敗している間に追加された同じメッセージは新しい内容を優先する
+                self._buffer.setdefault(key, row)
+            for key in buffer:
+                if key not in self._buffer:
+                    self._attempts.pop(key, None)
+
+            for waiter in waiters:
+                if waiter.done():
+                    continue
+                if error is not None:
+                    waiter.set_exception(error)
+                    # 待っていないリクエストの Future で "exception was never retrieved" を出さない
+                    waiter.exception()
+                else:
+                    waiter.set_result(len(buffer))
+
+    async def _write(self, rows: List[Tuple[MessageKey, dict]]) -> Tuple[List[Tuple[MessageKey, dict]], Optional[Exception]]:
+        """
+        rows を書き込み、再試行する行と最後に発生した例外を返す。
+        行の内容が原因のエラーの場合は半分ずつに分けて書き込み直し、原因の1行は再試行せずに破棄する。
+        """
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    insert(ChatHistory).on_conflict_do_nothing(constraint="uq_chat_history_message"),
+                    [row for _key, row in rows]
+                )
+                await db.commit()
+            return [], None
+        except (IntegrityError, DataError) as e:
+            if len(rows) == 1:
+                logging.error(f"チャット履歴を書き込めないため破棄します: {rows[0][0]}: {e}")
+                return [], e
+            half = len(rows) // 2
+            first_failed, first_error = await self._write(rows[:half])
+            second_failed, second_error = await self._write(rows[half:])
+            return first_failed + second_failed, second_error or first_error
+        except Exception as e:
+            logging.error(f"チャット履歴の書き込みに失敗しました（{len(rows)} 件、次回再試行します）: {e}", exc_info=True)
+            return rows, e
+
+_writer: Optional[ChatHistoryWriter] = None
+
+def get_writer() -> ChatHistoryWriter:
+    global _writer
+    if _writer is None:
+        _writer = ChatHistoryWriter()
+    return _writer
+
+def start():
+    get_writer().start()
+
+async def stop():
+    global _writer
+    if _writer is not None:
+        await _writer.stop()
+        _writer = None
@@ -0,0 +1,369 @@
+# src/backend/extraction_service.py
+import os
+import hashlib
+import unicodedata
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, func, cast, literal_column, Text
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert, array, ARRAY
+from database import UploadedFile, ExtractedText, ExtractedPage
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB ずつ読み込んでハッシュを計算
+SNIPPET_CHARS = 120  # 検索結果のスニペットの長さ（文字数）
+
+def compute_content_hash(file_path: str) -> str:
+    """ファイル内容の SHA-256 を返す（全体をメモリに載せない）"""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def refresh_content_hash(uploaded_file: UploadedFile, file_path: str) -> bool:
+    """
+    ファイルのサイズと最終更新時刻が記録と一致すればハッシュ計算を省略し、
+    一致しなければハッシュを再計算して uploaded_file に反映する。
+
+    Returns:
+        bool: ファイル内容（content_hash）が変わった場合は True
+    """
+    stat = os.stat(file_path)
+    if (uploaded_file.content_hash
+            and uploaded_file.file_size == stat.st_size
+            and uploaded_file.file_mtime == stat.st_mtime):
+        return False
+
+    content_hash = compute_content_hash(file_path)
+    changed = content_hash != uploaded_file.content_hash
+    uploaded_file.content_hash = content_hash
+    uploaded_file.file_size = stat.st_size
+    uploaded_file.file_mtime = stat.st_mtime
+    return changed
+
+def get_cached_text(db: Session, content_hash: Optional[str]) -> Optional[str]:
+    """content_hash に対応する抽出済みテキストを返す（未抽出なら None）"""
+    if not content_hash:
+        return None
+    return get_cached_texts(db, [content_hash]).get(content_hash)
+
+def get_cached_texts(db: Session, content_hashes: Iterable[str]) -> Dict[str, str]:
+    """
+    複数の content_hash に対応する抽出済みテキストを1クエリで取得する。
+    全文は保存していないため、ページ単位のテキストをページ順に連結して返す。
+    """
+    content_hashes = [h for h in set(content_hashes) if h]
+    if not content_hashes:
+        return {}
+    rows = db.query(ExtractedText.content_hash, ExtractedPage.text).outerjoin(
+        ExtractedPage, ExtractedPage.content_hash == ExtractedText.content_hash
+    ).filter(
+        ExtractedText.content_hash.in_(content_hashes)
+    ).order_by(ExtractedText.content_hash, ExtractedPage.page_number).all()
+    pages: Dict[str, List[str]] = {}
+    for row in rows:
+        pages.setdefault(row.content_hash, []).append(row.text or '')
+    return {content_hash: "".join(texts) for content_hash, texts in pages.items()}
+
+def store_extracted_text(db: Session, content_hash: str, pages: List[str]):
+    """
+    抽出テキストをページ単位で content_hash に保存する（commit は呼び出し側で行う）。
+    テキストは extracted_pages にだけ保存し（TOAST で圧縮される）、extracted_texts にはサイズとページ数を記録する。
+    同じ内容がすでに保存されていれば何もしない。
+    """
+    store_extracted_pages(db, content_hash, 1, pages)
+    db.execute(
+        insert(ExtractedText)
+        .values(
+            content_hash=content_hash,
+            text_size=sum(len(page.encode('utf-8')) for page in pages),
+            page_count=len(pages)
+        )
+        .on_conflict_do_nothing(index_elements=[ExtractedText.content_hash])
+    )
+
+def store_extracted_pages(db: Session, content_hash: str, start_page: int, pages: List[str]):
+    """start_page から始まる連続したページのテキストを保存する（commit は呼び出し側で行う）"""
+    if not pages:
+        return
+    db.execute(
+        insert(ExtractedPage)
+        .values([
+            {"content_hash": content_hash, "page_number": start_page + i, "text": page}
+            for i, page in enumerate(pages)
+        ])
+        .on_conflict_do_nothing(index_elements=[ExtractedPage.content_hash, ExtractedPage.page_number])
+    )
+
+def finalize_extracted_pages(db: Session, content_hash: str, page_count: int):
+    """
+    ページ単位で保存し終えたテキストを extracted_texts に登録する（commit は呼び出し側で行う）。
+    テキストのサイズはDB側で集計するため、アプリケーションのメモリに全文を載せない。
+    """
+    text_size = db.query(func.coalesce(func.sum(func.octet_length(ExtractedPage.text)), 0)).filter(
+        ExtractedPage.content_hash == content_hash
+    ).scalar()
+    db.execute(
+        insert(ExtractedText)
+        .values(content_hash=content_hash, text_size=text_size, page_count=page_count)
+        .on_conflict_do_nothing(index_elements=[ExtractedText.content_hash])
+    )
+
+def get_page_count(db: Session, content_hash: Optional[str]) -> Optional[int]:
+    """抽出済みのページ数を返す（未抽出なら None）"""
+    if not content_hash:
+        return None
+    row = db.query(ExtractedText.page_count).filter(ExtractedText.content_hash == content_hash).first()
+    if row is None:
+        return None
+    return row.page_count or 0
+
+def get_pages(db: Session, content_hash: str, start_page: int, end_page: int) -> List[dict]:
+    """指定範囲（両端を含む）のページのテキストを返す"""
+    rows = db.query(ExtractedPage.page_number, ExtractedPage.text).filter(
+        ExtractedPage.content_hash == content_hash,
+        ExtractedPage.page_number >= start_page,
+        ExtractedPage.page_number <= end_page
+    ).order_by(ExtractedPage.page_number).all()
+    return [{"page": row.page_number, "text": row.text} for row in rows]
+
+def get_text_size(db: Session, content_hash: Optional[str]) -> Optional[int]:
+    """抽出済みテキストの UTF-8 でのバイト数を返す（未抽出なら None）。全文は読み込まない"""
+    if not content_hash:
+        return None
+    return db.query(ExtractedText.text_size).filter(ExtractedText.content_hash == content_hash).scalar()
+
+def get_text_bytes(db: Session, content_hash: str, start: int, length: int) -> bytes:
+    """
+    抽出済みテキストを UTF-8 にしたときの start バイト目から length バイトを返す。
+    各ページの終了位置をDB側で計算し、範囲にかかるページだけを読み込む。
+    """
+    page_size = func.octet_length(ExtractedPage.text)
+    pages = (
+        select(
+            ExtractedPage.page_number,
+            ExtractedPage.text,
+            page_size.label("size"),
+            func.sum(page_size).over(order_by=ExtractedPage.page_number).label("end_offset"),
+        )
+        .where(ExtractedPage.content_hash == content_hash)
+        .subquery()
+    )
+    rows = db.execute(
+        select(pages.c.text, pages.c.end_offset - pages.c.size)
+        .where(pages.c.end_offset > start, pages.c.end_offset - pages.c.size < start + length)
+        .order_by(pages.c.page_number)
+    ).all()
+    if not rows:
+        return b''
+    data = b''.join((text or '').encode('utf-8') for text, _ in rows)
+    offset = start - int(rows[0][1])
+    return data[offset:offset + length]
+
+def has_extracted_text(db: Session, content_hash: Optional[str]) -> bool:
+    if not content_hash:
+        return False
+    return db.query(ExtractedText.content_hash).filter(ExtractedText.content_hash == content_hash).first() is not None
+
+def sync_content_hash(db: Session, uploaded_file: UploadedFile, file_path: str) -> bool:
+    """
+    uploaded_file の content_hash をファイルの現状に合わせ、processed を更新する。
+
+    Returns:
+        bool: ファイル内容（content_hash）が変わった場合は True
+    """
+    changed = refresh_content_hash(uploaded_file, file_path)
+    if changed:
+        uploaded_file.processed = has_extracted_text(db, uploaded_file.content_hash)
+    return changed
+
+UPSERT_BATCH_SIZE = 1000  # 1回の INSERT に含める行数（パラメータ数の上限を超えないように分割）
+
+def sync_folder_files(db: Session, project_id: int, entries: List[tuple],
+                      content_hashes: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+    """
+    フォルダを走査した結果 entries（(フルパス, サイズ, 最終更新時刻) のリスト）を uploaded_files に反映する。
+    既存の行を1クエリで読み込んでメモリ上で差分を取り、追加・変更分だけを
+    (project_id, sourcepath) への一括 upsert で書き込む（commit は呼び出し側で行う）。
+    サイズと最終更新時刻が記録と一致するファイルはハッシュを計算しない。
+    content_hashes（フルパス → SHA-256）に含まれるファイルは、ハッシュを計算せずにその値を使う。
+
+    Returns:
+        dict: added（新規）, changed（内容が変わった）, unchanged（内容が変わっていない）の件数
+    """
+    paths = [path for path, _, _ in entries]
+    existing = {}
+    for i in range(0, len(paths), UPSERT_BATCH_SIZE):
+        rows = db.query(UploadedFile).filter(
+            UploadedFile.project_id == project_id,
+            UploadedFile.sourcepath.in_(paths[i:i + UPSERT_BATCH_SIZE])
+        ).all()
+        existing.update((row.sourcepath, row) for row in rows)
+
+    counts = {"added": 0, "changed": 0, "unchanged": 0}
+    values = []
+    for path, size, mtime in entries:
+        row = existing.get(path)
+        if row is not None and row.content_hash and row.file_size == size and row.file_mtime == mtime:
+            counts["unchanged"] += 1
+            continue
+
+        content_hash = (content_hashes or {}).get(path) or compute_content_hash(path)
+        if row is None:
+            counts["added"] += 1
+        elif content_hash != row.content_hash:
+            counts["changed"] += 1
+        else:
+            # 更新時刻だけが変わった場合は記録を更新するのみ
+            counts["unchanged"] += 1
+
+        values.append({
+            "sourcename": os.path.basename(path),
+            "sourcepath": path,
+            "project_id": project_id,
+            "creation_date": datetime.fromtimestamp(mtime),  # 初回登録時のみ使われる
+            "processed": row.processed if row is not None and content_hash == row.content_hash else None,
+            "file_size": size,
+            "file_mtime": mtime,
+            "content_hash": content_hash,
+        })
+
+    if not values:
+        return counts
+
+    # 内容が変わった（または新規の）ファイルの処理状態は、同じ内容の抽出済みテキストがあるかで決める
+    unknown_hashes = [v["content_hash"] for v in values if v["processed"] is None]
+    extracted = set()
+    for i in range(0, len(unknown_hashes), UPSERT_BATCH_SIZE):
+        extracted.update(db.scalars(
+            select(ExtractedText.content_hash)
+            .where(ExtractedText.content_hash.in_(unknown_hashes[i:i + UPSERT_BATCH_SIZE]))
+        ))
+    for v in values:
+        if v["processed"] is None:
+            v["processed"] = v["content_hash"] in extracted
+
+    for i in range(0, len(values), UPSERT_BATCH_SIZE):
+        stmt = insert(UploadedFile).values(values[i:i + UPSERT_BATCH_SIZE])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[UploadedFile.project_id, UploadedFile.sourcepath],
+            set_={
+                "processed": stmt.excluded.processed,
+                "file_size": stmt.excluded.file_size,
+                "file_mtime": stmt.excluded.file_mtime,
+                "content_hash": stmt.excluded.content_hash,
+            }
+        ))
+    return counts
+
+def normalize_search_text(text: str) -> str:
+    """検索用の正規化（DB の text_bigrams 関数と同じく NFKC 正規化して小文字にする）"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+def parse_search_query(query: str) -> Tuple[List[str], List[str]]:
+    """
+    検索文字列を正規化して空白で分け、(検索語, 検索語のバイグラム) を返す。
+    候補はバイグラムの GIN インデックスで絞り込むため、2文字以上の語が1つもない場合は ValueError を送出する
+    （1文字の語だけでは全件を走査することになる）。1文字の語は、他の語で絞り込んだ候補の照合にだけ使う。
+    """
+    terms = [term for term in normalize_search_text(query).split() if term]
+    if not terms:
+        raise ValueError("検索語を入力してください。")
+    bigrams = sorted({term[i:i + 2] for term in terms for i in range(len(term) - 1)})
+    if not bigrams:
+        raise ValueError("検索語は2文字以上で入力してください。")
+    return terms, bigrams
+
+def _make_snippet(text: str, terms: List[str]) -> str:
+    """最初に見つかった検索語の前後を切り出す"""
+    for source in (text, normalize_search_text(text)):
+        lowered = source.lower()
+        for term in terms:
+            pos = lowered.find(term)
+            if pos >= 0:
+                start = max(pos - (SNIPPET_CHARS - len(term)) // 2, 0)
+                snippet = source[start:start + SNIPPET_CHARS].replace("\n", " ")
+                return ("…" if start > 0 else "") + snippet + ("…" if start + SNIPPET_CHARS < len(source) else "")
+    return text[:SNIPPET_CHARS].replace("\n", " ")
+
+def make_highlighted_snippet(text: str, terms: List[str]) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    _make_snippet と同じようにスニペットを切り出し、スニペット内の検索語の位置を (開始, 終了) の一覧で返す。
+    位置は文字単位で、表示側で強調表示に使う（HTML は組み立てない）。
+    """
+    snippet = _make_snippet(text, terms)
+    # 小文字にしたものと NFKC 正規化したもので探す（正規化で文字数が変わる場合は位置がずれるため使わない）
+    sources = [source for source in (snippet.lower(), normalize_search_text(snippet)) if len(source) == len(snippet)]
+    highlights = []
+    for term in terms:
+        for source in sources:
+            pos = source.find(term)
+            while pos >= 0:
+                highlights.append((pos, pos + len(term)))
+                pos = source.find(term, pos + len(term))
+    # 重なっている範囲をまとめる
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(highlights):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return snippet, merged
+
+def search_pages(db: Session, project_id: int, query: str, limit: int = 20) -> List[dict]:
+    """
+    プロジェクトのファイルの抽出済みテキストをページ単位で全文検索する。
+    空白区切りの語をすべて含むページを、語の出現回数の多い順に返す。
+    text_bigrams のバイグラム GIN インデックスで候補を絞り込んでから照合する（検索語の条件は parse_search_query を参照）。
+    """
+    terms, bigrams = parse_search_query(query)
+
+    project_hashes = select(UploadedFile.content_hash).where(
+        UploadedFile.project_id == project_id,
+        UploadedFile.content_hash.isnot(None)
+    )
+    candidates = select(
+        ExtractedPage.content_hash,
+        ExtractedPage.page_number,
+        ExtractedPage.text,
+        func.lower(func.normalize(ExtractedPage.text, literal_column("NFKC"))).label("normalized"),
+    ).where(
+        ExtractedPage.content_hash.in_(project_hashes),
+        # インデックスの式（text_bigrams(text)）と同じ形で条件を書く
+        func.text_bigrams(ExtractedPage.text).op("@>")(cast(array(bigrams), ARRAY(Text)))
+    ).subquery()
+
+    score = sum(
+        (func.length(candidates.c.normalized) - func.length(func.replace(candidates.c.normalized, term, "")))
+        / len(term)
+        for term in terms
+    )
+    rows = db.execute(
+        select(candidates.c.content_hash, candidates.c.page_number, candidates.c.text, score.label("score"))
+        .where(*[func.strpos(candidates.c.normalized, term) > 0 for term in terms])
+        .order_by(score.desc(), candidates.c.content_hash, candidates.c.page_number)
+        .limit(limit)
+    ).all()
+    if not rows:
+        return []
+
+    # 同じ内容のファイルがプロジェクト内に複数ある場合はそれぞれを結果に含める
+    files_by_hash: Dict[str, List] = {}
+    for file in db.query(UploadedFile.id, UploadedFile.sourcename, UploadedFile.content_hash).filter(
+        UploadedFile.project_id == project_id,
+        UploadedFile.content_hash.in_({row.content_hash for row in rows})
+    ):
+        files_by_hash.setdefault(file.content_hash, []).append(file)
+
+    results = []
+    for row in rows:
+        snippet = _make_snippet(row.text or "", terms)
+        for file in files_by_hash.get(row.content_hash, []):
+            results.append({
+                "file_id": file.id,
+                "filename": file.sourcename,
+                "page": row.page_number,
+                "score": int(row.score),
+                "snippet": snippet,
+            })
+    return results
@@ -3,6 +3,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api import proposals, solutions, ai, project_tasks, projects, chat, chat_history, slack, box, files, notes, mask, task, news
 from dotenv import load_dotenv
+import box_watcher
+import chat_history_writer
+import table_cache
+from database import async_engine
 
 # .env ファイルの読み込み
 load_dotenv()
@@ -34,6 +38,39 @@ app.include_router(mask.router, prefix="/api/mask", tags=["Mask"])
 app.include_router(task.router, prefix="/api/task", tags=["Task"])
 app.include_router(news.router, prefix="/api/news", tags=["news"])
 
+# Boxフォルダの監視（BOX_WATCHER_ENABLED=1 の場合のみ）
+@app.on_event("startup")
+def start_box_watcher():
+    if box_watcher.BOX_WATCHER_ENABLED:
+        box_watcher.start()
+
+@app.on_event("shutdown")
+def stop_box_watcher():
+    box_watcher.stop()
+
+# チャット履歴の書き込みバッファ（終了時に残りを書き込んでからコネクションプールを閉じる）
+@app.on_event("startup")
+async def start_chat_history_writer():
+    chat_history_writer.start()
+
+@app.on_event("shutdown")
+async def stop_chat_history_writer():
+    await chat_history_writer.stop()
+
+# projects・solutions の読み取りキャッシュ（DBの変更通知を LISTEN してキャッシュを破棄する）
+@app.on_event("startup")
+async def start_table_cache():
+    table_cache.start()
+
+@app.on_event("shutdown")
+async def stop_table_cache():
+    await table_cache.stop()
+
+# 非同期エンジンのコネクションプールを閉じる
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
+
 @app.get("/")
 def root():
     return {"message": "Backend is running"}
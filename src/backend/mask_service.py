@@ -0,0 +1,156 @@
+# src/backend/mask_service.py
+import os
+import re
+import hashlib
+import logging
+import threading
+import torch
+from cachetools import LRUCache
+from transformers import AutoModelForCausalLM, AutoTokenizer
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# マスキングモデルの配置先（環境変数で上書き可能）
+MODEL_PATH = os.getenv(
+    "MASK_MODEL_PATH",
+    "C:\\Users\\toshimitsu_fujiki\\.vscode\\AIDEA\\src\\backend\\model\\japanese-gpt-1b-PII-masking",
+)
+
+# 推論バックエンドの選択
+#   fp32: 従来どおり AutoModelForCausalLM をそのまま使用（GPUがあればGPU）
+#   int8: torch の動的量子化（Linear層をint8化）でCPU推論を高速化
+#   onnx: ONNX Runtime にエクスポートしたモデルで推論（optimum が必要）
+MASK_BACKENDS = ("fp32", "int8", "onnx")
+MASK_BACKEND = os.getenv("MASK_BACKEND", "fp32").lower()
+
+# ONNXエクスポート結果の保存先（初回のみエクスポートし、以降は再利用）
+ONNX_MODEL_PATH = os.getenv("MASK_ONNX_MODEL_PATH", MODEL_PATH + "-onnx")
+
+# 段落単位のマスキング結果キャッシュ（段落本文のハッシュ → マスキング結果）
+MASK_CACHE_SIZE = int(os.getenv("MASK_CACHE_SIZE", "10000"))
+_PARAGRAPH_SEPARATOR = re.compile(r"(\n[ \t\u3000]*\n)")
+
+INSTRUCTION = "# タスク\n入力文中の個人情報をマスキングせよ\n\n# 入力文\n"
+MAX_NEW_TOKENS = 256
+
+def preprocess(text):
+    return text.replace("\n", "<LB>")
+
+def postprocess(text):
+    return text.replace("<LB>", "\n")
+
+def _load_fp32_model():
+    model = AutoModelForCausalLM.from_pretrained(MODEL_PATH)
+    if torch.cuda.is_available():
+        model = model.to("cuda")
+    return model
+
+def _load_int8_model():
+    """
+    Linear層を int8 に動的量子化したモデルを返す（CPU専用）。
+    """
+    model = AutoModelForCausalLM.from_pretrained(MODEL_PATH, torch_dtype=torch.float32)
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def _load_onnx_model():
+    """
+    ONNX Runtime 版のモデルを返す。エクスポート済みでなければ初回にエクスポートして保存する。
+    """
+    # optimum/onnxruntime は onnx バックエンド利用時のみ必要
+    from optimum.onnxruntime import ORTModelForCausalLM
+
+    if os.path.isdir(ONNX_MODEL_PATH):
+        return ORTModelForCausalLM.from_pretrained(ONNX_MODEL_PATH)
+
+    logging.info(f"ONNXモデルをエクスポートします: {ONNX_MODEL_PATH}")
+    model = ORTModelForCausalLM.from_pretrained(MODEL_PATH, export=True)
+    model.save_pretrained(ONNX_MODEL_PATH)
+    return model
+
+_MODEL_LOADERS = {
+    "fp32": _load_fp32_model,
+    "int8": _load_int8_model,
+    "onnx": _load_onnx_model,
+}
+
+def load_model(backend: str):
+    """
+    指定されたバックエンドのマスキングモデルを読み込む。
+    """
+    if backend not in _MODEL_LOADERS:
+        raise ValueError(f"指定されたマスキングバックエンド '{backend}' は無効です。({', '.join(MASK_BACKENDS)})")
+    logging.info(f"マスキングモデルを読み込み中... (backend={backend})")
+    return _MODEL_LOADERS[backend]()
+
+tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+model = load_model(MASK_BACKEND)
+
+def generate_masked_text(text: str, mask_model=None) -> str:
+    """
+    入力文中の個人情報をマスキングしたテキストを返す。
+    mask_model を省略した場合は設定されたバックエンドのモデルを使用する。
+    """
+    mask_model = mask_model or model
+    input_text = INSTRUCTION + text
+    input_text += tokenizer.eos_token
+    input_text = preprocess(input_text)
+    with torch.no_grad():
+        token_ids = tokenizer.encode(input_text, add_special_tokens=False, return_tensors="pt")
+        output_ids = mask_model.generate(
+            token_ids.to(mask_model.device),
+            max_new_tokens=MAX_NEW_TOKENS,
+            pad_token_id=tokenizer.pad_token_id,
+            eos_token_id=tokenizer.eos_token_id,
+        )
+        output = tokenizer.decode(output_ids.tolist()[0][token_ids.size(1):], skip_special_tokens=True)
+    return postprocess(output)
+
+_paragraph_cache = LRUCache(maxsize=MASK_CACHE_SIZE)
+_paragraph_cache_lock = threading.Lock()
+
+def _paragraph_key(paragraph: str) -> str:
+    # バックエンドが変われば出力も変わりうるため、キーに含める
+    return hashlib.sha256(f"{MASK_BACKEND}\0{paragraph}".encode("utf-8")).hexdigest()
+
+def mask_text_incremental(text: str) -> dict:
+    """
+    テキストを空行で段落に分割し、キャッシュにない（新規・変更された）段落だけをモデルに渡してマスキングする。
+    段落間の区切りはそのまま保持して結合する。
+
+    Returns:
+        dict: masked_text と再利用状況（段落数・文字数）
+    """
+    parts = _PARAGRAPH_SEPARATOR.split(text)
+    masked_parts = []
+    total_paragraphs = reused_paragraphs = 0
+    total_chars = reused_chars = 0
+
+    # split の結果は [段落, 区切り, 段落, 区切り, ...] の順に並ぶ
+    for i, part in enumerate(parts):
+        if i % 2 == 1 or not part.strip():
+            masked_parts.append(part)
+            continue
+
+        total_paragraphs += 1
+        total_chars += len(part)
+        key = _paragraph_key(part)
+        with _paragraph_cache_lock:
+            masked = _paragraph_cache.get(key)
+        if masked is not None:
+            reused_paragraphs += 1
+            reused_chars += len(part)
+        else:
+            masked = generate_masked_text(part)
+            with _paragraph_cache_lock:
+                _paragraph_cache[key] = masked
+        masked_parts.append(masked)
+
+    return {
+        "masked_text": "".join(masked_parts),
+        "total_paragraphs": total_paragraphs,
+        "reused_paragraphs": reused_paragraphs,
+        "total_chars": total_chars,
+        "reused_chars": reused_chars,
+    }
@@ -0,0 +1,27 @@
+"""Bigram full-text index on chat_history.message
+
+Revision ID: a4e3b5c6d7f8
+Revises: f3d2a4b5c6e7
+Create Date: 2025-03-26 11:02:38.946150
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e3b5c6d7f8'
+down_revision: Union[str, None] = 'f3d2a4b5c6e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # text_bigrams は e6c4f5a7b8d9 で作成した関数（ファイルの全文検索と同じ正規化・バイグラム）
+    op.execute("CREATE INDEX ix_chat_history_message_bigrams ON chat_history USING gin (text_bigrams(message))")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_chat_history_message_bigrams")
@@ -0,0 +1,39 @@
+"""Content-hash keyed extraction cache
+
+Revision ID: b3f1c2d4e5a6
+Revises: a70171aeeb02
+Create Date: 2025-03-03 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1c2d4e5a6'
+down_revision: Union[str, None] = 'a70171aeeb02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('extracted_texts',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('content_hash')
+    )
+    op.add_column('uploaded_files', sa.Column('file_size', sa.BigInteger(), nullable=True))
+    op.add_column('uploaded_files', sa.Column('file_mtime', sa.Float(), nullable=True))
+    op.add_column('uploaded_files', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_uploaded_files_content_hash'), 'uploaded_files', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_uploaded_files_content_hash'), table_name='uploaded_files')
+    op.drop_column('uploaded_files', 'content_hash')
+    op.drop_column('uploaded_files', 'file_mtime')
+    op.drop_column('uploaded_files', 'file_size')
+    op.drop_table('extracted_texts')
@@ -0,0 +1,39 @@
+"""Add message_id to chat_history and unique (project_id, session_title, message_id)
+
+Revision ID: b9f8c0d1e2a3
+Revises: a8e7b9c0d1f2
+Create Date: 2025-03-17 14:48:33.160527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9f8c0d1e2a3'
+down_revision: Union[str, None] = 'a8e7b9c0d1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 重複の判定はクライアントがメッセージごとに採番する message_id で行う。
+    # 既存の行は保存時刻が同じでも別のメッセージの場合があり、再保存による重複とも区別できないため削除せず、
+    # それぞれに新しい ID を振る
+    op.add_column('chat_history', sa.Column('message_id', sa.String(length=36), nullable=True))
+    op.execute("UPDATE chat_history SET message_id = gen_random_uuid()::text")
+    op.alter_column('chat_history', 'message_id', nullable=False)
+    op.create_unique_constraint(
+        'uq_chat_history_message', 'chat_history', ['project_id', 'session_title', 'message_id']
+    )
+    op.create_index(
+        'ix_chat_history_session_timestamp', 'chat_history', ['project_id', 'session_title', 'timestamp'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chat_history_session_timestamp', table_name='chat_history')
+    op.drop_constraint('uq_chat_history_message', 'chat_history', type_='unique')
+    op.drop_column('chat_history', 'message_id')
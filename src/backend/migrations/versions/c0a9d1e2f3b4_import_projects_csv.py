@@ -0,0 +1,74 @@
+"""Import data/projects.csv into projects
+
+Revision ID: c0a9d1e2f3b4
+Revises: b9f8c0d1e2a3
+Create Date: 2025-03-19 10:07:41.592836
+
+"""
+from typing import Sequence, Union
+import csv
+import os
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c0a9d1e2f3b4'
+down_revision: Union[str, None] = 'b9f8c0d1e2a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PROJECTS_CSV = os.getenv(
+    "PROJECTS_CSV", os.path.join(os.path.dirname(__file__), '../../../../data/projects.csv')
+)
+
+# 業務フロー・要件・Slack・Boxの連携は projects.csv にだけ保存されていた
+CSV_ONLY_COLUMNS = ('bpmn_xml', 'solution_requirements', 'slack_channel_id', 'slack_tag', 'box_folder_path')
+
+
+def _parse_schedule(value: str):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def upgrade() -> None:
+    if not os.path.exists(PROJECTS_CSV):
+        return
+    with open(PROJECTS_CSV, newline='', encoding='utf-8') as f:
+        rows = [row for row in csv.DictReader(f) if (row.get('id') or '').strip()]
+    if not rows:
+        return
+
+    connection = op.get_bind()
+    params = [{
+        'id': int(row['id']),
+        'customer_name': row.get('customer_name') or None,
+        'issues': row.get('issues') or None,
+        'is_archived': (row.get('is_archived') or '').strip().lower() == 'true',
+        'stage': row.get('stage') or '営業',
+        'category': row.get('category') or 'プロジェクト',
+        'schedule': _parse_schedule(row.get('schedule') or ''),
+        **{column: row.get(column) or '' for column in CSV_ONLY_COLUMNS},
+    } for row in rows]
+
+    # DBにないプロジェクトは追加し、既存のプロジェクトは CSV にだけある列のうちDB側が空のものを埋める
+    connection.execute(sa.text(f"""
+        INSERT INTO projects (id, user_id, customer_name, issues, is_archived, stage, category, schedule, {', '.join(CSV_ONLY_COLUMNS)})
+        VALUES (:id, 'user_888', :customer_name, :issues, :is_archived, :stage, :category, :schedule,
+                {', '.join(':' + column for column in CSV_ONLY_COLUMNS)})
+        ON CONFLICT (id) DO UPDATE SET
+            {', '.join(f"{column} = coalesce(nullif(projects.{column}, ''), excluded.{column})" for column in CSV_ONLY_COLUMNS)}
+    """), params)
+    # 取り込んだIDより後から採番されるようにする
+    connection.execute(sa.text(
+        "SELECT setval(pg_get_serial_sequence('projects', 'id'), (SELECT coalesce(max(id), 1) FROM projects))"
+    ))
+
+
+def downgrade() -> None:
+    # 取り込んだデータはそのまま残す（projects.csv は変更していない）
+    pass
@@ -0,0 +1,33 @@
+"""Per-page extracted text
+
+Revision ID: c4a2d3e5f6b7
+Revises: b3f1c2d4e5a6
+Create Date: 2025-03-05 14:40:07.918233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a2d3e5f6b7'
+down_revision: Union[str, None] = 'b3f1c2d4e5a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('extracted_pages',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('page_number', sa.Integer(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('content_hash', 'page_number')
+    )
+    op.add_column('extracted_texts', sa.Column('page_count', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('extracted_texts', 'page_count')
+    op.drop_table('extracted_pages')
@@ -0,0 +1,65 @@
+"""Notes table (replaces data/notes.csv)
+
+Revision ID: d1b0e2f3a4c5
+Revises: c0a9d1e2f3b4
+Create Date: 2025-03-19 15:26:08.314772
+
+"""
+from typing import Sequence, Union
+import csv
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1b0e2f3a4c5'
+down_revision: Union[str, None] = 'c0a9d1e2f3b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOTES_CSV = os.getenv(
+    "NOTES_CSV", os.path.join(os.path.dirname(__file__), '../../../../data/notes.csv')
+)
+
+
+def _parse_project_id(value: str):
+    # pandas で保存された CSV では "1.0" のように書かれている場合がある
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def upgrade() -> None:
+    op.create_table('notes',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('concept_text', sa.Text(), nullable=False, server_default=''),
+    sa.Column('design_notes', sa.Text(), nullable=False, server_default=''),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+
+    # notes.csv のメモを取り込む（同じプロジェクトの行が複数ある場合は後の行を優先する）
+    if not os.path.exists(NOTES_CSV):
+        return
+    notes = {}
+    with open(NOTES_CSV, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            project_id = _parse_project_id(row.get('project_id'))
+            if project_id is not None:
+                notes[project_id] = {
+                    'project_id': project_id,
+                    'concept_text': row.get('concept_text') or '',
+                    'design_notes': row.get('design_notes') or '',
+                }
+    if notes:
+        op.get_bind().execute(sa.text(
+            "INSERT INTO notes (project_id, concept_text, design_notes, updated_at) "
+            "VALUES (:project_id, :concept_text, :design_notes, now() AT TIME ZONE 'utc')"
+        ), list(notes.values()))
+
+
+def downgrade() -> None:
+    op.drop_table('notes')
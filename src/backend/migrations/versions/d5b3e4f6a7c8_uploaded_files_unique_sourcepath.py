@@ -0,0 +1,31 @@
+"""Unique (project_id, sourcepath) on uploaded_files
+
+Revision ID: d5b3e4f6a7c8
+Revises: c4a2d3e5f6b7
+Create Date: 2025-03-07 10:12:45.301847
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b3e4f6a7c8'
+down_revision: Union[str, None] = 'c4a2d3e5f6b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 同じファイルが重複して登録されている場合は最初に登録された行だけを残す
+    op.execute(
+        "DELETE FROM uploaded_files a USING uploaded_files b "
+        "WHERE a.project_id = b.project_id AND a.sourcepath = b.sourcepath AND a.id > b.id"
+    )
+    op.create_unique_constraint('uq_uploaded_files_project_sourcepath', 'uploaded_files', ['project_id', 'sourcepath'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_uploaded_files_project_sourcepath', 'uploaded_files', type_='unique')
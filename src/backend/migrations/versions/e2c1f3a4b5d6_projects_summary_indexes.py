@@ -0,0 +1,42 @@
+"""Indexes for the projects summary list
+
+Revision ID: e2c1f3a4b5d6
+Revises: d1b0e2f3a4c5
+Create Date: 2025-03-21 09:44:17.820315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c1f3a4b5d6'
+down_revision: Union[str, None] = 'd1b0e2f3a4c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # is_archived の絞り込みでインデックスを使えるよう、NULL はアーカイブされていないものとして埋める
+    op.execute("UPDATE projects SET is_archived = false WHERE is_archived IS NULL")
+    op.alter_column('projects', 'is_archived', existing_type=sa.Boolean(), nullable=False, server_default=sa.false())
+
+    op.create_index('ix_projects_is_archived_id', 'projects', ['is_archived', 'id'], unique=False)
+    op.create_index('ix_projects_stage_id', 'projects', ['stage', 'id'], unique=False)
+    op.create_index('ix_projects_category_id', 'projects', ['category', 'id'], unique=False)
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'ix_projects_customer_name_trgm', 'projects', ['customer_name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'customer_name': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_projects_customer_name_trgm', table_name='projects')
+    op.drop_index('ix_projects_category_id', table_name='projects')
+    op.drop_index('ix_projects_stage_id', table_name='projects')
+    op.drop_index('ix_projects_is_archived_id', table_name='projects')
+    op.alter_column('projects', 'is_archived', existing_type=sa.Boolean(), nullable=True, server_default=None)
@@ -0,0 +1,49 @@
+"""Bigram full-text index on extracted_pages
+
+Revision ID: e6c4f5a7b8d9
+Revises: d5b3e4f6a7c8
+Create Date: 2025-03-10 09:31:52.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c4f5a7b8d9'
+down_revision: Union[str, None] = 'd5b3e4f6a7c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # テキストを NFKC 正規化・小文字化し、空白を含まない2文字の組（バイグラム）の配列にする。
+    # 形態素解析を使わずに日本語を検索できるよう、この配列に GIN インデックスを張る。
+    op.execute(r"""
+        CREATE OR REPLACE FUNCTION text_bigrams(t text) RETURNS text[]
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT coalesce(array_agg(DISTINCT bigram), '{}')
+            FROM (
+                SELECT substr(s.n, i, 2) AS bigram
+                FROM (SELECT lower(normalize(t, NFKC)) AS n) s,
+                     generate_series(1, length(s.n) - 1) AS i
+            ) b
+            WHERE bigram !~ '\s'
+        $$
+    """)
+    # ページ単位で保存されていないテキストは全文を1ページ目として保存し、検索対象にする
+    op.execute("""
+        INSERT INTO extracted_pages (content_hash, page_number, text)
+        SELECT t.content_hash, 1, t.text
+        FROM extracted_texts t
+        WHERE NOT EXISTS (SELECT 1 FROM extracted_pages p WHERE p.content_hash = t.content_hash)
+    """)
+    op.execute("UPDATE extracted_texts SET page_count = 1 WHERE page_count IS NULL")
+    op.execute("CREATE INDEX ix_extracted_pages_bigrams ON extracted_pages USING gin (text_bigrams(text))")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_extracted_pages_bigrams")
+    op.execute("DROP FUNCTION IF EXISTS text_bigrams(text)")
@@ -0,0 +1,44 @@
+"""Notify table_cache listeners when projects or solutions change
+
+Revision ID: f3d2a4b5c6e7
+Revises: e2c1f3a4b5d6
+Create Date: 2025-03-24 13:19:55.027461
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3d2a4b5c6e7'
+down_revision: Union[str, None] = 'e2c1f3a4b5d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CACHED_TABLES = ('projects', 'solutions')
+
+
+def upgrade() -> None:
+    # 変更したテーブル名を table_cache チャンネルに通知する（通知はコミット時に送られ、同じトランザクション内では1回にまとめられる）
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_table_cache() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_notify('table_cache', TG_TABLE_NAME);
+            RETURN NULL;
+        END
+        $$
+    """)
+    for table in CACHED_TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_notify_table_cache AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION notify_table_cache()"
+        )
+
+
+def downgrade() -> None:
+    for table in CACHED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_notify_table_cache ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS notify_table_cache()")
@@ -0,0 +1,125 @@
+"""Keep extracted text only in extracted_pages and move legacy processed_text
+
+Revision ID: f7d6a8b9c0e1
+Revises: e6c4f5a7b8d9
+Create Date: 2025-03-12 16:05:21.774390
+
+"""
+from typing import Sequence, Union
+from datetime import datetime
+import hashlib
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7d6a8b9c0e1'
+down_revision: Union[str, None] = 'e6c4f5a7b8d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 200
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _compute_content_hash(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _store_single_page(connection, content_hash: str, text: str) -> None:
+    connection.execute(sa.text(
+        "INSERT INTO extracted_pages (content_hash, page_number, text) VALUES (:content_hash, 1, :text) "
+        "ON CONFLICT DO NOTHING"
+    ), {"content_hash": content_hash, "text": text})
+    connection.execute(sa.text(
+        "INSERT INTO extracted_texts (content_hash, text_size, page_count, created_at) "
+        "VALUES (:content_hash, :text_size, 1, now()) ON CONFLICT DO NOTHING"
+    ), {"content_hash": content_hash, "text_size": len(text.encode('utf-8'))})
+
+
+def _move_legacy_processed_texts(connection) -> None:
+    """
+    content_hash 導入前に抽出した uploaded_files.processed_text を content_hash のキャッシュへ移す。
+    抽出後にファイルが更新されている場合は移さずに未処理に戻す（次回の抽出で作り直す）。
+    sourcepath のファイルが存在しない行（Slack スレッドの内容など）は変更しない。
+    """
+    last_id = 0
+    while True:
+        rows = connection.execute(sa.text(
+            "SELECT id, sourcepath, creation_date, processed_text FROM uploaded_files "
+            "WHERE id > :last_id AND content_hash IS NULL AND processed AND processed_text IS NOT NULL "
+            "ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": BATCH_SIZE}).all()
+        if not rows:
+            break
+        for file_id, sourcepath, creation_date, processed_text in rows:
+            if not sourcepath or not os.path.isfile(sourcepath):
+                continue
+            stat = os.stat(sourcepath)
+            if creation_date is None or creation_date < datetime.fromtimestamp(stat.st_mtime):
+                connection.execute(sa.text(
+                    "UPDATE uploaded_files SET processed = false, processed_text = NULL WHERE id = :id"
+                ), {"id": file_id})
+                continue
+            content_hash = _compute_content_hash(sourcepath)
+            _store_single_page(connection, content_hash, processed_text)
+            connection.execute(sa.text(
+                "UPDATE uploaded_files SET content_hash = :content_hash, file_size = :file_size, "
+                "file_mtime = :file_mtime, processed_text = NULL WHERE id = :id"
+            ), {"id": file_id, "content_hash": content_hash, "file_size": stat.st_size, "file_mtime": stat.st_mtime})
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    op.add_column('extracted_texts', sa.Column('text_size', sa.BigInteger(), nullable=True))
+
+    # ページ単位で保存されていない（pages を指定せずに保存した）全文は1ページ目として extracted_pages に移す
+    op.execute(
+        "UPDATE extracted_texts t SET page_count = 1 "
+        "WHERE NOT EXISTS (SELECT 1 FROM extracted_pages p WHERE p.content_hash = t.content_hash)"
+    )
+    op.execute(
+        "INSERT INTO extracted_pages (content_hash, page_number, text) "
+        "SELECT t.content_hash, 1, coalesce(t.text, '') FROM extracted_texts t "
+        "WHERE NOT EXISTS (SELECT 1 FROM extracted_pages p WHERE p.content_hash = t.content_hash)"
+    )
+    op.execute(
+        "UPDATE extracted_texts t SET text_size = coalesce("
+        "(SELECT sum(octet_length(p.text)) FROM extracted_pages p WHERE p.content_hash = t.content_hash), 0)"
+    )
+    # テキストは extracted_pages にだけ保存し、全文はページを連結して組み立てる
+    op.drop_column('extracted_texts', 'text')
+
+    _move_legacy_processed_texts(op.get_bind())
+
+    # ページ単位のテキストは検索・範囲取得でDB側の関数を使うため、Postgres の TOAST 圧縮に任せる。
+    # lz4 が使える場合（PostgreSQL 14 以降で lz4 付きでビルドされている場合）は pglz より高速な lz4 にする
+    op.execute("""
+        DO $$
+        BEGIN
+            IF current_setting('server_version_num')::int >= 140000 THEN
+                EXECUTE 'ALTER TABLE extracted_pages ALTER COLUMN text SET COMPRESSION lz4';
+            END IF;
+        EXCEPTION WHEN OTHERS THEN
+            RAISE NOTICE 'lz4 compression is not available: %', SQLERRM;
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    # uploaded_files.processed_text への移し替えと、1ページ目として移したページは戻さない
+    # （content_hash のキャッシュとしてそのまま使える）
+    op.add_column('extracted_texts', sa.Column('text', sa.Text(), nullable=True))
+    op.execute(
+        "UPDATE extracted_texts t SET text = p.text FROM ("
+        "SELECT content_hash, string_agg(text, '' ORDER BY page_number) AS text "
+        "FROM extracted_pages GROUP BY content_hash) p WHERE p.content_hash = t.content_hash"
+    )
+    op.drop_column('extracted_texts', 'text_size')
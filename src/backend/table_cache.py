@@ -0,0 +1,129 @@
+# src/backend/table_cache.py
+"""
+変更の少ないテーブル（projects・solutions）の読み取り結果をプロセス内にキャッシュする。
+
+キャッシュにはレスポンスの JSON（バイト列）と、その内容から計算した ETag を保存する。
+ETag が内容から決まるため、uvicorn のどのワーカーが返しても同じ値になり、If-None-Match に 304 を返せる。
+
+テーブルが変更されると、DBのトリガー（マイグレーション f3d2a4b5c6e7）が pg_notify で TABLE_CACHE_CHANNEL に
+テーブル名を通知する。各ワーカーはこのチャンネルを LISTEN し、通知を受けたテーブルのキャッシュを破棄する。
+LISTEN の接続が切れている間は通知を受け取れないため、キャッシュを使わずに毎回DBから読み込む。
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import asyncpg
+from fastapi import Request, Response
+from database import SQLALCHEMY_DATABASE_URL
+
+TABLE_CACHE_ENABLED = os.getenv("TABLE_CACHE_ENABLED", "1") == "1"
+TABLE_CACHE_CHANNEL = "table_cache"
+MAX_ENTRIES_PER_TABLE = 256  # 絞り込み条件ごとのキャッシュの上限（古いものから破棄する）
+RECONNECT_SECONDS = 5  # 接続の確認・再接続の間隔（秒）
+
+CacheEntry = Tuple[bytes, str]  # (JSON, ETag)
+
+class TableCache:
+    def __init__(self):
+        self._entries: Dict[str, "OrderedDict[Hashable, CacheEntry]"] = {}
+        # テーブルごとの世代。読み込み中に変更の通知を受けた場合は、その結果をキャッシュしない
+        self._versions: Dict[str, int] = {}
+        self._listening = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(), name="table-cache-listener")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._listening = False
+        self.clear()
+
+    def invalidate(self, table: str):
+        self._versions[table] = self._versions.get(table, 0) + 1
+        self._entries.pop(table, None)
+
+    def clear(self):
+        for table in set(self._entries) | set(self._versions):
+            self.invalidate(table)
+
+    async def get(self, table: str, key: Hashable, load: Callable[[], Awaitable[bytes]]) -> CacheEntry:
+        """キャッシュがあればそれを返し、なければ load() でJSONを作ってキャッシュする"""
+        if self._listening:
+            entries = self._entries.get(table)
+            if entries is not None and key in entries:
+                entries.move_to_end(key)
+                return entries[key]
+
+        version = self._versions.get(table, 0)
+        body = await load()
+        entry = (body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+        if self._listening and self._versions.get(table, 0) == version:
+            entries = self._entries.setdefault(table, OrderedDict())
+            entries[key] = entry
+            while len(entries) > MAX_ENTRIES_PER_TABLE:
+                entries.popitem(last=False)
+        return entry
+
+    async def _listen(self):
+        dsn = SQLALCHEMY_DATABASE_URL
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(TABLE_CACHE_CHANNEL, self._on_notify)
+                # 接続していなかった間の変更は通知されていないため、キャッシュを作り直す
+                self.clear()
+                self._listening = True
+                logging.info("テーブルキャッシュの変更通知の待ち受けを開始しました。")
+                while True:
+                    await asyncio.sleep(RECONNECT_SECONDS)
+                    # 接続が切れたことに気づけるよう定期的に問い合わせる（切れていれば例外になり再接続する）
+                    await connection.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"テーブルキャッシュの変更通知を待ち受けできません（キャッシュを使わずに読み込みます）: {e}")
+            finally:
+                self._listening = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.invalidate(payload)
+
+_cache = TableCache()
+
+def start():
+    if TABLE_CACHE_ENABLED:
+        _cache.start()
+
+async def stop():
+    await _cache.stop()
+
+def invalidate(table: str):
+    """変更したワーカー自身がすぐに新しい内容を返せるよう、通知を待たずにキャッシュを破棄する"""
+    _cache.invalidate(table)
+
+async def cached_json_response(request: Request, table: str, key: Hashable, load: Callable[[], Awaitable[bytes]]) -> Response:
+    """キャッシュしたJSONを返す。If-None-Match が ETag と一致する場合は 304 を返す"""
+    body, etag = await _cache.get(table, key, load)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,16 @@
+# src/backend/tests/conftest.py
+import os
+import sys
+import types
+
+# アプリのモジュールは src/backend を起点に import されている（from database import ... など）
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# api/__init__.py は OpenAI の APIキーと社内の証明書が必要なルーター（proposals など）を読み込むため、
+# テストでは __init__ を実行せずに api 配下のモジュール（api.box など）を読み込めるようにする
+if "api" not in sys.modules:
+    _api = types.ModuleType("api")
+    _api.__path__ = [os.path.join(BACKEND_DIR, "api")]
+    sys.modules["api"] = _api
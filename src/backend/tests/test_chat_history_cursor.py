@@ -0,0 +1,25 @@
+# src/backend/tests/test_chat_history_cursor.py
+from datetime import datetime
+
+import pytest
+
+fastapi = pytest.importorskip("fastapi")
+chat_history = pytest.importorskip("api.chat_history")
+
+@pytest.mark.parametrize("timestamp, message_id", [
+    (datetime(2025, 3, 1, 9, 30), 1),
+    (datetime(2025, 3, 1, 9, 30, 15, 123456), 987654321),
+])
+def test_cursor_round_trip(timestamp, message_id):
+    cursor = chat_history._encode_cursor(timestamp, message_id)
+    assert chat_history._decode_cursor(cursor) == (timestamp, message_id)
+
+def test_cursor_is_url_safe():
+    cursor = chat_history._encode_cursor(datetime(2025, 3, 1, 9, 30), 12345)
+    assert all(c.isalnum() or c in "-_=" for c in cursor)
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "MjAyNS0wMy0wMQ=="])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(fastapi.HTTPException) as exc_info:
+        chat_history._decode_cursor(cursor)
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,38 @@
+# src/backend/tests/test_escape_like.py
+import re
+
+import pytest
+
+pytest.importorskip("fastapi")
+projects = pytest.importorskip("api.projects")
+
+@pytest.mark.parametrize("value, expected", [
+    ("株式会社サンプル", "株式会社サンプル"),
+    ("100%", "100\\%"),
+    ("a_b", "a\\_b"),
+    ("C:\\box", "C:\\\\box"),
+    ("\\%_", "\\\\\\%\\_"),
+])
+def test_escape_like(value, expected):
+    assert projects._escape_like(value) == expected
+
+def _like_to_regex(pattern: str) -> str:
+    """ESCAPE '\\' を指定した LIKE のパターンを正規表現に変換する（エスケープの検証用）"""
+    regex = ""
+    chars = iter(pattern)
+    for c in chars:
+        if c == "\\":
+            regex += re.escape(next(chars))
+        elif c == "%":
+            regex += ".*"
+        elif c == "_":
+            regex += "."
+        else:
+            regex += re.escape(c)
+    return regex
+
+@pytest.mark.parametrize("value", ["100%", "a_b", "C:\\box", "\\%_"])
+def test_escaped_value_matches_only_itself(value):
+    regex = _like_to_regex(f"%{projects._escape_like(value)}%")
+    assert re.fullmatch(regex, f"顧客 {value} 様", re.S)
+    assert not re.fullmatch(regex, "顧客 " + value.replace("%", "x").replace("_", "y").replace("\\", "z") + " 様", re.S)
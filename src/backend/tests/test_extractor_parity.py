@@ -0,0 +1,120 @@
+# src/backend/tests/test_extractor_parity.py
+"""抽出バックエンドの出力が、形式ごとの既定バックエンドの出力と一致するかを benchmarks/corpus で確認する"""
+import difflib
+import os
+
+import pytest
+
+text_extract = pytest.importorskip("api.text_extract")
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "corpus")
+MIN_SIMILARITY = 0.9  # 空白の違いを除いた類似度（benchmarks.extractors の parity と同じ計算）
+
+def _corpus_files():
+    return sorted(
+        os.path.join(CORPUS_DIR, name) for name in os.listdir(CORPUS_DIR)
+        if os.path.isfile(os.path.join(CORPUS_DIR, name))
+    )
+
+def _cases():
+    for file_path in _corpus_files():
+        for backend in text_extract.EXTRACTORS.get(text_extract.get_file_type(file_path), {}):
+            yield pytest.param(file_path, backend, id=f"{os.path.basename(file_path)}-{backend}")
+
+def _extract(file_path: str, backend: str = None) -> str:
+    try:
+        return text_extract.extract_text(file_path, backend)
+    except ImportError as e:
+        pytest.skip(f"バックエンドのライブラリがありません: {e}")
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+def test_every_corpus_file_has_an_extractor():
+    for file_path in _corpus_files():
+        assert text_extract.get_file_type(file_path) in text_extract.DEFAULT_BACKENDS, file_path
+
+@pytest.mark.parametrize("file_path, backend", _cases())
+def test_backend_matches_default(file_path, backend):
+    expected = _extract(file_path)
+    actual = _extract(file_path, backend)
+    assert expected.strip(), "既定バックエンドの抽出結果が空です"
+    similarity = difflib.SequenceMatcher(None, _normalize(expected), _normalize(actual)).ratio()
+    assert similarity >= MIN_SIMILARITY, f"{backend}: similarity={similarity:.3f}"
+
+@pytest.mark.parametrize("file_path", _corpus_files(), ids=os.path.basename)
+def test_pages_join_to_full_text(file_path):
+    expected = _extract(file_path)
+    assert "".join(text_extract.iter_pages(file_path)) == expected
+
+def test_utf8_and_cp932_text_give_the_same_result():
+    utf8 = _extract(os.path.join(CORPUS_DIR, "sample_utf8.txt"))
+    cp932 = _extract(os.path.join(CORPUS_DIR, "sample_cp932.txt"))
+    assert utf8 == cp932
+
+# --- Office: iterparse / read-only で読んだ結果を、各ライブラリで文書全体を読み込んだ結果と比較する ---
+
+def _docx_reference_pages(file_path: str):
+    """python-docx で本文の段落と表を文書順に読み、改ページ（w:br type="page"）を含む段落の後で区切る"""
+    docx = pytest.importorskip("docx")
+    from docx.table import Table
+
+    pages = [[]]
+    for block in docx.Document(file_path).iter_inner_content():
+        if isinstance(block, Table):
+            pages[-1].extend(p.text for row in block.rows for cell in row.cells for p in cell.paragraphs)
+            continue
+        pages[-1].append(block.text)
+        if block._p.xpath('.//w:br[@w:type="page"]'):
+            pages.append([])
+    return ["\n".join(page) for page in pages]
+
+def _pptx_reference_pages(file_path: str):
+    """python-pptx でスライドごとに図形のテキスト（表はセルを行順）を読む"""
+    pptx = pytest.importorskip("pptx")
+
+    pages = []
+    for slide in pptx.Presentation(file_path).slides:
+        texts = []
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                texts.extend(p.text for p in shape.text_frame.paragraphs)
+            elif shape.has_table:
+                texts.extend(cell.text for row in shape.table.rows for cell in row.cells)
+        pages.append("\n".join(texts))
+    return pages
+
+def _xlsx_reference_pages(file_path: str):
+    """openpyxl で read-only を使わずにブックを読み込み、extract_xlsx_openpyxl と同じ形式で出力する"""
+    openpyxl = pytest.importorskip("openpyxl")
+
+    pages = []
+    for sheet in openpyxl.load_workbook(file_path, data_only=True).worksheets:
+        lines = [f"# {sheet.title}\n"]
+        for row in sheet.iter_rows(values_only=True):
+            values = ['' if value is None else str(value) for value in row]
+            while values and values[-1] == '':
+                values.pop()
+            if values:
+                lines.append('\t'.join(values) + '\n')
+        pages.append(''.join(lines) + '\n')
+    return pages
+
+@pytest.mark.parametrize("file_name, reference", [
+    ("sample.docx", _docx_reference_pages),
+    ("sample.pptx", _pptx_reference_pages),
+])
+def test_office_pages_match_library(file_name, reference):
+    file_path = os.path.join(CORPUS_DIR, file_name)
+    expected = reference(file_path)
+    pages = list(text_extract.iter_pages(file_path))
+    assert len(pages) == len(expected) > 1
+    for page, expected_page in zip(pages, expected):
+        assert expected_page.strip()
+        assert _normalize(page) == _normalize(expected_page)
+
+def test_xlsx_pages_match_openpyxl():
+    file_path = os.path.join(CORPUS_DIR, "sample.xlsx")
+    expected = _xlsx_reference_pages(file_path)
+    assert len(expected) > 1
+    assert list(text_extract.iter_pages(file_path)) == expected
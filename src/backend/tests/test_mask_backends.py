@@ -0,0 +1,44 @@
+# src/backend/tests/test_mask_backends.py
+"""
+int8 / onnx バックエンドのマスキング結果が fp32 と一致するかを確認する。
+モデルを読み込むため、MASK_MODEL_PATH にモデルのフォルダを指定した環境でのみ実行する。
+"""
+import difflib
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+if not os.path.isdir(os.getenv("MASK_MODEL_PATH", "")):
+    pytest.skip("MASK_MODEL_PATH にマスキングモデルがありません", allow_module_level=True)
+
+MIN_SIMILARITY = 0.95  # benchmarks.mask_backends の --min-similarity の既定値と同じ
+
+@pytest.fixture(scope="module")
+def mask_service():
+    # 基準となる fp32 モデルを既定モデルとして読み込む（MASK_BACKEND は読み込み時にだけ参照される）
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("MASK_BACKEND", "fp32")
+        import mask_service
+    return mask_service
+
+@pytest.fixture(scope="module")
+def fp32_outputs(mask_service):
+    from benchmarks.mask_backends import SAMPLE_TEXTS
+    return [mask_service.generate_masked_text(text) for text in SAMPLE_TEXTS]
+
+@pytest.mark.parametrize("backend", ["int8", "onnx"])
+def test_backend_matches_fp32(mask_service, fp32_outputs, backend):
+    from benchmarks.mask_backends import SAMPLE_TEXTS
+    if backend == "onnx":
+        pytest.importorskip("optimum.onnxruntime")
+
+    candidate = mask_service.load_model(backend)
+    similarities = []
+    for text, expected in zip(SAMPLE_TEXTS, fp32_outputs):
+        actual = mask_service.generate_masked_text(text, mask_model=candidate)
+        similarities.append(difflib.SequenceMatcher(None, expected, actual).ratio())
+    mean_similarity = sum(similarities) / len(similarities)
+    assert mean_similarity >= MIN_SIMILARITY, f"{backend}: 平均類似度 {mean_similarity:.3f}"
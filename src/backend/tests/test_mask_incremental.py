@@ -0,0 +1,82 @@
+# src/backend/tests/test_mask_incremental.py
+"""
+mask_text_incremental が変更された段落だけをマスキングし直し、段落の区切り（空行）をそのまま保つかを確認する。
+モデルは読み込まず、マスキングは渡された段落を記録して氏名を置き換えるだけのスタブにする。
+"""
+import importlib
+import sys
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+pytest.importorskip("cachetools")
+
+ORIGINAL = (
+    "議事録\n出席者: 山田、佐藤"
+    "\n\n"
+    "山田様の連絡先は 090-1234-5678 です。"
+    "\n 　\n"  # 空白だけの行も段落の区切りになる
+    "次回は4月1日に山田様を訪問する。"
+    "\n\t\n\n"
+    "以上\n"
+)
+
+def _mask(text: str) -> str:
+    return text.replace("山田", "＜氏名＞")
+
+@pytest.fixture
+def mask_service(monkeypatch):
+    # import 時にトークナイザーとモデルを読み込まないようにする
+    monkeypatch.setattr(transformers.AutoTokenizer, "from_pretrained", lambda *args, **kwargs: object())
+    monkeypatch.setattr(transformers.AutoModelForCausalLM, "from_pretrained", lambda *args, **kwargs: object())
+    monkeypatch.setattr(torch.cuda, "is_available", lambda: False)
+    monkeypatch.setenv("MASK_BACKEND", "fp32")
+
+    # スタブで読み込んだモジュールを他のテスト（test_mask_backends）に残さない
+    saved = sys.modules.pop("mask_service", None)
+    try:
+        yield importlib.import_module("mask_service")
+    finally:
+        sys.modules.pop("mask_service", None)
+        if saved is not None:
+            sys.modules["mask_service"] = saved
+
+@pytest.fixture
+def masked_paragraphs(mask_service, monkeypatch):
+    """モデルに渡された段落の一覧"""
+    paragraphs = []
+
+    def generate_masked_text(text, mask_model=None):
+        paragraphs.append(text)
+        return _mask(text)
+
+    monkeypatch.setattr(mask_service, "generate_masked_text", generate_masked_text)
+    return paragraphs
+
+def test_first_call_masks_every_paragraph(mask_service, masked_paragraphs):
+    result = mask_service.mask_text_incremental(ORIGINAL)
+
+    assert masked_paragraphs == [
+        "議事録\n出席者: 山田、佐藤",
+        "山田様の連絡先は 090-1234-5678 です。",
+        "次回は4月1日に山田様を訪問する。",
+        "\n以上\n",
+    ]
+    assert result["masked_text"] == _mask(ORIGINAL)
+    assert result["total_paragraphs"] == 4
+    assert result["reused_paragraphs"] == 0
+
+def test_only_the_edited_paragraph_is_masked_again(mask_service, masked_paragraphs):
+    mask_service.mask_text_incremental(ORIGINAL)
+    masked_paragraphs.clear()
+
+    edited = ORIGINAL.replace("4月1日", "4月8日")
+    result = mask_service.mask_text_incremental(edited)
+
+    assert masked_paragraphs == ["次回は4月8日に山田様を訪問する。"]
+    # 区切り（空行・空白だけの行）と未変更の段落はそのままの位置に残る
+    assert result["masked_text"] == _mask(edited)
+    assert result["total_paragraphs"] == 4
+    assert result["reused_paragraphs"] == 3
+    assert result["reused_chars"] == result["total_chars"] - len("次回は4月8日に山田様を訪問する。")
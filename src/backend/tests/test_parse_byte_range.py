@@ -0,0 +1,33 @@
+# src/backend/tests/test_parse_byte_range.py
+import pytest
+
+fastapi = pytest.importorskip("fastapi")
+box = pytest.importorskip("api.box")
+
+TOTAL = 1000
+
+@pytest.mark.parametrize("header", [None, "", "bytes=-", "items=0-10", "bytes=a-b", "bytes=0-1,5-6"])
+def test_whole_content_when_header_is_missing_or_invalid(header):
+    assert box.parse_byte_range(header, TOTAL) is None
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, TOTAL - 1)),
+    ("bytes=-100", (TOTAL - 100, TOTAL - 1)),
+    ("bytes=990-2000", (990, TOTAL - 1)),  # 終了位置は末尾に丸める
+    ("bytes=-5000", (0, TOTAL - 1)),  # 末尾からの長さが全体より長い場合は全体
+    (" bytes=0-0 ", (0, 0)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert box.parse_byte_range(header, TOTAL) == expected
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-1100", "bytes=20-10"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(fastapi.HTTPException) as exc_info:
+        box.parse_byte_range(header, TOTAL)
+    assert exc_info.value.status_code == 416
+    assert exc_info.value.headers["Content-Range"] == f"bytes */{TOTAL}"
+
+def test_empty_content_cannot_satisfy_any_range():
+    with pytest.raises(fastapi.HTTPException):
+        box.parse_byte_range("bytes=0-", 0)
@@ -0,0 +1,59 @@
+# src/backend/tests/test_snippets.py
+import pytest
+
+pytest.importorskip("sqlalchemy")
+extraction_service = pytest.importorskip("extraction_service")
+
+SNIPPET_CHARS = extraction_service.SNIPPET_CHARS
+
+def test_short_text_is_returned_whole_without_newlines():
+    assert extraction_service._make_snippet("見積書\n2025年度", ["見積"]) == "見積書 2025年度"
+
+def test_snippet_is_centered_on_the_first_match():
+    text = "あ" * 500 + "検索語" + "い" * 500
+    snippet = extraction_service._make_snippet(text, ["検索語"])
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "検索語" in snippet
+    assert len(snippet) == SNIPPET_CHARS + 2
+
+def test_snippet_without_match_is_the_head_of_the_text():
+    text = "x" * 500
+    assert extraction_service._make_snippet(text, ["見つからない"]) == "x" * SNIPPET_CHARS
+
+def test_match_is_case_insensitive():
+    snippet, highlights = extraction_service.make_highlighted_snippet("Hello World", ["world"])
+    assert snippet == "Hello World"
+    assert highlights == [(6, 11)]
+
+def test_full_width_text_matches_normalized_term():
+    # 検索語は NFKC 正規化・小文字化されて渡される
+    snippet, highlights = extraction_service.make_highlighted_snippet("ＡＢＣテスト", ["abc"])
+    assert [extraction_service.normalize_search_text(snippet[start:end]) for start, end in highlights] == ["abc"]
+
+def test_every_occurrence_is_highlighted():
+    snippet, highlights = extraction_service.make_highlighted_snippet("foo bar foo", ["foo"])
+    assert highlights == [(0, 3), (8, 11)]
+
+def test_overlapping_highlights_are_merged():
+    snippet, highlights = extraction_service.make_highlighted_snippet("abcdef", ["abc", "cde"])
+    assert highlights == [(0, 5)]
+
+def test_highlights_point_into_the_snippet():
+    text = "前置き" * 100 + "契約書の確認" + "後書き" * 100
+    snippet, highlights = extraction_service.make_highlighted_snippet(text, ["契約書", "確認"])
+    assert [snippet[start:end] for start, end in highlights] == ["契約書", "確認"]
+
+def test_search_query_is_normalized_into_terms_and_bigrams():
+    terms, bigrams = extraction_service.parse_search_query("  ＡＢＣ　見積 ")
+    assert terms == ["abc", "見積"]
+    assert bigrams == sorted(["ab", "bc", "見積"])
+
+def test_single_character_terms_are_only_allowed_with_a_longer_term():
+    terms, bigrams = extraction_service.parse_search_query("a 見積")
+    assert terms == ["a", "見積"]
+    assert bigrams == ["見積"]
+
+@pytest.mark.parametrize("query", ["", "   ", "a", "見 積"])
+def test_query_without_a_bigram_is_rejected(query):
+    with pytest.raises(ValueError):
+        extraction_service.parse_search_query(query)
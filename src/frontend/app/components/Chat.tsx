@@ -13,14 +13,20 @@ import { Send, Info, SquarePen } from 'lucide-react';
 import MaskingConfirmationModal from './MaskingConfirmationModal';
 
 interface ChatRecord {
+  message_id: string;
   sender: string;
   message: string;
   timestamp: string;
 }
 
+interface ChatHistoryPage {
+  messages: ChatRecord[];  // 新しい順
+  next_cursor: string | null;
+}
+
 export default function Chat() {
   // Chat Store
-  const { messages, addMessage, resetMessages } = useChatStore();
+  const { messages, addMessage, prependMessages, resetMessages, historyCursor, setHistoryCursor } = useChatStore();
   // Project Store
   const {
     selectedProject,
@@ -188,7 +194,8 @@ export default function Chat() {
     const currentMessages = useChatStore.getState().messages.map(msg => ({
       sender: msg.sender,
       message: msg.message,
-      timestamp: new Date().toISOString()
+      timestamp: msg.timestamp,
+      message_id: msg.message_id
     }));
 
     console.log("Request to save chat history:", {
@@ -222,13 +229,22 @@ export default function Chat() {
     setSelectedSessionLocal(sessionTitle);
     setSelectedSessionStore(sessionTitle);
     resetMessages();
+    await loadChatHistory(sessionTitle, null);
+  };
+
+  // 履歴を新しい順に1ページ取得し、表示中のメッセージの前に追加する
+  const loadChatHistory = async (sessionTitle: string, before: string | null) => {
     try {
-      const response = await axios.get<ChatRecord[]>(`http://127.0.0.1:8000/api/chat_history/history/${selectedProject?.id}/${sessionTitle}`, {
-        params: { model: selectedModel.value }
-      });
-      response.data.forEach(record => {
-        addMessage({ sender: record.sender as 'user' | 'ai', message: record.message });
+      const response = await axios.get<ChatHistoryPage>(`http://127.0.0.1:8000/api/chat_history/history/${selectedProject?.id}/${sessionTitle}`, {
+        params: { model: selectedModel.value, before: before ?? undefined }
       });
+      prependMessages(response.data.messages.slice().reverse().map(record => ({
+        sender: record.sender as 'user' | 'ai',
+        message: record.message,
+        timestamp: record.timestamp,
+        message_id: record.message_id
+      })));
+      setHistoryCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error loading chat history:', error);
     }
@@ -359,6 +375,16 @@ export default function Chat() {
         {/* チャットメッセージ表示 */}
         <div className="flex-1 bg-white p-4 rounded shadow mb-4" style={{overflowY: 'auto', height: 'calc(100% - 0.2rem)'}}>
           <ScrollableFeed>
+            {historyCursor && selectedSession && (
+              <div className="flex justify-center mb-2">
+                <button
+                  className="text-sm text-gray-500 hover:text-gray-700"
+                  onClick={() => loadChatHistory(selectedSession, historyCursor)}
+                >
+                  以前のメッセージを読み込む
+                </button>
+              </div>
+            )}
             {messages.map((msg, index) => (
               <div
                 key={index}
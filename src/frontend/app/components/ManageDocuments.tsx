@@ -19,6 +19,14 @@ interface UploadedFile {
   processed: boolean;
 }
 
+interface LocalFileSyncResponse {
+  files: UploadedFile[];
+  total: number;
+  added: number;
+  changed: number;
+  unchanged: number;
+}
+
 interface SlackChannel {
   id: string;
   name: string;
@@ -125,12 +133,12 @@ export default function ManageDocuments({ selectedProject }: Props) {
       const projectId = selectedProject.id;
   
       // ローカルファイルパスからファイル一覧を取得する処理
-      const response = await axios.post<UploadedFile[]>('http://127.0.0.1:8000/api/box/list-local-files', {
+      const response = await axios.post<LocalFileSyncResponse>('http://127.0.0.1:8000/api/box/list-local-files', {
         folder_path: fullFolderPath, // 修正：/ をそのまま使う
         project_id: projectId,  // project_idをリクエストに追加
       });
       console.log("APIレスポンス (list-local-files):", response.data);
-      setUploadedFiles(response.data);
+      setUploadedFiles(response.data.files);
     } catch (error) {
       console.error('Error fetching Box files:', error);
       alert('Boxフォルダ内のファイル取得に失敗しました。');
@@ -13,7 +13,6 @@ interface Project {
   customer_name: string;
   issues: string;
   is_archived: boolean;
-  bpmn_xml: string;
   stage: string;
   category: string;
   slack_channel_id: string;
@@ -22,6 +21,11 @@ interface Project {
   schedule: string;
 }
 
+interface ProjectSummaryPage {
+  projects: Project[];
+  next_cursor: number | null;
+}
+
 const stages = ['営業', '提案', '受注', 'デリバリー中', 'クローズ'];
 const categories = ['すべて', 'プロジェクト', 'ナレッジベース'];
 
@@ -43,8 +47,16 @@ export default function ProjectList() { // コンポーネント名を ProjectLi
   const fetchProjects = async () => {
     setLoading(true);
     try {
-      const response = await axios.get<Project[]>('http://127.0.0.1:8000/api/projects');
-      const allProjects = response.data;
+      // 一覧用の軽量な列だけをページごとに取得する（業務フローの XML などは含まれない）
+      const allProjects: Project[] = [];
+      let cursor: number | null = null;
+      do {
+        const response: { data: ProjectSummaryPage } = await axios.get<ProjectSummaryPage>('http://127.0.0.1:8000/api/projects/summary', {
+          params: { cursor: cursor ?? undefined, limit: 500 }
+        });
+        allProjects.push(...response.data.projects);
+        cursor = response.data.next_cursor;
+      } while (cursor !== null);
       const activeProjects = allProjects.filter(p => !p.is_archived);
       const archivedProjects = allProjects.filter(p => p.is_archived);
 
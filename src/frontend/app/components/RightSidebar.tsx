@@ -8,11 +8,17 @@ import useChatStore from '../store/chatStore';
 import axios from 'axios';
 
 interface ChatRecord {
+  message_id: string;
   sender: string;
   message: string;
   timestamp: string;
 }
 
+interface ChatHistoryPage {
+  messages: ChatRecord[];  // 新しい順
+  next_cursor: string | null;
+}
+
 interface Props {
   selectedModel: { value: string; label: string };
   selectedProject: any;
@@ -20,7 +26,7 @@ interface Props {
 
 export default function RightSidebar({ selectedModel, selectedProject }: Props) {
   const { projects, sessionTitles, setSessionTitles, setSelectedSession, } = useProjectStore();
-  const { resetMessages, addMessage } = useChatStore();
+  const { resetMessages, prependMessages, setHistoryCursor } = useChatStore();
   const [selectedSessionLocal, setSelectedSessionLocal] = useState<string | null>(null);
   const [openDropdownSession, setOpenDropdownSession] = useState<string | null>(null);
 
@@ -48,12 +54,17 @@ export default function RightSidebar({ selectedModel, selectedProject }: Props)
     setSelectedSession(sessionTitle);
     resetMessages();
     try {
-      const response = await axios.get<ChatRecord[]>(`http://127.0.0.1:8000/api/chat_history/history/${selectedProject?.id}/${sessionTitle}`, {
+      const response = await axios.get<ChatHistoryPage>(`http://127.0.0.1:8000/api/chat_history/history/${selectedProject?.id}/${sessionTitle}`, {
         params: { model: selectedModel.value }
       });
-      response.data.forEach(record => {
-        addMessage({ sender: record.sender as 'user' | 'ai', message: record.message });
-      });
+      // 最新のページだけを表示し、古いメッセージはチャット画面から読み込む
+      prependMessages(response.data.messages.slice().reverse().map(record => ({
+        sender: record.sender as 'user' | 'ai',
+        message: record.message,
+        timestamp: record.timestamp,
+        message_id: record.message_id
+      })));
+      setHistoryCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error loading chat history:', error);
     }
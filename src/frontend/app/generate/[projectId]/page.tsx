@@ -1,10 +1,11 @@
 // src/frontend/app/generate/[projectId]/page.tsx
 'use client'
 
-import { useReducer, useEffect } from 'react';
+import { useReducer, useEffect, useState } from 'react';
 import { useParams } from 'next/navigation';
 import BpmnViewer from '../BpmnViewer';
 import useFlowStore from '../../store/flowStore';
+import useProjectStore from '../../store/projectStore';
 import axios from 'axios';
 
 interface Solution {
@@ -115,15 +116,28 @@ export default function Generate() {
 
   useEffect(() => {
     if (selectedProject) {
-      dispatch({ type: 'SET_CUSTOMER_INFO', payload: selectedProject.customer_name });
-      dispatch({ type: 'SET_ISSUES', payload: selectedProject.issues });
-      dispatch({ type: 'SET_GENERATED_FLOW', payload: selectedProject.bpmn_xml });
-      dispatch({ type: 'SET_SOLUTION_REQUIREMENTS', payload: selectedProject.solution_requirements || '' });
-      setGeneratedFlow(selectedProject.bpmn_xml);
+      loadProjectDetail(selectedProject.id);
       fetchSolutions();
     }
   }, [selectedProject]);
 
+  // 一覧の行には業務フローの XML とソリューション要件が含まれないため、選択したプロジェクトの詳細を取得する
+  const loadProjectDetail = async (projectId: number) => {
+    try {
+      const response = await axios.get<Project>(`http://127.0.0.1:8000/api/projects/${projectId}`);
+      if (useProjectStore.getState().selectedProject?.id !== projectId) return;  // 取得中に別のプロジェクトが選択された
+      const project = response.data;
+      dispatch({ type: 'SET_CUSTOMER_INFO', payload: project.customer_name });
+      dispatch({ type: 'SET_ISSUES', payload: project.issues });
+      dispatch({ type: 'SET_GENERATED_FLOW', payload: project.bpmn_xml });
+      dispatch({ type: 'SET_SOLUTION_REQUIREMENTS', payload: project.solution_requirements || '' });
+      setGeneratedFlow(project.bpmn_xml);
+    } catch (error) {
+      console.error('Error fetching project:', error);
+      alert('プロジェクトの取得に失敗しました。');
+    }
+  };
+
   const fetchProjects = async () => {
     setLoadingProjects(true);
     try {
@@ -148,11 +162,7 @@ export default function Generate() {
   };
 
   const handleProjectSelect = (project: Project) => {
-    setSelectedProject(project);
-    dispatch({ type: 'SET_CUSTOMER_INFO', payload: project.customer_name });
-    dispatch({ type: 'SET_ISSUES', payload: project.issues });
-    dispatch({ type: 'SET_GENERATED_FLOW', payload: project.bpmn_xml });
-    setGeneratedFlow(project.bpmn_xml);
+    setSelectedProject(project);  // 詳細は useEffect で取得する
   };
 
   const handleGenerateRequirements = async () => {
@@ -4,18 +4,32 @@ import { create } from 'zustand';
 interface ChatMessage {
   sender: 'user' | 'ai';
   message: string;
+  timestamp?: string;  // 作成時刻（メッセージごとに固定する）
+  message_id?: string;  // 保存時の重複判定に使うID（メッセージの作成時に採番する）
 }
 
 interface ChatState {
   messages: ChatMessage[];
   addMessage: (msg: ChatMessage) => void;
+  prependMessages: (msgs: ChatMessage[]) => void;
   resetMessages: () => void;
+  historyCursor: string | null;  // さらに古い履歴を取得するためのカーソル
+  setHistoryCursor: (cursor: string | null) => void;
 }
 
 const useChatStore = create<ChatState>((set) => ({
   messages: [],
-  addMessage: (msg) => set((state) => ({ messages: [...state.messages, msg] })),
-  resetMessages: () => set({ messages: [] }),
+  addMessage: (msg) => set((state) => ({
+    messages: [...state.messages, {
+      ...msg,
+      timestamp: msg.timestamp ?? new Date().toISOString(),
+      message_id: msg.message_id ?? crypto.randomUUID(),
+    }]
+  })),
+  prependMessages: (msgs) => set((state) => ({ messages: [...msgs, ...state.messages] })),
+  resetMessages: () => set({ messages: [], historyCursor: null }),
+  historyCursor: null,
+  setHistoryCursor: (cursor) => set({ historyCursor: cursor }),
 }));
 
 export default useChatStore;
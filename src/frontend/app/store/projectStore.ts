@@ -4,14 +4,15 @@ import { create } from 'zustand';
 export interface SessionItem {
   session_title: string;
   latest_timestamp: string;
+  message_count: number;
 }
 
+// 一覧の行（業務フローの XML とソリューション要件は含まない。必要な場合は /api/projects/{id} で取得する）
 interface Project {
   id: number;
   customer_name: string;
   issues: string;
   is_archived: boolean;
-  bpmn_xml: string;
   stage: string;
   category: string;
   slack_channel_id: string;